@@ -1,8 +1,25 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.contrib.auth.admin import UserAdmin
+from django.contrib.admin.helpers import ActionForm
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast, NullIf
+
+from apps.storage.pagination import EstimatedCountPaginator
 
 from .models import CustomUser
+from .authentication import revoke_user_tokens
+
+
+class QuotaActionForm(ActionForm):
+    max_storage_gb = forms.DecimalField(
+        required=False,
+        min_value=settings.MIN_USER_BYTES / (1024 ** 3),
+        decimal_places=3,
+        label='Quota (GB)'
+    )
 
 
 class CustomUserAdmin(UserAdmin):
@@ -12,11 +29,25 @@ class CustomUserAdmin(UserAdmin):
         'full_name',
         'is_staff',
         'is_superuser',
+        'file_count',
         'storage_usage_column',
     )
     list_filter = (
         'is_staff',
         'is_superuser',
+        'is_active',
+    )
+    search_fields = (
+        'username',
+        'email',
+        'full_name',
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = QuotaActionForm
+    actions = (
+        'set_max_storage',
+        'reset_max_storage',
     )
     fieldsets = (
         (
@@ -73,23 +104,81 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Usage comes from the counter columns, the percentage is
+        # computed by the database so the column can be sorted
+        return super().get_queryset(request).annotate(
+            storage_usage_percent=Cast(
+                F('storage_used'),
+                FloatField()
+            ) * 100 / NullIf(F('max_storage'), 0)
+        )
+
+    @admin.display(
+        description='Storage usage',
+        ordering='storage_usage_percent'
+    )
     def storage_usage_column(self, obj):
-        usage = obj.get_storage_usage()
+        usage = obj.storage_used
         max_storage = obj.max_storage
-        percent = (usage / max_storage) * 100 if max_storage else 0
+        percent = obj.storage_usage_percent or 0
 
         return format_html(
             '<div style="width:100%; background:#ddd;">'
             '<div style="width:{}%; background:{}; height:20px;"></div>'
-            '<div>{:.1f}% ({} / {} MB)</div>'
+            '<div>{}% ({} / {} MB)</div>'
             '</div>',
             min(100, percent),
             'red' if percent > 90 else 'green',
-            percent,
+            f'{percent:.1f}',
             round(usage / (1024 * 1024)),
             round(max_storage / (1024 * 1024))
         )
 
-    storage_usage_column.short_description = 'Storage usage'
+    @admin.action(
+        description='Set the storage quota of selected users',
+        permissions=['change']
+    )
+    def set_max_storage(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        if not form.is_valid() \
+                or form.cleaned_data['max_storage_gb'] is None:
+            self.message_user(
+                request,
+                'Enter a quota of at least '
+                f'{settings.MIN_USER_BYTES // (1024 * 1024)} MB in GB.',
+                messages.ERROR
+            )
+            return
+
+        max_storage = int(form.cleaned_data['max_storage_gb'] * 1024 ** 3)
+        updated = queryset.update(max_storage=max_storage)
+        revoke_user_tokens(queryset.values_list('pk', flat=True))
+        self.message_user(
+            request,
+            f'Quota of {updated} users set to '
+            f'{form.cleaned_data["max_storage_gb"]} GB.',
+            messages.SUCCESS
+        )
+
+    @admin.action(
+        description='Reset the storage quota of selected users',
+        permissions=['change']
+    )
+    def reset_max_storage(self, request, queryset):
+        updated = queryset.update(
+            max_storage=Case(
+                When(is_staff=True, then=Value(settings.MAX_ADMIN_BYTES)),
+                default=Value(settings.DEFAULT_USER_BYTES)
+            )
+        )
+        revoke_user_tokens(queryset.values_list('pk', flat=True))
+        self.message_user(
+            request,
+            f'Quota of {updated} users reset to the default.',
+            messages.SUCCESS
+        )
+
 
 admin.site.register(CustomUser, CustomUserAdmin)
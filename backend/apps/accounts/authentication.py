@@ -0,0 +1,249 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REVOKED = 'revoked'
+# Longer than a database read: a request that loaded the token just
+# before its revocation cannot put it back into the cache
+TOKEN_REVOKED_TTL = 60
+REVOCATION_BATCH_SIZE = 1000
+# The user fields kept in the caches; the others (the password hash
+# among them) are loaded from the database when a view reads them
+CACHED_USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+
+def get_redis():
+    from apps.storage.download_stats import get_redis
+    return get_redis()
+
+
+def token_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def token_cache_key(digest):
+    return f'auth_token_user_{digest}'
+
+
+class LocalTokenCache:
+    """
+    In-process LRU of cached token users with a short TTL.
+
+    Entries are dropped by the revocations published on
+    AUTH_TOKEN_REVOCATION_CHANNEL, and the cache is only used while
+    this process is subscribed to it: a revocation missed during a
+    Redis outage cannot leave a token usable here.
+
+    `generation` changes with every revocation. A reader passes the
+    value it saw before reading Redis to set(), which skips the entry
+    when a revocation came in between.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.subscribed = threading.Event()
+        self.generation = 0
+        self.pid = None
+
+    def get(self, digest):
+        self.start_listener()
+        if not self.subscribed.is_set():
+            return None
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None:
+                return None
+            data, expires = entry
+            if expires < time.monotonic():
+                del self.entries[digest]
+                return None
+            self.entries.move_to_end(digest)
+            return data
+
+    def set(self, digest, data, generation=None):
+        if not self.subscribed.is_set():
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[digest] = (
+                data,
+                time.monotonic() + settings.AUTH_TOKEN_LOCAL_CACHE_TTL
+            )
+            self.entries.move_to_end(digest)
+            while len(self.entries) > settings.AUTH_TOKEN_LOCAL_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def discard(self, digests):
+        with self.lock:
+            self.generation += 1
+            for digest in digests:
+                self.entries.pop(digest, None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def start_listener(self):
+        # Started lazily in each process, a thread started before the
+        # server forks its workers would not run in them
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.generation += 1
+            self.entries.clear()
+            self.subscribed.clear()
+
+            redis = get_redis()
+            if redis is None:
+                return
+            threading.Thread(
+                target=self.listen,
+                args=(redis,),
+                name='auth-token-revocations',
+                daemon=True
+            ).start()
+
+    def listen(self, redis):
+        while True:
+            try:
+                pubsub = redis.pubsub()
+                pubsub.subscribe(settings.AUTH_TOKEN_REVOCATION_CHANNEL)
+                while True:
+                    message = pubsub.get_message(timeout=30)
+                    if message is None:
+                        continue
+                    if message['type'] == 'subscribe':
+                        self.subscribed.set()
+                    elif message['type'] == 'message':
+                        self.discard(message['data'].decode().split(','))
+            except Exception as e:
+                logger.warning(f"Token revocation subscription lost: {e}")
+            self.subscribed.clear()
+            self.clear()
+            time.sleep(1)
+
+
+local_tokens = LocalTokenCache()
+
+
+def revoke_tokens(keys):
+    """
+    Drops the tokens `keys` from the Redis cache and from the local
+    cache of every process; the next request with one of them reads
+    the database again.
+    """
+    digests = [token_digest(key) for key in keys]
+    redis = get_redis()
+    for start in range(0, len(digests), REVOCATION_BATCH_SIZE):
+        batch = digests[start:start + REVOCATION_BATCH_SIZE]
+        cache.set_many(
+            {token_cache_key(digest): TOKEN_REVOKED for digest in batch},
+            timeout=TOKEN_REVOKED_TTL
+        )
+        local_tokens.discard(batch)
+        if redis is not None:
+            redis.publish(
+                settings.AUTH_TOKEN_REVOCATION_CHANNEL,
+                ','.join(batch)
+            )
+
+
+def revoke_user_tokens(user_ids):
+    """
+    Revokes the tokens of `user_ids`, whose cached flags are outdated.
+    """
+    from rest_framework.authtoken.models import Token
+
+    revoke_tokens(
+        Token.objects.filter(
+            user_id__in=list(user_ids)
+        ).values_list('key', flat=True)
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication resolving tokens through the in-process LRU,
+    then the Redis cache, and only then the token and user join.
+
+    Only the user id and the CACHED_USER_FIELDS flags are cached. They
+    are outdated once the user is saved through the model (see
+    signals.py) or its tokens are revoked explicitly after queryset
+    updates.
+    """
+
+    def authenticate_credentials(self, key):
+        digest = token_digest(key)
+        data = local_tokens.get(digest)
+        if data is None:
+            generation = local_tokens.generation
+            cached = cache.get(token_cache_key(digest))
+            if cached is None or cached == TOKEN_REVOKED:
+                data = self.get_token_user(key)
+                if cached is None:
+                    cache.add(
+                        token_cache_key(digest),
+                        data,
+                        timeout=settings.AUTH_TOKEN_CACHE_TTL
+                    )
+            else:
+                data = cached
+            if cached != TOKEN_REVOKED:
+                local_tokens.set(digest, data, generation)
+
+        if not data['is_active']:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        # Every request gets its own instances, with the fields that
+        # are not cached deferred
+        user_model = get_user_model()
+        field_names = [
+            field.attname for field in user_model._meta.concrete_fields
+            if field.attname in data
+        ]
+        user = user_model.from_db(
+            None,
+            field_names,
+            [data[name] for name in field_names]
+        )
+        token = self.get_model().from_db(
+            None,
+            ['key', 'user_id'],
+            [key, user.pk]
+        )
+        token.user = user
+        return user, token
+
+    def get_token_user(self, key):
+        values = self.get_model().objects.filter(
+            key=key
+        ).values(
+            *(f'user__{field}' for field in CACHED_USER_FIELDS)
+        ).first()
+        if values is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return {
+            field: values[f'user__{field}']
+            for field in CACHED_USER_FIELDS
+        }
@@ -0,0 +1,74 @@
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from apps.keyset import get_ordering, order_by_keyset
+
+
+USER_ORDERING_FIELDS = (
+    'username',
+    'date_joined',
+    'storage_used',
+    'file_count',
+)
+DEFAULT_USER_ORDERING = 'username'
+
+
+def get_user_ordering(request):
+    return get_ordering(
+        request,
+        USER_ORDERING_FIELDS,
+        DEFAULT_USER_ORDERING
+    )
+
+
+class UserListFilterSerializer(serializers.Serializer):
+    search = serializers.CharField(
+        required=False,
+        min_length=3,
+        max_length=100,
+        help_text="Text to look for in logins, emails and full names"
+    )
+    is_active = serializers.BooleanField(
+        required=False
+    )
+    is_staff = serializers.BooleanField(
+        required=False
+    )
+
+
+def filter_users(queryset, data):
+    """
+    Applies validated UserListFilterSerializer data to `queryset`.
+    """
+    if 'search' in data:
+        # icontains compares UPPER(field::text), the expression of the
+        # trigram indexes of the accounts 0004 migration
+        queryset = queryset.filter(
+            Q(username__icontains=data['search'])
+            | Q(email__icontains=data['search'])
+            | Q(full_name__icontains=data['search'])
+        )
+    if 'is_active' in data:
+        queryset = queryset.filter(is_active=data['is_active'])
+    if 'is_staff' in data:
+        queryset = queryset.filter(is_staff=data['is_staff'])
+    return queryset
+
+
+class UserFilterBackend(BaseFilterBackend):
+    """
+    `search`, status filters and `ordering` of the user list. Storage
+    usage is ordered on the counter columns, no aggregation over files.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = UserListFilterSerializer(
+            data=request.query_params,
+            partial=True
+        )
+        params.is_valid(raise_exception=True)
+        return order_by_keyset(
+            filter_users(queryset, params.validated_data),
+            get_user_ordering(request)
+        )
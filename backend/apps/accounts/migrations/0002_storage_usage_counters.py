@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-18 15:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_storage_usage(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    UserFile = apps.get_model('storage', 'UserFile')
+
+    files = UserFile.objects.filter(
+        user=OuterRef('pk')
+    ).order_by().values('user')
+    CustomUser.objects.update(
+        storage_used=Coalesce(
+            Subquery(files.annotate(total=Sum('size')).values('total')),
+            0
+        ),
+        file_count=Coalesce(
+            Subquery(files.annotate(total=Count('pk')).values('total')),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('storage', '0003_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='file_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='storage_used',
+            field=models.BigIntegerField(default=0, editable=False, help_text="Total size of the user's files in bytes"),
+        ),
+        migrations.RunPython(
+            fill_storage_usage,
+            migrations.RunPython.noop
+        ),
+    ]
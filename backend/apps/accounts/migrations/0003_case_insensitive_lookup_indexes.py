@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 15:35
+
+from django.db import migrations, models
+from django.contrib.postgres.operations import AddIndexConcurrently
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0002_storage_usage_counters'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('username', models.TextField())), name='user_username_upper_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('email', models.TextField())), name='user_email_upper_idx'),
+        ),
+    ]
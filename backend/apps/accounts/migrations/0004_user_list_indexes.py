@@ -0,0 +1,65 @@
+# Generated by Django 4.2 on 2026-10-18 15:56
+
+from django.db import migrations, models
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    TrigramExtension,
+)
+
+
+# UPPER(field::text) trigram indexes for the `search` of the user list,
+# the expression of the `icontains` lookups. Built concurrently so the
+# table stays writable.
+SEARCH_INDEXES = (
+    ('user_username_trgm_idx', 'username'),
+    ('user_email_trgm_idx', 'email'),
+    ('user_full_name_trgm_idx', 'full_name'),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+            f'ON accounts_customuser USING gin '
+            f'((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'DROP INDEX CONCURRENTLY IF EXISTS {name}'
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_case_insensitive_lookup_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=models.Index(fields=['date_joined', 'id'], name='user_date_joined_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=models.Index(fields=['storage_used', 'id'], name='user_storage_used_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=models.Index(fields=['file_count', 'id'], name='user_file_count_idx'),
+        ),
+        TrigramExtension(),
+        migrations.RunPython(
+            create_search_indexes,
+            drop_search_indexes
+        ),
+    ]
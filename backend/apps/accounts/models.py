@@ -1,8 +1,9 @@
 import os
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast, Coalesce, Upper
+from django.db.models import Count, F, OuterRef, Subquery, Sum
 from django.conf import settings
-from django.core.cache import cache
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, RegexValidator
 
@@ -36,24 +37,90 @@ class CustomUser(AbstractUser):
         help_text="Maximum storage capacity in bytes"
     )
 
+    storage_used = models.BigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Total size of the user's files in bytes"
+    )
+    file_count = models.PositiveIntegerField(
+        default=0,
+        editable=False
+    )
+
+    COUNTER_FIELDS = ('storage_used', 'file_count')
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # A user from the token cache has most fields deferred; reading
+        # one of them loads them all in a single query
+        if fields is not None:
+            fields = set(fields)
+            deferred_fields = self.get_deferred_fields()
+            if fields & deferred_fields:
+                fields |= deferred_fields
+        super().refresh_from_db(using, fields, **kwargs)
+
     def get_storage_usage(self):
-        cache_key = f'user_{self.id}_storage_usage'
-        usage = cache.get(cache_key)
-        
-        if usage is None:
-            from apps.storage.models import UserFile
-            try:
-                usage = sum(
-                    file.size for file in
-                    UserFile.objects.filter(user=self).only('size')
-                )
-                cache.set(cache_key, usage, timeout=300)
-            except Exception:
-                usage = 0
-
-        return usage
+        self.refresh_from_db(fields=self.COUNTER_FIELDS)
+        return self.storage_used
+
+    @classmethod
+    def adjust_storage_usage(cls, user_id, size_delta, count_delta):
+        cls.objects.filter(pk=user_id).update(
+            storage_used=F('storage_used') + size_delta,
+            file_count=F('file_count') + count_delta
+        )
+
+    @classmethod
+    def reconcile_storage_usage(cls, user_ids):
+        """
+        Recomputes the counters of `user_ids` from their files and fixes
+        the ones that drifted. Returns the number of corrected users.
+        """
+        from apps.storage.models import UserFile
+
+        files = UserFile.objects.filter(
+            user=OuterRef('pk')
+        ).order_by().values('user')
+        actual_size = Coalesce(
+            Subquery(files.annotate(total=Sum('size')).values('total')),
+            0
+        )
+        actual_count = Coalesce(
+            Subquery(files.annotate(total=Count('pk')).values('total')),
+            0
+        )
+
+        with transaction.atomic():
+            # Uploads committing meanwhile wait for these locks, so their
+            # increments land on top of the recomputed values
+            list(
+                cls.objects.select_for_update().filter(
+                    pk__in=user_ids
+                ).values_list('pk', flat=True)
+            )
+            return cls.objects.filter(
+                pk__in=user_ids
+            ).annotate(
+                actual_size=actual_size,
+                actual_count=actual_count
+            ).exclude(
+                storage_used=F('actual_size'),
+                file_count=F('actual_count')
+            ).update(
+                storage_used=actual_size,
+                file_count=actual_count
+            )
 
     def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Counters are only changed through adjust_storage_usage,
+            # a stale instance must not overwrite them
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+            ]
+
         if not self.pk:
             is_superuser = (
                 hasattr(self, 'is_superuser')
@@ -70,8 +137,6 @@ class CustomUser(AbstractUser):
             self.storage_path = os.path.join('user_storage', f'user_{self.id}')
             super().save(update_fields=['storage_path'])
 
-        cache.delete(f'user_{self.id}_storage_usage')
-
     def get_storage_usage_percent(self):
         if self.max_storage == 0:
             return 0
@@ -87,3 +152,27 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Match UPPER("field"::text) of the __iexact lookups
+            models.Index(
+                Upper(Cast('username', models.TextField())),
+                name='user_username_upper_idx'
+            ),
+            models.Index(
+                Upper(Cast('email', models.TextField())),
+                name='user_email_upper_idx'
+            ),
+            # Keyset pagination of the user list
+            models.Index(
+                fields=['date_joined', 'id'],
+                name='user_date_joined_idx'
+            ),
+            models.Index(
+                fields=['storage_used', 'id'],
+                name='user_storage_used_idx'
+            ),
+            models.Index(
+                fields=['file_count', 'id'],
+                name='user_file_count_idx'
+            ),
+        ]
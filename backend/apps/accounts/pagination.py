@@ -0,0 +1,12 @@
+from apps.keyset import KeysetPagination
+
+from .filters import DEFAULT_USER_ORDERING, USER_ORDERING_FIELDS
+
+
+class UserCursorPagination(KeysetPagination):
+    """
+    Keyset pagination of the user list over (ordering field, id),
+    always on: a page holds `page_size` users, 100 by default.
+    """
+    ordering_fields = USER_ORDERING_FIELDS
+    default_ordering = DEFAULT_USER_ORDERING
@@ -20,6 +20,9 @@ class UserSerializer(serializers.ModelSerializer):
         read_only=True
     )
     storage_usage = serializers.SerializerMethodField()
+    file_count = serializers.IntegerField(
+        read_only=True
+    )
     max_storage_gb = serializers.SerializerMethodField()
 
     class Meta:
@@ -37,6 +40,7 @@ class UserSerializer(serializers.ModelSerializer):
             'is_active',
             'max_storage',
             'storage_usage',
+            'file_count',
             'max_storage_gb'
         ]
         extra_kwargs = {
@@ -49,7 +53,7 @@ class UserSerializer(serializers.ModelSerializer):
         }
 
     def get_storage_usage(self, obj):
-        return obj.get_storage_usage()
+        return obj.storage_used
 
     def get_max_storage_gb(self, obj):
         if obj.max_storage:
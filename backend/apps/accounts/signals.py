@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+from rest_framework.authtoken.models import Token
+
+from .models import CustomUser
+from .authentication import revoke_tokens, revoke_user_tokens
+
+
+# Saves that leave the cached user valid (login() stores last_login)
+UNCACHED_FIELDS = {'last_login'}
+
+
+@receiver(post_save, sender=CustomUser)
+def revoke_saved_user_tokens(sender, instance, created, update_fields,
+                             **kwargs):
+    """
+    Password changes, deactivations, quota and permission changes
+    reach every worker before the next request of the user.
+    """
+    if created or (update_fields and set(update_fields) <= UNCACHED_FIELDS):
+        return
+    transaction.on_commit(lambda: revoke_user_tokens([instance.pk]))
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    """
+    Logout, and the deletion of the user through the cascade.
+    """
+    transaction.on_commit(lambda: revoke_tokens([instance.key]))
@@ -0,0 +1,90 @@
+from django.urls import reverse
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+
+from apps.accounts.models import CustomUser
+
+
+class CustomUserAdminTestCase(TransactionTestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            username='siteadmin',
+            email='siteadmin@example.com',
+            full_name='Site Admin',
+            password='testpass123'
+        )
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:accounts_customuser_changelist')
+
+        self.users = []
+        for i, used in enumerate((50, 90, 10)):
+            user = CustomUser.objects.create_user(
+                username=f'quotauser{i}',
+                email=f'quotauser{i}@example.com',
+                full_name='Quota User',
+                password='testpass123',
+                max_storage=100
+            )
+            CustomUser.adjust_storage_usage(user.pk, used, 1)
+            self.users.append(user)
+
+    def tearDown(self):
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def test_sort_by_usage(self):
+        # The changelist counts the action checkbox as column 0
+        column = admin.site._registry[CustomUser].list_display.index(
+            'storage_usage_column'
+        ) + 1
+        response = self.client.get(self.url, {'o': f'-{column}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user.username for user in response.context['cl'].result_list],
+            ['quotauser1', 'quotauser0', 'quotauser2', 'siteadmin']
+        )
+        self.assertContains(response, '90.0% (0 / 0 MB)')
+
+    def run_action(self, action, **data):
+        return self.client.post(
+            self.url,
+            {
+                'action': action,
+                ACTION_CHECKBOX_NAME: [user.pk for user in self.users[:2]],
+                **data
+            },
+            follow=True
+        )
+
+    def test_set_max_storage(self):
+        response = self.run_action('set_max_storage', max_storage_gb='2.5')
+        self.assertContains(response, 'Quota of 2 users set to 2.5 GB.')
+        self.assertEqual(
+            list(
+                CustomUser.objects.filter(username__startswith='quotauser')
+                .order_by('username')
+                .values_list('max_storage', flat=True)
+            ),
+            [int(2.5 * 1024 ** 3), int(2.5 * 1024 ** 3), 100]
+        )
+
+    def test_set_max_storage_needs_quota(self):
+        response = self.run_action('set_max_storage')
+        self.assertContains(response, 'Enter a quota')
+        self.assertFalse(
+            CustomUser.objects.exclude(pk=self.admin.pk)
+            .exclude(max_storage=100).exists()
+        )
+
+    def test_reset_max_storage(self):
+        self.run_action('reset_max_storage')
+        self.users[0].refresh_from_db()
+        self.assertEqual(
+            self.users[0].max_storage,
+            settings.DEFAULT_USER_BYTES
+        )
+        self.users[2].refresh_from_db()
+        self.assertEqual(self.users[2].max_storage, 100)
@@ -0,0 +1,193 @@
+from unittest import mock
+
+from django.urls import reverse
+from django.db import connection
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.accounts.authentication import (
+    LocalTokenCache,
+    token_digest,
+    token_cache_key,
+)
+
+
+class CachedTokenAuthenticationTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='tokenuser',
+            email='token@example.com',
+            full_name='Token User',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('current-user')
+
+        self.admin = CustomUser.objects.create_superuser(
+            username='tokenadmin',
+            email='tokenadmin@example.com',
+            full_name='Token Admin',
+            password='testpass123'
+        )
+
+    def tearDown(self):
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def token_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            query['sql'] for query in queries
+            if 'authtoken_token' in query['sql']
+        ]
+
+    def test_token_lookup_is_cached(self):
+        self.assertEqual(len(self.token_queries()), 1)
+        self.assertEqual(self.token_queries(), [])
+
+    def test_only_flags_are_cached(self):
+        self.token_queries()
+        self.assertEqual(
+            cache.get(token_cache_key(token_digest(self.token.key))),
+            {
+                'id': self.user.pk,
+                'is_active': True,
+                'is_staff': False,
+                'is_superuser': False,
+            }
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['username'], 'tokenuser')
+        # The other fields of the user are read in one query
+        self.assertEqual(
+            [q for q in queries if 'accounts_customuser' in q['sql']],
+            queries[:1]
+        )
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revokes_token(self):
+        self.token_queries()
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_revokes_token(self):
+        self.token_queries()
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.patch(
+            reverse('user-detail', kwargs={'pk': self.user.pk}),
+            {'is_active': False},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_reloads_user(self):
+        self.token_queries()
+        self.user.set_password('newpass456')
+        self.user.save()
+
+        self.assertEqual(len(self.token_queries()), 1)
+
+    def test_login_keeps_cache(self):
+        self.token_queries()
+        response = self.client.post(
+            reverse('login'),
+            {'username': 'tokenuser', 'password': 'testpass123'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.token_queries(), [])
+
+    def test_user_deletion_revokes_token(self):
+        self.token_queries()
+        self.user.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_admin_quota_action_reloads_user(self):
+        self.token_queries()
+        self.client.force_login(self.admin)
+        self.client.post(
+            reverse('admin:accounts_customuser_changelist'),
+            {
+                'action': 'set_max_storage',
+                ACTION_CHECKBOX_NAME: [self.user.pk],
+                'max_storage_gb': '2',
+            }
+        )
+        self.client.logout()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['max_storage'], 2 * 1024 ** 3)
+
+
+@override_settings(
+    AUTH_TOKEN_LOCAL_CACHE_SIZE=2,
+    AUTH_TOKEN_LOCAL_CACHE_TTL=60
+)
+class LocalTokenCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tokens = LocalTokenCache()
+        # As if subscribed to the revocation channel
+        self.tokens.start_listener = lambda: None
+        self.tokens.subscribed.set()
+
+    def test_least_recently_used_is_evicted(self):
+        self.tokens.set('a', b'1')
+        self.tokens.set('b', b'2')
+        self.tokens.get('a')
+        self.tokens.set('c', b'3')
+
+        self.assertEqual(self.tokens.get('a'), b'1')
+        self.assertIsNone(self.tokens.get('b'))
+        self.assertEqual(self.tokens.get('c'), b'3')
+
+    def test_entries_expire(self):
+        self.tokens.set('a', b'1')
+        with mock.patch('time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(self.tokens.get('a'))
+
+    def test_revocation_discards(self):
+        self.tokens.set('a', b'1')
+        self.tokens.discard(['a', 'unknown'])
+        self.assertIsNone(self.tokens.get('a'))
+
+    def test_revocation_during_lookup(self):
+        generation = self.tokens.generation
+        self.tokens.discard(['a'])
+        self.tokens.set('a', b'1', generation)
+        self.assertIsNone(self.tokens.get('a'))
+
+        self.tokens.set('a', b'1', self.tokens.generation)
+        self.assertEqual(self.tokens.get('a'), b'1')
+
+    def test_unused_without_subscription(self):
+        self.tokens.subscribed.clear()
+        self.tokens.set('a', b'1')
+        self.tokens.subscribed.set()
+        self.assertIsNone(self.tokens.get('a'))
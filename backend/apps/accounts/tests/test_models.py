@@ -48,9 +48,44 @@ class CustomUserModelTest(TransactionTestCase):
 
         usage = self.user.get_storage_usage()
         self.assertEqual(usage, len(test_content))
+        self.assertEqual(self.user.file_count, 1)
 
-        cached_usage = cache.get(f'user_{self.user.id}_storage_usage')
-        self.assertEqual(cached_usage, usage)
+        user_file.delete()
+        self.assertEqual(self.user.get_storage_usage(), 0)
+        self.assertEqual(self.user.file_count, 0)
+
+    def test_stale_instance_keeps_counters(self):
+        UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('a.txt', b'abc'),
+            size=3
+        )
+        self.user.full_name = 'Renamed'
+        self.user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.storage_used, 3)
+        self.assertEqual(self.user.file_count, 1)
+
+    def test_reconcile_storage_usage(self):
+        UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('a.txt', b'abcd'),
+            size=4
+        )
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            storage_used=999,
+            file_count=7
+        )
+
+        corrected = CustomUser.reconcile_storage_usage([self.user.pk])
+        self.assertEqual(corrected, 1)
+        self.assertEqual(self.user.get_storage_usage(), 4)
+        self.assertEqual(self.user.file_count, 1)
+        self.assertEqual(
+            CustomUser.reconcile_storage_usage([self.user.pk]),
+            0
+        )
 
     def test_storage_usage_percent(self):
         cache.delete(f'user_{self.user.id}_storage_usage')
@@ -0,0 +1,44 @@
+import unittest
+
+from django.db import connection
+
+from apps.keyset import order_by_keyset
+from apps.accounts.models import CustomUser
+from apps.accounts.filters import filter_users
+from apps.storage.tests.test_query_plans import QueryPlanTestCase
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    "Query plans are checked on PostgreSQL"
+)
+class AccountsQueryPlanTestCase(QueryPlanTestCase):
+    def test_case_insensitive_username(self):
+        with self.seq_scans_disabled():
+            self.assertIndexed(
+                CustomUser.objects.filter(username__iexact='PlanUser7')
+            )
+
+    def test_case_insensitive_email(self):
+        with self.seq_scans_disabled():
+            self.assertIndexed(
+                CustomUser.objects.filter(
+                    email__iexact='PlanUser7@Example.com'
+                )
+            )
+
+    def test_user_list(self):
+        for ordering in ('-storage_used', 'file_count', '-date_joined'):
+            with self.subTest(ordering=ordering), self.seq_scans_disabled():
+                self.assertIndexed(
+                    order_by_keyset(CustomUser.objects.all(), ordering)[:100]
+                )
+
+    def test_user_search(self):
+        with self.seq_scans_disabled():
+            self.assertIndexed(
+                filter_users(
+                    CustomUser.objects.all(),
+                    {'search': 'planuser12'}
+                )
+            )
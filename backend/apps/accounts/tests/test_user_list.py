@@ -0,0 +1,142 @@
+from unittest import mock
+
+from django.urls import reverse
+from django.db import connection
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.accounts.pagination import UserCursorPagination
+
+
+class UserListTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            username='listadmin',
+            email='listadmin@example.com',
+            full_name='List Admin',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse('user-list')
+
+        for i, (used, count) in enumerate(((300, 3), (100, 1), (200, 2))):
+            user = CustomUser.objects.create_user(
+                username=f'member{i}',
+                email=f'member{i}@example.com',
+                full_name=f'Member Number {i}',
+                password='testpass123'
+            )
+            CustomUser.adjust_storage_usage(user.pk, used, count)
+
+    def tearDown(self):
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def collect_pages(self, params):
+        usernames = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            usernames += [u['username'] for u in response.json()['results']]
+            if not response.json()['next']:
+                return usernames
+            response = self.client.get(response.json()['next'])
+
+    def usernames(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [u['username'] for u in response.json()['results']]
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_users(self):
+        queries = self.count_queries()
+        for i in range(5):
+            CustomUser.objects.create_user(
+                username=f'extra{i}',
+                email=f'extra{i}@example.com',
+                full_name='Extra User',
+                password='testpass123'
+            )
+        self.assertEqual(self.count_queries(), queries)
+
+    def test_paginated_by_default(self):
+        with mock.patch.object(UserCursorPagination, 'page_size', 2):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            [u['username'] for u in response.json()['results']],
+            ['listadmin', 'member0']
+        )
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_usage_from_counters(self):
+        response = self.client.get(self.url, {'search': 'member0'})
+        user, = response.json()['results']
+        self.assertEqual(user['storage_usage'], 300)
+        self.assertEqual(user['file_count'], 3)
+
+    def test_ordering_by_usage_pages(self):
+        self.assertEqual(
+            self.collect_pages({'ordering': '-storage_used', 'page_size': 2}),
+            ['member0', 'member2', 'member1', 'listadmin']
+        )
+        self.assertEqual(
+            self.collect_pages({'ordering': 'file_count', 'page_size': 1}),
+            ['listadmin', 'member1', 'member2', 'member0']
+        )
+
+    def test_search(self):
+        for search, expected in (
+            ('MEMBER1', ['member1']),
+            ('member2@example', ['member2']),
+            ('number', ['member0', 'member1', 'member2']),
+        ):
+            with self.subTest(search=search):
+                self.assertEqual(
+                    self.usernames({'search': search}),
+                    expected
+                )
+
+    def test_filters(self):
+        CustomUser.objects.filter(username='member1').update(is_active=False)
+        self.assertEqual(
+            self.usernames({'is_active': 'false'}),
+            ['member1']
+        )
+        self.assertEqual(
+            self.usernames({'is_staff': 'true'}),
+            ['listadmin']
+        )
+
+    def test_invalid_parameters(self):
+        for params in (
+            {'ordering': 'password'},
+            {'search': 'ab'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_cursor_of_other_ordering_is_rejected(self):
+        response = self.client.get(
+            self.url,
+            {'ordering': 'storage_used', 'page_size': 1}
+        )
+        response = self.client.get(
+            response.json()['next'].replace(
+                'ordering=storage_used',
+                'ordering=username'
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -11,6 +11,8 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 
 from .models import CustomUser
+from .filters import UserFilterBackend
+from .pagination import UserCursorPagination
 from .serializers import (
     AdminCreateSerializer,
     LoginSerializer,
@@ -107,9 +109,16 @@ class LogoutView(generics.GenericAPIView):
 
 
 class UserListView(generics.ListAPIView):
+    """
+    Users with their storage usage, read from the counter columns.
+    Supports `search`, `is_active`, `is_staff` and `ordering`, pages
+    through `page_size`/`cursor` keyset pagination.
+    """
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+    filter_backends = [UserFilterBackend]
+    pagination_class = UserCursorPagination
 
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -159,7 +168,8 @@ def current_user(request):
         'is_staff': user.is_staff,
         'is_superuser': user.is_superuser,
         'is_active': user.is_active,
-        'storage_usage': user.get_storage_usage(),
+        'storage_usage': storage_usage,
+        'file_count': user.file_count,
         'max_storage': user.max_storage,
         'storage_usage_percent': storage_usage_percent
     })
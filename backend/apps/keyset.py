@@ -0,0 +1,170 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import F, Q
+from django.core.exceptions import ValidationError
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_ordering(request, fields, default):
+    ordering = request.query_params.get('ordering', default)
+    if ordering.lstrip('-') not in fields:
+        raise serializers.ValidationError({
+            'ordering': f"Allowed values: {', '.join(fields)} "
+                        "(prefix with '-' for descending order)"
+        })
+    return ordering
+
+
+def order_by_keyset(queryset, ordering):
+    """
+    Orders by `ordering` with `id` as tie-breaker. NULLs sort as the
+    largest values, so both directions are served by a single btree
+    index scanned forwards or backwards.
+    """
+    field = ordering.lstrip('-')
+    if ordering.startswith('-'):
+        return queryset.order_by(F(field).desc(nulls_first=True), '-id')
+    return queryset.order_by(F(field).asc(nulls_last=True), 'id')
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over (ordering field, id), the field and its
+    direction taken from the `ordering` parameter among
+    `ordering_fields`.
+
+    Each page is fetched with a range condition on the last row of
+    the previous page, so it costs O(page size) whatever the depth.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+    ordering_fields = ()
+    default_ordering = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_enabled(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(*position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        self.next_position = None
+        if self.has_next:
+            last = results[-1]
+            self.next_position = (
+                getattr(last, self.ordering.lstrip('-')),
+                last.pk
+            )
+        return results
+
+    def is_enabled(self, request):
+        return True
+
+    def get_ordering(self, request):
+        return get_ordering(
+            request,
+            self.ordering_fields,
+            self.default_ordering
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def after(self, value, pk):
+        """
+        Rows following (value, pk) in the current ordering, with NULLs
+        treated as the largest values (see order_by_keyset).
+        """
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        compare = 'lt' if descending else 'gt'
+        pk_after = Q(**{f'pk__{compare}': pk})
+
+        if value is None:
+            condition = Q(**{f'{field}__isnull': True}) & pk_after
+            if descending:
+                condition |= Q(**{f'{field}__isnull': False})
+            return condition
+
+        condition = Q(**{f'{field}__{compare}': value}) \
+            | (Q(**{field: value}) & pk_after)
+        if not descending:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    def encode_cursor(self, value, pk):
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = json.dumps([self.ordering, value, pk])
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            ordering, value, pk = json.loads(urlsafe_b64decode(encoded))
+            if ordering != self.ordering:
+                raise ValueError(ordering)
+            if value is not None:
+                value = self.to_python(model, value)
+            return value, int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, model, value):
+        field = model._meta.get_field(self.ordering.lstrip('-'))
+        return field.to_python(value)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(*self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri'
+                },
+                'results': schema,
+            },
+        }
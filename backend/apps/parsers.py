@@ -0,0 +1,24 @@
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+
+class BoundedJSONParser(JSONParser):
+    """
+    JSONParser refusing bodies over DATA_UPLOAD_MAX_MEMORY_SIZE, the
+    limit Django already applies to form fields.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if limit is not None and stream is not None:
+            data = stream.read(limit + 1)
+            if len(data) > limit:
+                raise ParseError(
+                    'Request body exceeded '
+                    'settings.DATA_UPLOAD_MAX_MEMORY_SIZE.'
+                )
+            stream = BytesIO(data)
+        return super().parse(stream, media_type, parser_context)
@@ -1,6 +1,63 @@
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.contrib.admin.views.main import PAGE_VAR
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.admin.options import IncorrectLookupParameters
 
-from .models import UserFile
+from .models import Blob, UserFile
+from .pagination import EstimatedCountPaginator
+
+
+class UserAutocompleteFilter(admin.ListFilter):
+    """
+    Owner filter of the file changelist. The user is picked with the
+    admin autocomplete instead of listing every account in the sidebar.
+    """
+    title = 'user'
+    parameter_name = 'user__id__exact'
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        self.value = params.pop(self.parameter_name, None)
+        self.field = model._meta.get_field('user')
+        self.admin_site = model_admin.admin_site
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.parameter_name]
+
+    def queryset(self, request, queryset):
+        if not self.value:
+            return queryset
+        try:
+            return queryset.filter(user_id=self.value)
+        except (ValueError, ValidationError) as e:
+            raise IncorrectLookupParameters(e)
+
+    def choices(self, changelist):
+        formfield = self.field.formfield(
+            widget=AutocompleteSelect(self.field, self.admin_site),
+            required=False
+        )
+        yield {
+            'selected': not self.value,
+            'query_string': changelist.get_query_string(
+                remove=[self.parameter_name, PAGE_VAR]
+            ),
+            'display': 'All',
+            'hidden': [
+                (name, value)
+                for name, value in changelist.params.items()
+                if name not in (self.parameter_name, PAGE_VAR)
+            ],
+            'widget': formfield.widget.render(
+                self.parameter_name,
+                self.value
+            ),
+        }
 
 
 @admin.register(UserFile)
@@ -12,14 +69,47 @@ class UserFileAdmin(admin.ModelAdmin):
         'upload_date'
     )
     list_filter = (
+        UserAutocompleteFilter,
+    )
+    list_select_related = (
         'user',
     )
     search_fields = (
         'original_name',
         'user__username'
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = (
         'size',
         'upload_date',
-        'last_download'
+        'last_download',
+        'download_count'
+    )
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(
+            UserFile._meta.get_field('user'),
+            self.admin_site
+        ).media
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = (
+        'sha256',
+        'size',
+        'refcount',
+        'created_at'
+    )
+    search_fields = (
+        'sha256',
+    )
+    readonly_fields = (
+        'sha256',
+        'file',
+        'size',
+        'refcount',
+        'created_at'
     )
@@ -0,0 +1,109 @@
+import io
+import os
+import zipfile
+import mimetypes
+
+from django.conf import settings
+from django.utils import timezone
+
+
+STORED_EXTENSIONS = {
+    '.7z', '.bz2', '.gz', '.rar', '.tgz', '.xz', '.zip', '.zst',
+    '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp', '.epub', '.jar',
+    '.apk', '.pdf',
+}
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    Write-only, unseekable sink: zipfile falls back to data
+    descriptors and the written bytes are drained after each chunk.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compress_type_for(name):
+    """
+    Already compressed content is stored as is, everything else deflated.
+    """
+    extension = os.path.splitext(name)[1].lower()
+    if extension in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+
+    mime_type = mimetypes.guess_type(name)[0] or ''
+    if mime_type.startswith(('video/', 'audio/')):
+        return zipfile.ZIP_STORED
+    if mime_type.startswith('image/') and mime_type not in (
+        'image/bmp',
+        'image/svg+xml',
+        'image/x-ms-bmp',
+    ):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def archive_names(user_files):
+    """
+    Yields (user_file, name inside the archive), suffixing duplicated
+    original names with " (n)".
+    """
+    seen = set()
+    for user_file in user_files:
+        name = user_file.original_name.replace('\\', '/').lstrip('/')
+        stem, extension = os.path.splitext(name)
+        counter = 1
+        while name.lower() in seen:
+            name = f'{stem} ({counter}){extension}'
+            counter += 1
+        seen.add(name.lower())
+        yield user_file, name
+
+
+def iter_zip(user_files, chunk_size=None):
+    """
+    Streams a ZIP64 archive of `user_files`, holding one chunk of
+    every file in memory at a time and nothing on disk.
+    """
+    return filter(None, _iter_zip_chunks(user_files, chunk_size))
+
+
+def _iter_zip_chunks(user_files, chunk_size):
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    stream = _ZipStream()
+
+    with zipfile.ZipFile(stream, 'w', allowZip64=True) as archive:
+        for user_file, name in archive_names(user_files):
+            info = zipfile.ZipInfo(
+                name,
+                date_time=timezone.localtime(
+                    user_file.upload_date
+                ).timetuple()[:6]
+            )
+            info.compress_type = compress_type_for(name)
+            info.file_size = user_file.size
+
+            source = user_file.open_content()
+            with source, archive.open(info, 'w', force_zip64=True) as target:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield stream.drain()
+            yield stream.drain()
+
+    yield stream.drain()
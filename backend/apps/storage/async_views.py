@@ -0,0 +1,154 @@
+from asgiref.sync import sync_to_async
+
+from django.views import View
+from django.http import JsonResponse
+from django.core.exceptions import PermissionDenied
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import UserFile
+from .caching import resolve_shared_link
+from .throttling import transfer_limiter
+from .views import (
+    attachment_response,
+    check_file_access,
+    shared_file_response,
+)
+
+
+class AsyncDownloadView(View):
+    """
+    Base of the ASGI download views: the file is sent by async
+    iterators, so a slow client does not hold a worker thread.
+    """
+    http_method_names = ['get']
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    async def initial(self, request):
+        """
+        Authenticates `request` and applies the throttle classes, what
+        APIView.initial does for the DRF views. Returns the DRF request
+        and an error response, None when the request may proceed.
+        """
+        drf_request = Request(
+            request,
+            authenticators=[
+                auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ]
+        )
+        try:
+            await sync_to_async(self.check_request)(drf_request)
+        except exceptions.APIException as e:
+            return drf_request, self.api_error(e)
+        return drf_request, None
+
+    def check_request(self, drf_request):
+        # Runs the authenticators, raising AuthenticationFailed
+        drf_request.user
+        waits = [
+            throttle.wait()
+            for throttle in (cls() for cls in self.throttle_classes)
+            if not throttle.allow_request(drf_request, self)
+        ]
+        if waits:
+            raise exceptions.Throttled(
+                wait=max((wait for wait in waits if wait is not None),
+                         default=None)
+            )
+
+    def error(self, detail, status):
+        return JsonResponse(
+            {'detail': detail},
+            status=status
+        )
+
+    def api_error(self, e):
+        response = self.error(str(e.detail), e.status_code)
+        if getattr(e, 'wait', None):
+            response['Retry-After'] = '%d' % e.wait
+        return response
+
+    async def send_file(self, request, user_file, build_response,
+                        user_id=None, shared_link=None):
+        """
+        Builds the response with `build_response`, the function the
+        sync view uses, inside the transfer limits.
+        """
+        limiter = await sync_to_async(transfer_limiter)(
+            user_id=user_id,
+            shared_link=shared_link
+        )
+        if limiter is not None:
+            try:
+                await sync_to_async(limiter.acquire)()
+            except exceptions.APIException as e:
+                return self.api_error(e)
+
+        try:
+            response = await sync_to_async(build_response)(
+                request,
+                user_file,
+                asynchronous=True
+            )
+        except Exception:
+            if limiter is not None:
+                await sync_to_async(limiter.release)()
+            raise
+        if limiter is not None:
+            response = await sync_to_async(limiter.limit_response)(response)
+        return response
+
+
+class AsyncFileDownloadView(AsyncDownloadView):
+    async def get(self, request, pk):
+        drf_request, response = await self.initial(request)
+        if response is not None:
+            return response
+        user = drf_request.user
+        if not user.is_authenticated:
+            return self.error(
+                "Authentication credentials were not provided.",
+                401
+            )
+
+        user_file = await UserFile.objects.filter(pk=pk).afirst()
+        if user_file is None or not user_file.file:
+            return self.error("File not found", 404)
+
+        try:
+            check_file_access(user, user_file)
+        except PermissionDenied as e:
+            return self.error(str(e), 403)
+
+        if not await sync_to_async(lambda: user_file.file_exists)():
+            return self.error("File not found in storage", 404)
+
+        return await self.send_file(
+            request,
+            user_file,
+            attachment_response,
+            user_id=user.id
+        )
+
+
+class AsyncSharedFileDownloadView(AsyncDownloadView):
+    async def get(self, request, shared_link):
+        drf_request, response = await self.initial(request)
+        if response is not None:
+            return response
+
+        user_file = await sync_to_async(resolve_shared_link)(shared_link)
+        if user_file is None or not user_file.file:
+            return self.error("File not found", 404)
+
+        if user_file.is_shared_link_expired():
+            return self.error("Срок действия ссылки истек", 410)
+
+        return await self.send_file(
+            request,
+            user_file,
+            shared_file_response,
+            user_id=drf_request.user.id,
+            shared_link=shared_link
+        )
@@ -0,0 +1,108 @@
+import mimetypes
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.http import content_disposition_header
+
+
+def is_local_storage(storage=None):
+    """
+    Whether files live on the local filesystem (MEDIA_ROOT) rather than
+    in an object storage without filesystem paths.
+    """
+    storage = storage or default_storage
+    try:
+        storage.path('')
+    except NotImplementedError:
+        return False
+    return True
+
+
+def _object_key(storage, name):
+    from storages.utils import clean_name
+
+    # django-storages prefixes names with the configured location
+    return storage._normalize_name(clean_name(name))
+
+
+def copy_object(source_name, target_name, storage=None):
+    """
+    Server side copy inside the bucket, the content does not pass
+    through the worker.
+    """
+    storage = storage or default_storage
+    storage.bucket.Object(_object_key(storage, target_name)).copy_from(
+        CopySource={
+            'Bucket': storage.bucket_name,
+            'Key': _object_key(storage, source_name),
+        }
+    )
+
+
+def iter_object_files(prefix, storage=None):
+    """
+    Yields (name, modified timestamp) of every object below `prefix`,
+    the object storage counterpart of walking a directory.
+    """
+    storage = storage or default_storage
+    paginator = storage.bucket.meta.client.get_paginator('list_objects_v2')
+    location = _object_key(storage, '')
+    for page in paginator.paginate(
+        Bucket=storage.bucket_name,
+        Prefix=_object_key(storage, prefix)
+    ):
+        for item in page.get('Contents', []):
+            name = item['Key'][len(location):].lstrip('/')
+            yield name, item['LastModified'].timestamp()
+
+
+def list_top_directories(storage=None):
+    """
+    Names of the directories (or common key prefixes) at the root of
+    the storage.
+    """
+    storage = storage or default_storage
+    try:
+        directories, _ = storage.listdir('')
+    except FileNotFoundError:
+        return []
+    return directories
+
+
+def presigned_download_url(user_file, content_type=None):
+    """
+    A time limited GET URL that serves the file as an attachment
+    straight from the bucket.
+    """
+    storage = user_file.file.storage
+    return storage.url(
+        user_file.file.name,
+        parameters={
+            'ResponseContentDisposition': content_disposition_header(
+                True,
+                user_file.original_name
+            ),
+            'ResponseContentType': content_type or mimetypes.guess_type(
+                user_file.original_name
+            )[0] or 'application/octet-stream',
+        },
+        expire=settings.STORAGE_PRESIGNED_URL_TTL
+    )
+
+
+def presigned_upload_url(name, size, storage=None):
+    """
+    A time limited PUT URL the client sends the whole content of `name`
+    to, `size` bytes long.
+    """
+    storage = storage or default_storage
+    return storage.bucket.meta.client.generate_presigned_url(
+        'put_object',
+        Params={
+            'Bucket': storage.bucket_name,
+            'Key': _object_key(storage, name),
+            'ContentLength': size,
+        },
+        ExpiresIn=settings.STORAGE_PRESIGNED_URL_TTL
+    )
+
@@ -0,0 +1,111 @@
+import time
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def files_version_key(user_id):
+    return f'user_files_{user_id}_version'
+
+
+def get_files_version(user_id):
+    key = files_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # A timestamp never collides with versions used before the
+        # key was evicted, so stale pages cannot come back
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_user_files(user_id):
+    """
+    Makes every cached page of the user's file list unreachable.
+    """
+    try:
+        cache.incr(files_version_key(user_id))
+    except ValueError:
+        cache.add(files_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def file_list_cache_key(request, user_id):
+    params = urlencode(sorted(request.query_params.items()))
+    digest = hashlib.md5(
+        f'{request.get_host()}{request.path}?{params}'.encode()
+    ).hexdigest()
+    return f'user_files_{user_id}_v{get_files_version(user_id)}_{digest}'
+
+
+def file_list_cache_timeout(rows):
+    """
+    CACHE_TTL, shortened so a page is rebuilt as soon as one of its
+    shared links expires (`is_shared_expired` is part of the payload).
+    """
+    now = timezone.now()
+    timeout = settings.CACHE_TTL
+    for row in rows:
+        expiry = row.get('shared_expiry')
+        expiry = parse_datetime(expiry) if expiry else None
+        if expiry and expiry > now:
+            timeout = min(timeout, (expiry - now).total_seconds() + 1)
+    return int(timeout)
+
+
+SHARED_LINK_FIELDS = (
+    'id',
+    'user_id',
+    'blob_id',
+    'file',
+    'encoding',
+    'original_name',
+    'size',
+    'upload_date',
+    'shared_expiry',
+)
+SHARED_LINK_MISSING = 'missing'
+SHARED_LINK_MISSING_TTL = 60
+
+
+def shared_link_key(shared_link):
+    return f'shared_link_{shared_link}'
+
+
+def resolve_shared_link(shared_link):
+    """
+    Returns an unsaved UserFile carrying what a shared download needs,
+    or None for an unknown link. Both answers are cached; the caller
+    still checks the expiry.
+    """
+    from .models import UserFile
+
+    key = shared_link_key(shared_link)
+    data = cache.get(key)
+
+    if data is None:
+        data = UserFile.objects.filter(
+            shared_link=shared_link
+        ).values(*SHARED_LINK_FIELDS).first()
+
+        if data is None:
+            cache.set(key, SHARED_LINK_MISSING, SHARED_LINK_MISSING_TTL)
+        else:
+            cache.set(key, data, settings.CACHE_TTL)
+
+    if data is None or data == SHARED_LINK_MISSING:
+        return None
+    return UserFile(shared_link=shared_link, **data)
+
+
+def invalidate_shared_links(shared_links):
+    keys = [
+        shared_link_key(shared_link)
+        for shared_link in shared_links
+        if shared_link
+    ]
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,247 @@
+import os
+import re
+import time
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Mod
+from django.core.files.storage import default_storage
+
+from .models import Blob, UploadSession, UserFile
+from .backends import (
+    is_local_storage,
+    iter_object_files,
+    list_top_directories,
+)
+
+
+logger = logging.getLogger(__name__)
+
+USER_DIR_RE = re.compile(r'^user_(\d+)_storage$')
+BLOB_PREFIXES = [f'{prefix:02x}' for prefix in range(256)]
+
+
+# Rows whose file is missing are marked on one pass and deleted on a
+# later one; a mark older than this is stale
+MISSING_MARK_TTL = 60 * 60 * 24 * 30
+
+
+def checkpoint_key(shard):
+    return f'storage:cleanup:shard:{shard}'
+
+
+def get_checkpoint(shard):
+    return cache.get(checkpoint_key(shard)) or {
+        'file_id': 0,
+        'user_dir': '',
+        'blob_prefix': -1,
+    }
+
+
+def save_checkpoint(shard, checkpoint):
+    cache.set(checkpoint_key(shard), checkpoint, timeout=None)
+
+
+def missing_mark_key(pk):
+    return f'storage:cleanup:missing:{pk}'
+
+
+def storage_is_mounted():
+    """
+    Whether the storage root exists and has content. A volume that is
+    not mounted looks like a storage where every file is missing.
+    """
+    try:
+        directories, files = default_storage.listdir('')
+    except FileNotFoundError:
+        return False
+    return bool(directories or files)
+
+
+def iter_storage_files(prefix):
+    """
+    Yields (name, modified timestamp) of every file below the `prefix`
+    directory of the storage.
+    """
+    if not is_local_storage():
+        yield from iter_object_files(f'{prefix}/')
+        return
+
+    root = default_storage.path('')
+    try:
+        entries = list(os.scandir(default_storage.path(prefix)))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_storage_files(os.path.relpath(entry.path, root))
+        elif entry.is_file(follow_symlinks=False):
+            yield os.path.relpath(entry.path, root), entry.stat().st_mtime
+
+
+def is_settled(modified, now):
+    """
+    Files younger than STORAGE_CLEANUP_GRACE may belong to an upload
+    whose row is not committed yet.
+    """
+    return now - modified > settings.STORAGE_CLEANUP_GRACE
+
+
+def reconcile_rows(shard, shards, checkpoint):
+    """
+    Checks the next keyset chunk of the shard's UserFile rows and
+    deletes the ones whose content is gone: rows are marked when first
+    found missing and deleted once still missing on a pass at least
+    STORAGE_CLEANUP_GRACE later, at most STORAGE_CLEANUP_MAX_DELETES
+    per run.
+    """
+    now = time.time()
+    batch = list(
+        UserFile.objects.alias(
+            shard=Mod('user_id', shards)
+        ).filter(
+            shard=shard,
+            pk__gt=checkpoint['file_id']
+        ).order_by('pk').values_list(
+            'pk',
+            'file'
+        )[:settings.STORAGE_CLEANUP_BATCH_SIZE]
+    )
+
+    marks = cache.get_many([missing_mark_key(pk) for pk, _ in batch])
+    found, new_marks, confirmed = [], {}, []
+    for pk, file_name in batch:
+        key = missing_mark_key(pk)
+        if file_name and default_storage.exists(file_name):
+            if key in marks:
+                found.append(key)
+        elif key not in marks:
+            new_marks[key] = now
+        elif is_settled(marks[key], now):
+            confirmed.append(pk)
+
+    if found:
+        cache.delete_many(found)
+    if new_marks:
+        cache.set_many(new_marks, timeout=MISSING_MARK_TTL)
+
+    if len(confirmed) > settings.STORAGE_CLEANUP_MAX_DELETES:
+        logger.warning(
+            f"Shard {shard}: {len(confirmed)} rows without files, "
+            f"deleting {settings.STORAGE_CLEANUP_MAX_DELETES}"
+        )
+        confirmed = confirmed[:settings.STORAGE_CLEANUP_MAX_DELETES]
+    deleted = 0
+    if confirmed:
+        deleted = UserFile.bulk_delete(
+            UserFile.objects.filter(pk__in=confirmed)
+        )
+        cache.delete_many([missing_mark_key(pk) for pk in confirmed])
+
+    if len(batch) < settings.STORAGE_CLEANUP_BATCH_SIZE:
+        checkpoint['file_id'] = 0
+    else:
+        checkpoint['file_id'] = batch[-1][0]
+    return deleted
+
+
+def reconcile_user_dirs(shard, shards, checkpoint):
+    """
+    Walks the next STORAGE_CLEANUP_DIR_BATCH user directories of the
+    shard and removes files no UserFile or UploadSession refers to.
+    """
+    now = time.time()
+    names = sorted(
+        name for name in list_top_directories()
+        if name > checkpoint['user_dir']
+    )
+
+    user_dirs = []
+    for name in names:
+        match = USER_DIR_RE.match(name)
+        if match and int(match.group(1)) % shards == shard:
+            user_dirs.append((name, int(match.group(1))))
+            if len(user_dirs) == settings.STORAGE_CLEANUP_DIR_BATCH:
+                break
+
+    removed = 0
+    for name, user_id in user_dirs:
+        referenced = set(
+            UserFile.objects.filter(
+                user_id=user_id,
+                file__startswith=f'{name}/'
+            ).values_list('file', flat=True)
+        ) | set(
+            UploadSession.objects.filter(
+                user_id=user_id
+            ).values_list('file', flat=True)
+        )
+
+        for file_name, modified in iter_storage_files(name):
+            if file_name not in referenced and is_settled(modified, now):
+                default_storage.delete(file_name)
+                removed += 1
+
+    if len(user_dirs) < settings.STORAGE_CLEANUP_DIR_BATCH:
+        checkpoint['user_dir'] = ''
+    else:
+        checkpoint['user_dir'] = user_dirs[-1][0]
+    return removed
+
+
+def reconcile_blobs(shard, shards, checkpoint):
+    """
+    Checks the next `blobs/xx/` prefix of the shard and removes content
+    that has no Blob row.
+    """
+    prefixes = BLOB_PREFIXES[shard::shards]
+    if not prefixes:
+        return 0
+    index = (checkpoint['blob_prefix'] + 1) % len(prefixes)
+    checkpoint['blob_prefix'] = index
+
+    now = time.time()
+    entries = {
+        os.path.basename(file_name).split('.')[0]: (file_name, modified)
+        for file_name, modified in iter_storage_files(
+            f'blobs/{prefixes[index]}'
+        )
+    }
+    known = set(
+        Blob.objects.filter(
+            sha256__in=entries.keys()
+        ).values_list('sha256', flat=True)
+    )
+
+    removed = 0
+    for sha256, (file_name, modified) in entries.items():
+        if sha256 not in known and is_settled(modified, now):
+            default_storage.delete(file_name)
+            removed += 1
+    return removed
+
+
+def reconcile_shard(shard, shards):
+    """
+    One incremental step over the shard: a chunk of rows, a few user
+    directories and one blob prefix, resuming from the checkpoint.
+    """
+    if not storage_is_mounted():
+        logger.error(
+            f"Storage root is missing or empty, shard {shard} skipped"
+        )
+        return {'skipped': True}
+
+    checkpoint = get_checkpoint(shard)
+    result = {
+        'missing_files_deleted': reconcile_rows(shard, shards, checkpoint),
+        'orphaned_files_removed': reconcile_user_dirs(
+            shard,
+            shards,
+            checkpoint
+        ),
+        'orphaned_blobs_removed': reconcile_blobs(shard, shards, checkpoint),
+    }
+    save_checkpoint(shard, checkpoint)
+    return result
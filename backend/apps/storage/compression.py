@@ -0,0 +1,211 @@
+import io
+import struct
+import bisect
+
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ENCODING_IDENTITY = ''
+ENCODING_ZSTD = 'zstd'
+ENCODING_CHOICES = [
+    (ENCODING_IDENTITY, 'identity'),
+    (ENCODING_ZSTD, 'zstd'),
+]
+
+# Seekable zstd format (contrib/seekable_format of the zstd sources):
+# independent frames followed by a skippable frame holding the
+# compressed and decompressed size of every frame
+SKIPPABLE_MAGIC = 0x184D2A5E
+SEEKABLE_MAGIC = 0x8F92EAB1
+SEEK_TABLE_FOOTER = struct.Struct('<IBI')
+SEEK_TABLE_HEADER = struct.Struct('<II')
+SEEK_TABLE_ENTRY = struct.Struct('<II')
+SEEK_TABLE_CHECKSUM_FLAG = 0x80
+
+
+def compression_enabled():
+    # Under 'accel' and 'redirect' nginx or the bucket send the stored
+    # bytes; compressed files would fall back to streaming from Django
+    return zstandard is not None and settings.STORAGE_COMPRESSION \
+        and settings.STORAGE_DOWNLOAD_MODE == 'django'
+
+
+def is_compressible(sample):
+    """
+    Whether the first chunk of an upload shrinks enough at a cheap
+    level to be worth storing the file compressed.
+    """
+    if not sample:
+        return False
+    compressed = zstandard.ZstdCompressor(level=1).compress(sample)
+    return len(compressed) <= len(sample) * settings.STORAGE_COMPRESSION_MIN_RATIO
+
+
+class SeekableZstdWriter:
+    """
+    Compresses what is written to `fileobj` into frames of
+    STORAGE_COMPRESSION_FRAME_SIZE uncompressed bytes, so that any
+    offset can later be read by decompressing a single frame.
+    `close` appends the seek table and leaves `fileobj` open.
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.frame_size = settings.STORAGE_COMPRESSION_FRAME_SIZE
+        self.compressor = zstandard.ZstdCompressor(
+            level=settings.STORAGE_COMPRESSION_LEVEL
+        )
+        self.buffer = bytearray()
+        self.frames = []
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.frame_size:
+            self._write_frame(bytes(self.buffer[:self.frame_size]))
+            del self.buffer[:self.frame_size]
+
+    def _write_frame(self, data):
+        frame = self.compressor.compress(data)
+        self.fileobj.write(frame)
+        self.frames.append((len(frame), len(data)))
+
+    def close(self):
+        if self.buffer:
+            self._write_frame(bytes(self.buffer))
+            self.buffer = bytearray()
+
+        entries = b''.join(
+            SEEK_TABLE_ENTRY.pack(compressed, decompressed)
+            for compressed, decompressed in self.frames
+        )
+        footer = SEEK_TABLE_FOOTER.pack(len(self.frames), 0, SEEKABLE_MAGIC)
+        self.fileobj.write(
+            SEEK_TABLE_HEADER.pack(
+                SKIPPABLE_MAGIC,
+                len(entries) + len(footer)
+            )
+        )
+        self.fileobj.write(entries)
+        self.fileobj.write(footer)
+
+
+class SeekableZstdReader(io.RawIOBase):
+    """
+    Read-only file object over the decompressed content of a seekable
+    zstd file. Only the frame holding the current offset is kept in
+    memory.
+    """
+
+    def __init__(self, fileobj):
+        super().__init__()
+        self.fileobj = fileobj
+        self.decompressor = zstandard.ZstdDecompressor()
+
+        fileobj.seek(-SEEK_TABLE_FOOTER.size, io.SEEK_END)
+        count, descriptor, magic = SEEK_TABLE_FOOTER.unpack(
+            fileobj.read(SEEK_TABLE_FOOTER.size)
+        )
+        if magic != SEEKABLE_MAGIC:
+            raise ValueError("Not a seekable zstd file")
+        entry_size = SEEK_TABLE_ENTRY.size
+        if descriptor & SEEK_TABLE_CHECKSUM_FLAG:
+            entry_size += 4
+
+        fileobj.seek(
+            -(SEEK_TABLE_FOOTER.size + count * entry_size),
+            io.SEEK_END
+        )
+        table = fileobj.read(count * entry_size)
+
+        self.compressed_offsets = [0]
+        self.offsets = [0]
+        self.frame_sizes = []
+        for index in range(count):
+            compressed, decompressed = SEEK_TABLE_ENTRY.unpack_from(
+                table,
+                index * entry_size
+            )
+            self.frame_sizes.append(compressed)
+            self.compressed_offsets.append(
+                self.compressed_offsets[-1] + compressed
+            )
+            self.offsets.append(self.offsets[-1] + decompressed)
+
+        self.size = self.offsets[-1]
+        self.position = 0
+        self.frame_index = None
+        self.frame = b''
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        self.position = offset
+        return self.position
+
+    def _load_frame(self, index):
+        if index != self.frame_index:
+            self.fileobj.seek(self.compressed_offsets[index])
+            self.frame = self.decompressor.decompress(
+                self.fileobj.read(self.frame_sizes[index]),
+                max_output_size=self.offsets[index + 1] - self.offsets[index]
+            )
+            self.frame_index = index
+        return self.frame
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+
+        chunks = []
+        while size > 0 and self.position < self.size:
+            index = bisect.bisect_right(self.offsets, self.position) - 1
+            frame = self._load_frame(index)
+            start = self.position - self.offsets[index]
+            chunk = frame[start:start + size]
+            chunks.append(chunk)
+            self.position += len(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.fileobj.close()
+        super().close()
+
+
+def open_decoded(storage, name, encoding):
+    """
+    Opens `name` of `storage` for reading its logical (decompressed)
+    content.
+    """
+    fileobj = storage.open(name, 'rb')
+    if encoding == ENCODING_ZSTD:
+        try:
+            return SeekableZstdReader(fileobj)
+        except Exception:
+            fileobj.close()
+            raise
+    return fileobj
@@ -0,0 +1,174 @@
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Case, F, Value, When
+from django.db.models import BigIntegerField, DateTimeField
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from .models import UserFile
+from .caching import invalidate_user_files
+
+
+logger = logging.getLogger(__name__)
+
+LAST_DOWNLOAD_KEY = 'storage:downloads:last'
+DOWNLOAD_COUNT_KEY = 'storage:downloads:count'
+
+
+def get_redis():
+    """
+    Redis connection of the default cache, or None when the cache is
+    not backed by django-redis (downloads are then written directly).
+    """
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return None
+
+
+def record_downloads(user_files):
+    """
+    Buffers a download of every file in `user_files` in Redis (latest
+    timestamp and a counter per file); `flush_downloads` moves them to
+    the database in batches. Without a reachable Redis they are
+    written directly, a download never fails on its statistics.
+    """
+    user_files = list(user_files)
+    if not user_files:
+        return
+
+    redis = get_redis()
+    if redis is not None:
+        now = timezone.now().timestamp()
+        pipe = redis.pipeline(transaction=False)
+        for user_file in user_files:
+            pipe.hset(LAST_DOWNLOAD_KEY, user_file.pk, now)
+            pipe.hincrby(DOWNLOAD_COUNT_KEY, user_file.pk, 1)
+        try:
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Cannot buffer downloads in Redis: {e}")
+            redis = None
+
+    if redis is None:
+        UserFile.objects.filter(
+            pk__in=[user_file.pk for user_file in user_files]
+        ).update(
+            last_download=timezone.now(),
+            download_count=F('download_count') + 1
+        )
+
+    for user_id in {user_file.user_id for user_file in user_files}:
+        invalidate_user_files(user_id)
+
+
+def pending_downloads(file_ids):
+    """
+    Returns {file_id: (last download, count)} of the buffered downloads
+    of `file_ids`, to be merged into values read from the database.
+    """
+    redis = get_redis()
+    file_ids = list(file_ids)
+    if redis is None or not file_ids:
+        return {}
+
+    pipe = redis.pipeline(transaction=False)
+    pipe.hmget(LAST_DOWNLOAD_KEY, file_ids)
+    pipe.hmget(DOWNLOAD_COUNT_KEY, file_ids)
+    try:
+        timestamps, counts = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Cannot read buffered downloads: {e}")
+        return {}
+
+    return {
+        file_id: (_from_timestamp(timestamp), int(count or 0))
+        for file_id, timestamp, count in zip(file_ids, timestamps, counts)
+        if timestamp is not None
+    }
+
+
+def merge_pending_download(user_file, pending):
+    if user_file.pk not in pending:
+        return
+    last_download, count = pending[user_file.pk]
+    if user_file.last_download is None \
+            or user_file.last_download < last_download:
+        user_file.last_download = last_download
+    user_file.download_count += count
+
+
+def flush_downloads(batch_size=500):
+    """
+    Moves the buffered downloads into the database, one UPDATE per
+    `batch_size` files. Returns the number of updated files.
+    """
+    redis = get_redis()
+    if redis is None:
+        return 0
+
+    pipe = redis.pipeline(transaction=True)
+    pipe.hgetall(LAST_DOWNLOAD_KEY)
+    pipe.hgetall(DOWNLOAD_COUNT_KEY)
+    pipe.delete(LAST_DOWNLOAD_KEY, DOWNLOAD_COUNT_KEY)
+    timestamps, counts, _ = pipe.execute()
+
+    pending = {
+        int(file_id): (_from_timestamp(timestamp), int(counts.get(file_id, 0)))
+        for file_id, timestamp in timestamps.items()
+    }
+    file_ids = sorted(pending)
+
+    try:
+        for start in range(0, len(file_ids), batch_size):
+            _update_batch(
+                {pk: pending[pk] for pk in file_ids[start:start + batch_size]}
+            )
+    except Exception:
+        logger.exception("Download stats flush failed, restoring the buffer")
+        _restore(redis, pending)
+        raise
+
+    return len(file_ids)
+
+
+def _update_batch(batch):
+    last_download = Case(
+        *(
+            When(pk=pk, then=Value(timestamp))
+            for pk, (timestamp, _) in batch.items()
+        ),
+        output_field=DateTimeField()
+    )
+    count = Case(
+        *(
+            When(pk=pk, then=Value(count))
+            for pk, (_, count) in batch.items()
+        ),
+        default=Value(0),
+        output_field=BigIntegerField()
+    )
+    UserFile.objects.filter(
+        pk__in=batch.keys()
+    ).update(
+        last_download=Greatest(
+            Coalesce(F('last_download'), last_download),
+            last_download
+        ),
+        download_count=F('download_count') + count
+    )
+
+
+def _restore(redis, pending):
+    pipe = redis.pipeline(transaction=False)
+    for pk, (timestamp, count) in pending.items():
+        pipe.hsetnx(LAST_DOWNLOAD_KEY, pk, timestamp.timestamp())
+        pipe.hincrby(DOWNLOAD_COUNT_KEY, pk, count)
+    pipe.execute()
+
+
+def _from_timestamp(value):
+    return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
@@ -0,0 +1,317 @@
+import re
+import uuid
+import asyncio
+import mimetypes
+from urllib.parse import quote
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    content_disposition_header,
+    http_date,
+    parse_http_date_safe,
+    quote_etag,
+)
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+
+from .backends import presigned_download_url
+
+
+RANGE_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+MAX_RANGES = 20
+
+
+def file_etag(user_file):
+    return quote_etag(
+        f'{user_file.pk}-{user_file.size}-'
+        f'{int(user_file.upload_date.timestamp())}'
+    )
+
+
+def file_last_modified(user_file):
+    return int(user_file.upload_date.timestamp())
+
+
+def parse_range_header(header, size):
+    """
+    Parses a `Range: bytes=...` header into a list of inclusive
+    (start, end) pairs.
+
+    Returns None when the header is absent, malformed or asks for too
+    many ranges (the whole file is served), and an empty list when no
+    range can be satisfied.
+    """
+    if not header:
+        return None
+
+    unit, _, ranges_spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not ranges_spec:
+        return None
+
+    specs = ranges_spec.split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        match = RANGE_RE.match(spec)
+        if not match:
+            return None
+        first, last = match.groups()
+
+        if not first:
+            if not last:
+                return None
+            suffix = int(last)
+            if suffix == 0:
+                continue
+            ranges.append((max(size - suffix, 0), size - 1))
+            continue
+
+        start = int(first)
+        end = int(last) if last else size - 1
+        if end < start:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    return _merge_ranges(ranges)
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    # A date validator only matches the exact Last-Modified of the
+    # representation (RFC 9110, 13.1.5)
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def iter_file_range(fileobj, start, length, chunk_size=None):
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    try:
+        fileobj.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fileobj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+async def aiter_file_range(open_file, start, length, chunk_size=None):
+    """
+    Async counterpart of `iter_file_range`: blocking file calls run in
+    the default executor and the next chunk is only read once the
+    server asks for it, so a slow client holds at most one chunk.
+    """
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    fileobj = await asyncio.to_thread(open_file)
+    try:
+        await asyncio.to_thread(fileobj.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(
+                fileobj.read,
+                min(chunk_size, remaining)
+            )
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(fileobj.close)
+
+
+def _iter_multipart(open_file, ranges, size, boundary, content_type):
+    for start, end in ranges:
+        yield _part_header(boundary, content_type, start, end, size)
+        yield from iter_file_range(open_file(), start, end - start + 1)
+        yield b'\r\n'
+    yield f'--{boundary}--\r\n'.encode()
+
+
+async def _aiter_multipart(open_file, ranges, size, boundary, content_type):
+    for start, end in ranges:
+        yield _part_header(boundary, content_type, start, end, size)
+        async for chunk in aiter_file_range(
+            open_file,
+            start,
+            end - start + 1
+        ):
+            yield chunk
+        yield b'\r\n'
+    yield f'--{boundary}--\r\n'.encode()
+
+
+def _part_header(boundary, content_type, start, end, size):
+    return (
+        f'--{boundary}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+    ).encode()
+
+
+def build_accel_response(user_file, content_type=None):
+    """
+    Delegates the transfer to nginx: the body is served from the
+    internal location, which also takes care of Range requests.
+    """
+    response = HttpResponse(
+        content_type=content_type or mimetypes.guess_type(
+            user_file.original_name
+        )[0] or 'application/octet-stream'
+    )
+    response['X-Accel-Redirect'] = (
+        settings.STORAGE_ACCEL_REDIRECT_LOCATION
+        + quote(user_file.file.name)
+    )
+    response['Content-Disposition'] = content_disposition_header(
+        True,
+        user_file.original_name
+    )
+    return response
+
+
+def build_file_response(request, user_file, content_type=None,
+                        asynchronous=False):
+    """
+    Serves `user_file` honouring conditional (If-None-Match,
+    If-Modified-Since, If-Range) and Range request headers.
+
+    Single ranges get a plain 206, several ranges a
+    multipart/byteranges 206, and the full file a regular
+    FileResponse. With STORAGE_DOWNLOAD_MODE = 'accel' the
+    bytes are sent by nginx instead, with 'redirect' the client
+    is sent to a presigned URL of the object storage.
+
+    `asynchronous` streams the body with async iterators, for
+    views served under ASGI.
+    """
+    size = user_file.size
+    etag = file_etag(user_file)
+    last_modified = file_last_modified(user_file)
+    filename = user_file.original_name
+
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+    if response is not None:
+        response.headers.setdefault('Accept-Ranges', 'bytes')
+        return response
+
+    # Compressed files are decompressed here, nginx and the bucket
+    # would serve the stored bytes as they are
+    mode = settings.STORAGE_DOWNLOAD_MODE if not user_file.encoding \
+        else 'django'
+
+    if mode == 'redirect':
+        return HttpResponseRedirect(
+            presigned_download_url(user_file, content_type)
+        )
+
+    if mode == 'accel':
+        response = build_accel_response(user_file, content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def open_file():
+        return user_file.open_content()
+
+    ranges = None
+    if _if_range_matches(request, etag, last_modified):
+        ranges = parse_range_header(request.headers.get('Range'), size)
+
+    if ranges == []:
+        response = HttpResponse(
+            status=416
+        )
+        response['Content-Range'] = f'bytes */{size}'
+
+    elif ranges is None or ranges == [(0, size - 1)]:
+        if asynchronous:
+            response = StreamingHttpResponse(
+                aiter_file_range(open_file, 0, size),
+                content_type=content_type or mimetypes.guess_type(
+                    filename
+                )[0] or 'application/octet-stream'
+            )
+            response['Content-Length'] = size
+            response['Content-Disposition'] = content_disposition_header(
+                True,
+                filename
+            )
+        else:
+            response = FileResponse(
+                open_file(),
+                content_type=content_type,
+                as_attachment=True,
+                filename=filename
+            )
+
+    else:
+        part_type = content_type or mimetypes.guess_type(filename)[0]\
+            or 'application/octet-stream'
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            if asynchronous:
+                content = aiter_file_range(open_file, start, end - start + 1)
+            else:
+                content = iter_file_range(open_file(), start, end - start + 1)
+            response = StreamingHttpResponse(
+                content,
+                status=206,
+                content_type=part_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            boundary = uuid.uuid4().hex
+            length = sum(
+                len(_part_header(boundary, part_type, start, end, size))
+                + (end - start + 1) + 2
+                for start, end in ranges
+            ) + len(f'--{boundary}--\r\n')
+
+            multipart = _aiter_multipart if asynchronous else _iter_multipart
+            response = StreamingHttpResponse(
+                multipart(open_file, ranges, size, boundary, part_type),
+                status=206,
+                content_type=f'multipart/byteranges; boundary={boundary}'
+            )
+            response['Content-Length'] = length
+
+        response['Content-Disposition'] = content_disposition_header(
+            True,
+            filename
+        )
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,151 @@
+from django.db.models import Case, FloatField, Q, TextField, Value, When
+from django.db.models.functions import Cast, Greatest, Upper
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from apps.keyset import get_ordering, order_by_keyset
+
+
+ORDERING_FIELDS = (
+    'upload_date',
+    'last_download',
+    'original_name',
+    'size',
+)
+DEFAULT_ORDERING = '-upload_date'
+
+
+class FileListFilterSerializer(serializers.Serializer):
+    size_min = serializers.IntegerField(
+        required=False,
+        min_value=0
+    )
+    size_max = serializers.IntegerField(
+        required=False,
+        min_value=0
+    )
+    uploaded_after = serializers.DateTimeField(
+        required=False
+    )
+    uploaded_before = serializers.DateTimeField(
+        required=False
+    )
+    shared = serializers.BooleanField(
+        required=False
+    )
+
+    def filter(self, queryset):
+        return filter_files(queryset, self.validated_data)
+
+
+def filter_files(queryset, data):
+    """
+    Applies validated FileListFilterSerializer data to `queryset`.
+    """
+    if 'size_min' in data:
+        queryset = queryset.filter(size__gte=data['size_min'])
+    if 'size_max' in data:
+        queryset = queryset.filter(size__lte=data['size_max'])
+    if 'uploaded_after' in data:
+        queryset = queryset.filter(upload_date__gte=data['uploaded_after'])
+    if 'uploaded_before' in data:
+        queryset = queryset.filter(upload_date__lt=data['uploaded_before'])
+
+    if 'shared' in data:
+        is_shared = Q(shared_link__isnull=False) & (
+            Q(shared_expiry__isnull=True)
+            | Q(shared_expiry__gt=timezone.now())
+        )
+        queryset = queryset.filter(
+            is_shared if data['shared'] else ~is_shared
+        )
+
+    return queryset
+
+
+class FileSearchSerializer(FileListFilterSerializer):
+    q = serializers.CharField(
+        min_length=3,
+        max_length=255,
+        help_text="Text to look for in file names and comments"
+    )
+
+    def validate(self, attrs):
+        # Validated as partial, so that absent filters stay unset
+        if 'q' not in attrs:
+            raise serializers.ValidationError({
+                'q': self.fields['q'].error_messages['required']
+            })
+        return attrs
+
+
+def search_files(queryset, query):
+    """
+    Files whose name or comment contains `query`, or has a word close
+    to it, annotated with a `rank`: name substring matches first, then
+    by trigram word similarity (comments count half).
+
+    The conditions and the rank are written on UPPER(field::text), the
+    expression of the trigram GIN indexes, like the one `icontains`
+    produces.
+    """
+    query = query.upper()
+    name = Upper(Cast('original_name', TextField()))
+    comment = Upper(Cast('comment', TextField()))
+    return queryset.alias(
+        name_upper=name,
+        comment_upper=comment
+    ).filter(
+        Q(original_name__icontains=query)
+        | Q(comment__icontains=query)
+        | Q(name_upper__trigram_word_similar=query)
+        | Q(comment_upper__trigram_word_similar=query)
+    ).annotate(
+        rank=Case(
+            When(original_name__icontains=query, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField()
+        ) + Greatest(
+            TrigramWordSimilarity(query, 'name_upper'),
+            TrigramWordSimilarity(query, 'comment_upper') * Value(0.5),
+            output_field=FloatField()
+        )
+    )
+
+
+class FileFilterBackend(BaseFilterBackend):
+    """
+    Size range, upload date range and shared status filters plus the
+    `ordering` parameter of the file list.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = FileListFilterSerializer(
+            data=request.query_params,
+            partial=True
+        )
+        params.is_valid(raise_exception=True)
+        return order_by_keyset(
+            params.filter(queryset),
+            get_ordering(request, ORDERING_FIELDS, DEFAULT_ORDERING)
+        )
+
+
+class FileSearchFilterBackend(BaseFilterBackend):
+    """
+    The `q` search of the file search endpoint, combined with the file
+    list filters, best matches first.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = FileSearchSerializer(
+            data=request.query_params,
+            partial=True
+        )
+        params.is_valid(raise_exception=True)
+        return search_files(
+            params.filter(queryset),
+            params.validated_data['q']
+        ).order_by('-rank', '-id')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from apps.storage.models import UserFile
+
+
+class Command(BaseCommand):
+    help = "Moves files uploaded before deduplication into the blob store"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500
+        )
+
+    def handle(self, *args, **options):
+        last_id = 0
+        processed = 0
+
+        while True:
+            batch = list(
+                UserFile.objects.filter(
+                    blob__isnull=True,
+                    pk__gt=last_id
+                ).order_by('pk')[:options['batch_size']]
+            )
+            if not batch:
+                break
+
+            for user_file in batch:
+                try:
+                    user_file.attach_blob()
+                    processed += 1
+                except OSError as e:
+                    self.stderr.write(
+                        f"Skipping file {user_file.pk}: {e}"
+                    )
+            last_id = batch[-1].pk
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Files moved to the blob store: {processed}")
+        )
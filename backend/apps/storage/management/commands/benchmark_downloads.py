@@ -0,0 +1,129 @@
+import time
+import asyncio
+import statistics
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens many concurrent, deliberately slow downloads of one URL "
+        "and reports latency and throughput. Run it against the WSGI "
+        "(gunicorn mycloud.wsgi) and the ASGI (uvicorn mycloud.asgi with "
+        "STORAGE_ASYNC_DOWNLOADS=True) deployments to compare them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'url',
+            help="Download URL, e.g. http://127.0.0.1:8000/api/storage/files/1/download/"
+        )
+        parser.add_argument(
+            '--token',
+            help="API token sent as 'Authorization: Token ...'"
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=200
+        )
+        parser.add_argument(
+            '--read-rate',
+            type=int,
+            default=256 * 1024,
+            help="Bytes per second read by every client"
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=300
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported")
+
+        started = time.monotonic()
+        results = asyncio.run(self.run(url, options))
+        elapsed = time.monotonic() - started
+
+        succeeded = [r for r in results if isinstance(r, tuple)]
+        failed = len(results) - len(succeeded)
+        if failed:
+            error = next(r for r in results if not isinstance(r, tuple))
+            self.stderr.write(f"First failure: {error!r}")
+        if not succeeded:
+            raise CommandError(f"All {failed} downloads failed")
+
+        first_bytes = sorted(r[0] for r in succeeded)
+        durations = sorted(r[1] for r in succeeded)
+        received = sum(r[2] for r in succeeded)
+
+        self.stdout.write(
+            f"downloads:        {len(succeeded)} ok, {failed} failed\n"
+            f"elapsed:          {elapsed:.2f}s\n"
+            f"first byte p50:   {statistics.median(first_bytes):.3f}s\n"
+            f"first byte p95:   {percentile(first_bytes, 95):.3f}s\n"
+            f"duration p50:     {statistics.median(durations):.3f}s\n"
+            f"duration p95:     {percentile(durations, 95):.3f}s\n"
+            f"throughput:       {received / elapsed / 1048576:.2f} MB/s"
+        )
+
+    async def run(self, url, options):
+        return await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    self.download(url, options),
+                    options['timeout']
+                )
+                for _ in range(options['concurrency'])
+            ),
+            return_exceptions=True
+        )
+
+    async def download(self, url, options):
+        """
+        Returns (time to first byte, duration, bytes received).
+        """
+        started = time.monotonic()
+        reader, writer = await asyncio.open_connection(
+            url.hostname,
+            url.port or 80
+        )
+        try:
+            path = url.path + (f'?{url.query}' if url.query else '')
+            headers = [
+                f'GET {path or "/"} HTTP/1.1',
+                f'Host: {url.netloc}',
+                'Connection: close',
+            ]
+            if options['token']:
+                headers.append(f"Authorization: Token {options['token']}")
+            writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode())
+            await writer.drain()
+
+            status_line = await reader.readline()
+            first_byte = time.monotonic() - started
+            if status_line.split(b' ')[1:2] != [b'200']:
+                raise RuntimeError(status_line.decode().strip())
+            await reader.readuntil(b'\r\n\r\n')
+
+            chunk_size = max(options['read_rate'] // 10, 1)
+            received = 0
+            while True:
+                chunk = await reader.read(chunk_size)
+                if not chunk:
+                    break
+                received += len(chunk)
+                await asyncio.sleep(len(chunk) / options['read_rate'])
+
+            return first_byte, time.monotonic() - started, received
+        finally:
+            writer.close()
+
+
+def percentile(values, percent):
+    index = min(int(len(values) * percent / 100), len(values) - 1)
+    return values[index]
@@ -0,0 +1,83 @@
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.storage.models import UserFile, link_storage_file, user_storage_name
+
+
+class Command(BaseCommand):
+    help = "Moves files of the user directories into the layout set by " \
+        "STORAGE_USER_DIR_LEVELS while they keep being served"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=5.0,
+            help="Seconds to wait before removing the old names of a "
+                 "batch, so downloads that already read them can open "
+                 "the file"
+        )
+
+    def handle(self, *args, **options):
+        last_id = 0
+        moved = 0
+
+        while True:
+            batch = list(
+                UserFile.objects.filter(
+                    blob__isnull=True,
+                    file__startswith='user_',
+                    pk__gt=last_id
+                ).only(
+                    'id',
+                    'user_id',
+                    'file',
+                    'shared_link'
+                ).order_by('pk')[:options['batch_size']]
+            )
+            if not batch:
+                break
+
+            old_names = []
+            for user_file in batch:
+                old_name = user_file.file.name
+                new_name = user_storage_name(
+                    user_file.user_id,
+                    os.path.basename(old_name)
+                )
+                if new_name == old_name:
+                    continue
+
+                # The new name is a second link to the content, so the
+                # file is readable under both names during the switch
+                try:
+                    link_storage_file(old_name, new_name)
+                except OSError as e:
+                    self.stderr.write(
+                        f"Skipping file {user_file.pk}: {e}"
+                    )
+                    continue
+
+                if user_file.relocate(new_name):
+                    old_names.append(old_name)
+                    moved += 1
+                else:
+                    default_storage.delete(new_name)
+            last_id = batch[-1].pk
+
+            if old_names:
+                time.sleep(options['pause'])
+                for old_name in old_names:
+                    default_storage.delete(old_name)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Files moved to the new layout: {moved}")
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 15:17
+
+from django.db import migrations, models
+from django.contrib.postgres.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('storage', '0003_blob'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='userfile',
+            index=models.Index(fields=['user', 'upload_date', 'id'], name='userfile_user_uploaded_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userfile',
+            index=models.Index(fields=['user', 'last_download', 'id'], name='userfile_user_downloaded_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userfile',
+            index=models.Index(fields=['user', 'original_name', 'id'], name='userfile_user_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userfile',
+            index=models.Index(fields=['user', 'size', 'id'], name='userfile_user_size_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 15:23
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0004_userfile_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userfile',
+            name='shared_link',
+            field=models.UUIDField(blank=True, default=uuid.uuid4, null=True, unique=True),
+        ),
+    ]
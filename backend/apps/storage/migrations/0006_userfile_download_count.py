@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 15:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0005_userfile_shared_link_nullable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userfile',
+            name='download_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 15:35
+
+from django.db import migrations, models
+from django.contrib.postgres.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('storage', '0006_userfile_download_count'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='uploadsession',
+            index=models.Index(fields=['expires_at'], name='uploadsession_expires_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userfile',
+            index=models.Index(condition=models.Q(('shared_link__isnull', False)), fields=['shared_expiry'], name='userfile_shared_expiry_idx'),
+        ),
+    ]
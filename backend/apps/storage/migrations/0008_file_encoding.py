@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0007_cleanup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='encoding',
+            field=models.CharField(blank=True, choices=[('', 'identity'), ('zstd', 'zstd')], default='', help_text='Compression of the stored content, size is uncompressed', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='userfile',
+            name='encoding',
+            field=models.CharField(blank=True, choices=[('', 'identity'), ('zstd', 'zstd')], default='', editable=False, help_text='Compression of the stored content, size is uncompressed', max_length=10),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.contrib.postgres.operations import (
+    BtreeGinExtension,
+    TrigramExtension,
+)
+
+
+# (user_id, UPPER(field::text)) trigram indexes for the file search;
+# the expression is the one of the `icontains` lookups. Built
+# concurrently so the table stays writable.
+SEARCH_INDEXES = (
+    ('userfile_name_trgm_idx', 'original_name'),
+    ('userfile_comment_trgm_idx', 'comment'),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+            f'ON storage_userfile USING gin '
+            f'(user_id, (UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'DROP INDEX CONCURRENTLY IF EXISTS {name}'
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('storage', '0008_file_encoding'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        BtreeGinExtension(),
+        migrations.RunPython(
+            create_search_indexes,
+            drop_search_indexes
+        ),
+    ]
@@ -1,20 +1,198 @@
 import os
 import uuid
+import shutil
+import hashlib
+import logging
 from datetime import timedelta
 
-from django.db import models
+from django.db.models import F
+from django.db import IntegrityError, models, transaction
+from django.conf import settings
 from django.utils import timezone
+from django.core.cache import cache
+from django.http import UnreadablePostError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 
 from apps.accounts.models import CustomUser
 
+from .backends import copy_object, is_local_storage
+from .caching import invalidate_shared_links
+from .compression import (
+    ENCODING_CHOICES,
+    ENCODING_IDENTITY,
+    ENCODING_ZSTD,
+    open_decoded,
+)
+from .previews import preview_source_type
+
+
+logger = logging.getLogger(__name__)
+
+
+def user_storage_name(user_id, filename):
+    """
+    Places `filename` in the directory of the user, fanned out over
+    STORAGE_USER_DIR_LEVELS levels of two hex characters taken from a
+    hash of the name (`user_1_storage/ab/cd/<name>`).
+    """
+    digest = hashlib.md5(filename.encode(), usedforsecurity=False).hexdigest()
+    levels = [
+        digest[2 * level:2 * level + 2]
+        for level in range(settings.STORAGE_USER_DIR_LEVELS)
+    ]
+    return os.path.join(
+        f'user_{user_id}_storage',
+        *levels,
+        filename
+    )
+
 
 def user_directory_path(instance, filename):
     ext = os.path.splitext(filename)[1]
-    filename = f"{uuid.uuid4()}{ext}"
+    return user_storage_name(
+        instance.user_id,
+        f"{uuid.uuid4()}{ext}"
+    )
+
+
+def link_storage_file(source_name, target_name):
+    """
+    Makes `target_name` point at the content of `source_name` without
+    copying it when both live on the same filesystem. Object storages
+    copy the object inside the bucket.
+    """
+    if not is_local_storage():
+        copy_object(source_name, target_name)
+        return
+
+    source = default_storage.path(source_name)
+    target = default_storage.path(target_name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def blob_directory_path(instance, filename):
+    # The same content stored with another encoding is another file
+    suffix = '.zst' if instance.encoding == ENCODING_ZSTD else ''
     return os.path.join(
-        f'user_{instance.user.id}_storage',
-        filename
+        'blobs',
+        instance.sha256[:2],
+        instance.sha256[2:4],
+        f'{instance.sha256}{suffix}'
+    )
+
+
+class Blob(models.Model):
+    sha256 = models.CharField(
+        max_length=64,
+        unique=True
+    )
+    file = models.FileField(
+        upload_to=blob_directory_path
+    )
+    size = models.BigIntegerField()
+    encoding = models.CharField(
+        max_length=10,
+        choices=ENCODING_CHOICES,
+        default=ENCODING_IDENTITY,
+        blank=True,
+        help_text="Compression of the stored content, size is uncompressed"
     )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of user files referencing the content"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    @classmethod
+    def acquire(cls, sha256, size=None, user_id=None):
+        """
+        Adds a reference to an existing blob, returns None if the
+        content is unknown.
+
+        With `user_id` only content that user's files already reference
+        is found: knowing a hash must not give access to the files of
+        other users.
+        """
+        blobs = cls.objects.filter(sha256=sha256)
+        if size is not None:
+            blobs = blobs.filter(size=size)
+        if user_id is not None:
+            blobs = blobs.filter(
+                pk__in=UserFile.objects.filter(
+                    user_id=user_id
+                ).values('blob_id')
+            )
+        if not blobs.update(refcount=F('refcount') + 1):
+            return None
+        return blobs.get()
+
+    @classmethod
+    def store(cls, storage_name, sha256, size, encoding=ENCODING_IDENTITY):
+        """
+        Adds a reference to the blob with the given content hash.
+
+        When the content is new, `storage_name` (stored with `encoding`)
+        is linked into the blob store. The caller removes `storage_name`
+        afterwards in both cases.
+        """
+        blob = cls.acquire(sha256)
+        if blob is not None:
+            return blob
+
+        blob = cls(
+            sha256=sha256,
+            size=size,
+            encoding=encoding,
+            refcount=1
+        )
+        blob.file.name = blob_directory_path(blob, None)
+        link_storage_file(storage_name, blob.file.name)
+        try:
+            with transaction.atomic():
+                blob.save()
+        except IntegrityError:
+            return cls.store(storage_name, sha256, size, encoding)
+        return blob
+
+    @classmethod
+    def release(cls, blob_id, count=1):
+        """
+        Drops `count` references; the content is unlinked together
+        with the row once nothing references it any more.
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(
+                pk=blob_id
+            ).first()
+            if blob is None:
+                return
+
+            blob.refcount = max(blob.refcount - count, 0)
+            if blob.refcount or blob.files.exists():
+                blob.save(update_fields=['refcount'])
+                return
+
+            blob.delete()
+            try:
+                blob.file.storage.delete(blob.file.name)
+            except Exception:
+                logger.exception(f"Error deleting blob {blob.file.name}")
+
+    def __str__(self):
+        return f"{self.sha256} ({self.refcount})"
+
+    class Meta:
+        verbose_name = 'Blob'
+        verbose_name_plural = 'Blobs'
 
 
 class UserFile(models.Model):
@@ -22,6 +200,13 @@ class UserFile(models.Model):
         CustomUser,
         on_delete=models.CASCADE
     )
+    blob = models.ForeignKey(
+        Blob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='files'
+    )
     original_name = models.CharField(
         max_length=255
     )
@@ -29,6 +214,14 @@ class UserFile(models.Model):
         upload_to=user_directory_path
     )
     size = models.BigIntegerField()
+    encoding = models.CharField(
+        max_length=10,
+        choices=ENCODING_CHOICES,
+        default=ENCODING_IDENTITY,
+        blank=True,
+        editable=False,
+        help_text="Compression of the stored content, size is uncompressed"
+    )
     upload_date = models.DateTimeField(
         auto_now_add=True
     )
@@ -36,12 +229,18 @@ class UserFile(models.Model):
         null=True,
         blank=True
     )
+    download_count = models.PositiveBigIntegerField(
+        default=0,
+        editable=False
+    )
     comment = models.TextField(
         blank=True
     )
     shared_link = models.UUIDField(
         default=uuid.uuid4,
-        unique=True
+        unique=True,
+        null=True,
+        blank=True
     )
     shared_expiry = models.DateTimeField(
         null=True,
@@ -52,23 +251,240 @@ class UserFile(models.Model):
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         if is_new:
-            self.original_name = os.path.basename(
-                self.file.name
-            )
-            self.size = self.file.size
+            if not self.original_name:
+                self.original_name = os.path.basename(
+                    self.file.name
+                )
+            if self.encoding == ENCODING_IDENTITY:
+                self.size = self.file.size
             if self.shared_expiry is None:
                 self.shared_expiry = timezone.now() + timedelta(days=7)
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                CustomUser.adjust_storage_usage(self.user_id, self.size, 1)
+                self.schedule_previews([self])
+
+    @classmethod
+    def bulk_create_for_user(cls, user, instances):
+        """
+        Inserts new files of `user` in one statement, applying the
+        defaults of `save` and updating the usage counters once.
+        """
+        expiry = timezone.now() + timedelta(days=7)
+        for instance in instances:
+            instance.user = user
+            if not instance.original_name:
+                instance.original_name = os.path.basename(
+                    instance.file.name
+                )
+            if instance.shared_expiry is None:
+                instance.shared_expiry = expiry
+
+        with transaction.atomic():
+            created = cls.objects.bulk_create(instances)
+            CustomUser.adjust_storage_usage(
+                user.pk,
+                sum(instance.size for instance in created),
+                len(created)
+            )
+            cls.schedule_previews(created)
+        return created
+
+    @staticmethod
+    def schedule_previews(user_files):
+        """
+        Queues the rendering of previews for the files that can have one,
+        once the transaction creating them commits.
+        """
+        from .tasks import generate_previews_task
+
+        for user_file in user_files:
+            if preview_source_type(user_file.original_name):
+                transaction.on_commit(
+                    lambda pk=user_file.pk: generate_previews_task.delay(pk)
+                )
+
+    @classmethod
+    def bulk_delete(cls, queryset):
+        """
+        Deletes the files of `queryset` in one transaction and adjusts
+        the usage counters once per owner. Releasing the blobs and
+        unlinking legacy files is left to a background task.
+        Returns the number of deleted files.
+        """
+        from .tasks import delete_file_contents_task
+
+        with transaction.atomic():
+            rows = list(
+                queryset.select_for_update().values_list(
+                    'pk',
+                    'user_id',
+                    'size',
+                    'blob_id',
+                    'file',
+                    'shared_link'
+                )
+            )
+            if not rows:
+                return 0
+
+            usage, blob_refs, file_names = {}, {}, []
+            for pk, user_id, size, blob_id, file_name, _ in rows:
+                size_delta, count_delta = usage.get(user_id, (0, 0))
+                usage[user_id] = (size_delta - size, count_delta - 1)
+                if blob_id:
+                    blob_refs[blob_id] = blob_refs.get(blob_id, 0) + 1
+                elif file_name:
+                    file_names.append(file_name)
+
+            cls.objects.filter(
+                pk__in=[row[0] for row in rows]
+            ).delete()
+            for user_id, (size_delta, count_delta) in usage.items():
+                CustomUser.adjust_storage_usage(
+                    user_id,
+                    size_delta,
+                    count_delta
+                )
+
+            transaction.on_commit(
+                lambda: delete_file_contents_task.delay(
+                    list(blob_refs.items()),
+                    file_names
+                )
+            )
+
+        invalidate_shared_links(row[5] for row in rows)
+        return len(rows)
+
+    @classmethod
+    def bulk_share(cls, queryset, expiry_days=None):
+        """
+        Set-wise version of FileShareSerializer.update: links that are
+        missing or expired are regenerated, the expiry is set to
+        `expiry_days` from now (or 7 days when it is missing or over).
+        Returns the number of updated files.
+        """
+        now = timezone.now()
+        links = []
+        with transaction.atomic():
+            files = list(
+                queryset.select_for_update().only(
+                    'id',
+                    'shared_link',
+                    'shared_expiry'
+                )
+            )
+            for file in files:
+                expired = file.is_shared_link_expired()
+                if expiry_days is not None:
+                    file.shared_expiry = now + timedelta(days=expiry_days)
+                elif file.shared_expiry is None or expired:
+                    file.shared_expiry = now + timedelta(days=7)
+
+                links.append(file.shared_link)
+                if not file.shared_link or expired:
+                    file.shared_link = uuid.uuid4()
+
+            cls.objects.bulk_update(
+                files,
+                ['shared_link', 'shared_expiry'],
+                batch_size=500
+            )
+
+        invalidate_shared_links(links)
+        return len(files)
 
     def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            super().delete(*args, **kwargs)
+            CustomUser.adjust_storage_usage(self.user_id, -self.size, -1)
+        invalidate_shared_links([self.shared_link])
+
+        if self.blob_id:
+            Blob.release(self.blob_id)
+            return
+
         if self.file:
             try:
-                storage = self.file.storage
-                path = self.file.path
-                storage.delete(path)
-            except Exception as e:
-                print(f"Error deleting file: {e}")
-        super().delete(*args, **kwargs)
+                self.file.storage.delete(self.file.name)
+            except Exception:
+                logger.exception(f"Error deleting file {self.file.name}")
+
+    def attach_blob(self):
+        """
+        Moves a file uploaded before deduplication (or through an upload
+        session) into the blob store, dropping its own copy if the
+        content is already known.
+        """
+        sha256 = hashlib.sha256()
+        with self.open_content() as source:
+            for chunk in iter(lambda: source.read(settings.UPLOAD_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+
+        old_name = self.file.name
+        blob = Blob.store(
+            old_name,
+            sha256.hexdigest(),
+            self.size,
+            self.encoding
+        )
+        updated = UserFile.objects.filter(
+            pk=self.pk,
+            blob__isnull=True
+        ).update(
+            blob=blob,
+            file=blob.file.name,
+            encoding=blob.encoding
+        )
+        if not updated:
+            Blob.release(blob.pk)
+            return
+
+        self.blob = blob
+        self.file.name = blob.file.name
+        self.encoding = blob.encoding
+        # Before the old copy goes away: a cached shared link still
+        # points at it. The link is read again, it may have been
+        # created since this instance was loaded
+        invalidate_shared_links(
+            UserFile.objects.filter(pk=self.pk).values_list(
+                'shared_link',
+                flat=True
+            )
+        )
+        if old_name != blob.file.name:
+            self.file.storage.delete(old_name)
+
+    def relocate(self, new_name):
+        """
+        Points the row at `new_name`, a link to the same content created
+        beforehand, unless the file has changed or been deleted since it
+        was read. Returns whether the row was updated.
+        """
+        updated = UserFile.objects.filter(
+            pk=self.pk,
+            file=self.file.name
+        ).update(
+            file=new_name
+        )
+        if updated:
+            self.file.name = new_name
+            invalidate_shared_links([self.shared_link])
+        return bool(updated)
+
+    def open_content(self):
+        """
+        Opens the content of the file for reading, decompressed when it
+        is stored compressed.
+        """
+        return open_decoded(self.file.storage, self.file.name, self.encoding)
+
+    @property
+    def file_exists(self):
+        return bool(self.file) and self.file.storage.exists(self.file.name)
 
     def is_shared_link_expired(self):
         if not self.shared_expiry:
@@ -81,3 +497,166 @@ class UserFile(models.Model):
     class Meta:
         verbose_name = 'File'
         verbose_name_plural = 'Files'
+        indexes = [
+            models.Index(
+                fields=['user', 'upload_date', 'id'],
+                name='userfile_user_uploaded_idx'
+            ),
+            models.Index(
+                fields=['user', 'last_download', 'id'],
+                name='userfile_user_downloaded_idx'
+            ),
+            models.Index(
+                fields=['user', 'original_name', 'id'],
+                name='userfile_user_name_idx'
+            ),
+            models.Index(
+                fields=['user', 'size', 'id'],
+                name='userfile_user_size_idx'
+            ),
+            models.Index(
+                fields=['shared_expiry'],
+                condition=models.Q(shared_link__isnull=False),
+                name='userfile_shared_expiry_idx'
+            ),
+        ]
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE
+    )
+    original_name = models.CharField(
+        max_length=255
+    )
+    file = models.FileField(
+        upload_to=user_directory_path
+    )
+    size = models.BigIntegerField(
+        help_text="Declared size of the whole file in bytes"
+    )
+    offset = models.BigIntegerField(
+        default=0,
+        help_text="Number of bytes received so far"
+    )
+    comment = models.TextField(
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True
+    )
+    expires_at = models.DateTimeField()
+
+    def save(self, *args, **kwargs):
+        if self.expires_at is None:
+            self.expires_at = timezone.now() + timedelta(
+                seconds=settings.UPLOAD_SESSION_TTL
+            )
+        if not self.file:
+            self.file.save(
+                self.original_name,
+                ContentFile(b''),
+                save=False
+            )
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        if self.file:
+            try:
+                self.file.storage.delete(self.file.name)
+            except Exception:
+                logger.exception(f"Error deleting upload {self.file.name}")
+        super().delete(*args, **kwargs)
+
+    def is_expired(self):
+        return timezone.now() > self.expires_at
+
+    def is_complete(self):
+        return self.offset == self.size
+
+    @property
+    def lock_key(self):
+        return f'storage:upload:{self.pk}:lock'
+
+    def claim(self):
+        """
+        Reserves the session for one writer; False while another
+        request is appending to it. The claim lapses
+        UPLOAD_SESSION_LOCK_TTL after the last chunk written.
+        """
+        return cache.add(
+            self.lock_key,
+            1,
+            timeout=settings.UPLOAD_SESSION_LOCK_TTL
+        )
+
+    def release(self):
+        cache.delete(self.lock_key)
+
+    def append(self, stream, offset):
+        """
+        Writes the body of `stream` to the target file at `offset`.
+
+        Bytes received before the client disconnects are kept,
+        so the upload can be resumed from the returned offset.
+        Runs outside of a transaction, under claim().
+        """
+        chunk_size = settings.UPLOAD_CHUNK_SIZE
+        position = offset
+
+        with open(self.file.path, 'r+b') as target:
+            target.seek(offset)
+            try:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    if position + len(chunk) > self.size:
+                        target.truncate(offset)
+                        raise ValueError(
+                            "Chunk exceeds the declared file size"
+                        )
+                    target.write(chunk)
+                    position += len(chunk)
+                    cache.touch(
+                        self.lock_key,
+                        settings.UPLOAD_SESSION_LOCK_TTL
+                    )
+            except UnreadablePostError:
+                pass
+            target.truncate(position)
+
+        self.offset = position
+        # The session may have been deleted meanwhile
+        UploadSession.objects.filter(pk=self.pk).update(offset=position)
+        return self.offset
+
+    def refresh_offset(self):
+        """
+        Takes the offset from the stored object, for sessions whose
+        content the client PUT straight into the object storage.
+        """
+        offset = self.file.storage.size(self.file.name)
+        if offset != self.offset:
+            self.offset = offset
+            self.save(update_fields=['offset'])
+        return self.offset
+
+    def __str__(self):
+        return f"{self.user.username}: {self.original_name} ({self.offset}/{self.size})"
+
+    class Meta:
+        verbose_name = 'Upload session'
+        verbose_name_plural = 'Upload sessions'
+        indexes = [
+            models.Index(
+                fields=['expires_at'],
+                name='uploadsession_expires_idx'
+            ),
+        ]
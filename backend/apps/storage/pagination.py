@@ -0,0 +1,63 @@
+from django.db import connections
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from apps.keyset import KeysetPagination
+
+from .filters import DEFAULT_ORDERING, ORDERING_FIELDS
+
+
+class FileCursorPagination(KeysetPagination):
+    """
+    Keyset pagination of the file list, enabled when `page_size` or
+    `cursor` is passed.
+    """
+    ordering_fields = ORDERING_FIELDS
+    default_ordering = DEFAULT_ORDERING
+
+    def is_enabled(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params \
+            or self.page_size_query_param in params
+
+
+class FileSearchPagination(KeysetPagination):
+    """
+    Keyset pagination of search results over (rank, id), always on:
+    a search never returns every match at once.
+    """
+    page_size = 50
+    max_page_size = 200
+
+    def get_ordering(self, request):
+        return '-rank'
+
+    def to_python(self, model, value):
+        if not isinstance(value, float):
+            raise ValueError(value)
+        return value
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator of the admin changelists. The size of a whole large
+    table is read from the planner statistics (pg_class.reltuples)
+    instead of being counted with a full scan; filtered lists are
+    still counted exactly.
+    """
+    estimate_threshold = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.estimate_threshold:
+                return int(row[0])
+        return super().count
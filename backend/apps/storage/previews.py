@@ -0,0 +1,193 @@
+import os
+import time
+import logging
+import mimetypes
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CACHE_BYTES_KEY = 'storage:previews:bytes'
+PREVIEW_EVICTION_LOCK_KEY = 'storage:previews:evict:lock'
+PREVIEW_TOUCH_INTERVAL = 60 * 60
+
+
+def preview_source_type(original_name):
+    """
+    'image' or 'pdf' when a preview can be rendered for the file with
+    the installed libraries (Pillow, PyMuPDF for PDF), None otherwise.
+    """
+    if Image is None:
+        return None
+    content_type = mimetypes.guess_type(original_name)[0] or ''
+    if content_type.startswith('image/'):
+        return 'image'
+    if content_type == 'application/pdf' and fitz is not None:
+        return 'pdf'
+    return None
+
+
+def preview_path(user_file, kind):
+    return os.path.join(
+        settings.STORAGE_PREVIEW_ROOT,
+        kind,
+        f'{user_file.pk % 256:02x}',
+        f'{user_file.pk}-{int(user_file.upload_date.timestamp())}.jpg'
+    )
+
+
+def _render_source(user_file, source_type, max_size):
+    with user_file.open_content() as source:
+        if source_type == 'pdf':
+            with fitz.open(stream=source.read(), filetype='pdf') as document:
+                page = document[0]
+                zoom = max_size / max(page.rect.width, page.rect.height)
+                pixmap = page.get_pixmap(
+                    matrix=fitz.Matrix(zoom, zoom),
+                    alpha=False
+                )
+                return Image.frombytes(
+                    'RGB',
+                    (pixmap.width, pixmap.height),
+                    pixmap.samples
+                )
+
+        image = Image.open(source)
+        # Lets the JPEG decoder skip the resolution we throw away
+        image.draft('RGB', (max_size, max_size))
+        image.load()
+    return ImageOps.exif_transpose(image)
+
+
+def _flatten(image):
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'L'):
+        return image.convert('RGB')
+    return image
+
+
+def _save(image, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path),
+        suffix='.tmp',
+        delete=False
+    ) as target:
+        image.save(target, 'JPEG', quality=85, optimize=True)
+    os.replace(target.name, path)
+    return os.path.getsize(path)
+
+
+def generate_previews(user_file, kinds=None):
+    """
+    Renders the derivatives `kinds` (all STORAGE_PREVIEW_SIZES by
+    default) of `user_file` into the preview cache. Returns the paths
+    by kind, empty when the file has no preview.
+    """
+    source_type = preview_source_type(user_file.original_name)
+    if source_type is None \
+            or user_file.size > settings.STORAGE_PREVIEW_MAX_SOURCE_SIZE:
+        return {}
+
+    kinds = kinds or list(settings.STORAGE_PREVIEW_SIZES)
+    max_size = max(settings.STORAGE_PREVIEW_SIZES[kind] for kind in kinds)
+    try:
+        image = _flatten(_render_source(user_file, source_type, max_size))
+    except Exception as e:
+        logger.warning(f"Cannot render preview of file {user_file.pk}: {e}")
+        return {}
+
+    paths, written = {}, 0
+    for kind in kinds:
+        size = settings.STORAGE_PREVIEW_SIZES[kind]
+        derivative = image.copy()
+        derivative.thumbnail((size, size))
+        paths[kind] = preview_path(user_file, kind)
+        written += _save(derivative, paths[kind])
+
+    account_preview_bytes(written)
+    return paths
+
+
+def get_preview(user_file, kind):
+    """
+    Path of the `kind` derivative of `user_file`, rendered now on a
+    cache miss. None when the file has no preview.
+    """
+    path = preview_path(user_file, kind)
+    try:
+        modified = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return generate_previews(user_file, [kind]).get(kind)
+
+    # The modification time is the LRU clock of the eviction
+    if time.time() - modified > PREVIEW_TOUCH_INTERVAL:
+        os.utime(path)
+    return path
+
+
+def account_preview_bytes(size):
+    """
+    Tracks the size of the preview cache and schedules an eviction
+    once it grows past STORAGE_PREVIEW_CACHE_SIZE.
+    """
+    from .tasks import evict_previews_task
+
+    try:
+        total = cache.incr(PREVIEW_CACHE_BYTES_KEY, size)
+    except ValueError:
+        cache.add(PREVIEW_CACHE_BYTES_KEY, size, timeout=None)
+        total = size
+    if total > settings.STORAGE_PREVIEW_CACHE_SIZE:
+        evict_previews_task.delay()
+
+
+def evict_previews():
+    """
+    Removes the least recently used derivatives until the cache is
+    back under 90% of STORAGE_PREVIEW_CACHE_SIZE, and resets the
+    tracked size to the real one. Returns the number of removed files.
+    """
+    entries = []
+    for directory, _, names in os.walk(settings.STORAGE_PREVIEW_ROOT):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    if total > settings.STORAGE_PREVIEW_CACHE_SIZE:
+        target = settings.STORAGE_PREVIEW_CACHE_SIZE * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+    cache.set(PREVIEW_CACHE_BYTES_KEY, total, timeout=None)
+    return removed
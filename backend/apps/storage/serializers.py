@@ -1,10 +1,23 @@
 import uuid
 from datetime import timedelta
 
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import serializers
 
-from .models import UserFile
+from .filters import FileListFilterSerializer
+from .backends import is_local_storage, presigned_upload_url
+from .download_stats import merge_pending_download, pending_downloads
+from .models import UploadSession, UserFile
+
+
+class FileListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        files = list(data.all() if hasattr(data, 'all') else data)
+        self.context['pending_downloads'] = pending_downloads(
+            user_file.pk for user_file in files
+        )
+        return super().to_representation(files)
 
 
 class FileSerializer(serializers.ModelSerializer):
@@ -19,6 +32,7 @@ class FileSerializer(serializers.ModelSerializer):
             'size',
             'upload_date',
             'last_download',
+            'download_count',
             'comment',
             'shared_link',
             'shared_expiry',
@@ -30,10 +44,19 @@ class FileSerializer(serializers.ModelSerializer):
             'size',
             'upload_date',
             'last_download',
+            'download_count',
             'shared_link',
             'is_shared_expired',
             'user'
         ]
+        list_serializer_class = FileListSerializer
+
+    def to_representation(self, instance):
+        pending = self.context.get('pending_downloads')
+        if pending is None:
+            pending = pending_downloads([instance.pk])
+        merge_pending_download(instance, pending)
+        return super().to_representation(instance)
 
     def get_is_shared_expired(self, obj):
         return obj.is_shared_link_expired()
@@ -74,3 +97,121 @@ class FileShareSerializer(serializers.ModelSerializer):
         
         instance.save()
         return instance
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    upload_url = serializers.SerializerMethodField(
+        help_text="Presigned PUT URL for the whole content, "
+                  "only with an object storage backend"
+    )
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id',
+            'original_name',
+            'size',
+            'offset',
+            'comment',
+            'created_at',
+            'expires_at',
+            'upload_url'
+        ]
+        read_only_fields = [
+            'id',
+            'offset',
+            'created_at',
+            'expires_at'
+        ]
+        extra_kwargs = {
+            'size': {
+                'min_value': 0
+            },
+        }
+
+    def get_upload_url(self, obj):
+        if is_local_storage() or obj.is_complete():
+            return None
+        return presigned_upload_url(obj.file.name, obj.size)
+
+
+class InstantUploadSerializer(serializers.Serializer):
+    sha256 = serializers.RegexField(
+        regex=r'^[0-9a-f]{64}$',
+        help_text="SHA-256 of the file content (lowercase hex)"
+    )
+    size = serializers.IntegerField(
+        min_value=0
+    )
+    original_name = serializers.CharField(
+        max_length=255
+    )
+    comment = serializers.CharField(
+        required=False,
+        allow_blank=True
+    )
+
+
+class ArchiveDownloadSerializer(serializers.Serializer):
+    ids = serializers.CharField(
+        help_text="Comma-separated ids of the files to archive"
+    )
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                "Ids must be comma-separated integers"
+            )
+
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError(
+                "At least one file is required"
+            )
+        if len(ids) > settings.STORAGE_ARCHIVE_MAX_FILES:
+            raise serializers.ValidationError(
+                f"No more than {settings.STORAGE_ARCHIVE_MAX_FILES} "
+                "files per archive"
+            )
+        return ids
+
+
+class FileBatchSerializer(serializers.Serializer):
+    ACTIONS = ('delete', 'share', 'unshare', 'comment')
+
+    action = serializers.ChoiceField(
+        choices=ACTIONS
+    )
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text="Ids of the files to change"
+    )
+    filter = FileListFilterSerializer(
+        required=False,
+        help_text="File list filters selecting the files to change"
+    )
+    comment = serializers.CharField(
+        required=False,
+        allow_blank=True
+    )
+    expiry_days = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=365,
+        help_text="The number of days shared links are valid"
+    )
+
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError(
+                "Pass either 'ids' or 'filter'"
+            )
+        if data['action'] == 'comment' and 'comment' not in data:
+            raise serializers.ValidationError({
+                'comment': "This field is required"
+            })
+        return data
@@ -1,9 +1,21 @@
 import logging
 
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
+from django.core.cache import cache
+from django.core.files.storage import default_storage
 
-from apps.storage.models import UserFile
+from apps.accounts.models import CustomUser
+from apps.storage.models import Blob, UploadSession, UserFile
+from apps.storage.caching import invalidate_shared_links
+from apps.storage.cleanup import reconcile_shard
+from apps.storage.download_stats import flush_downloads
+from apps.storage.previews import (
+    PREVIEW_EVICTION_LOCK_KEY,
+    evict_previews,
+    generate_previews,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -11,34 +23,137 @@ logger = logging.getLogger(__name__)
 
 @shared_task(name="storage.tasks.cleanup_files_task")
 def cleanup_files_task():
+    """
+    Clears expired links and upload sessions, then hands the
+    reconciliation of rows and files to one task per user shard.
+    """
     try:
         logger.info("=== STARTING CLEANUP TASK ===")
 
-        orphaned_count = 0
-        for file in UserFile.objects.filter(file__isnull=False):
-            if not file.file_exists:
-                file.delete()
-                orphaned_count += 1
-
-        expired_files = UserFile.objects.filter(
-            shared_expiry__lt=timezone.now()
-        ).exclude(
-            shared_link__isnull=True
+        expired_links = list(
+            UserFile.objects.filter(
+                shared_expiry__lt=timezone.now()
+            ).exclude(
+                shared_link__isnull=True
+            ).values_list('shared_link', flat=True)
         )
-
-        expired_files.update(
+        UserFile.objects.filter(
+            shared_link__in=expired_links
+        ).update(
             shared_link=None,
             shared_expiry=None
         )
-        
+        invalidate_shared_links(expired_links)
+
+        expired_uploads_count = 0
+        for upload in UploadSession.objects.filter(
+            expires_at__lt=timezone.now()
+        )[:settings.STORAGE_CLEANUP_BATCH_SIZE]:
+            upload.delete()
+            expired_uploads_count += 1
+
+        shards = settings.STORAGE_CLEANUP_SHARDS
+        for shard in range(shards):
+            reconcile_storage_shard_task.delay(shard, shards)
+
         result = {
-            'orphaned_files_deleted': orphaned_count,
-            'expired_links_cleared': expired_files.count()
+            'expired_links_cleared': len(expired_links),
+            'expired_uploads_deleted': expired_uploads_count,
+            'shards_scheduled': shards
         }
-        
+
         logger.info(f"=== TASK COMPLETE: {result} ===")
         return result
-        
+
     except Exception as e:
         logger.error(f"!!! TASK ERROR: {str(e)}", exc_info=True)
         raise
+
+
+@shared_task(name="storage.tasks.reconcile_storage_shard_task")
+def reconcile_storage_shard_task(shard, shards):
+    lock_key = f'storage:cleanup:shard:{shard}:lock'
+    if not cache.add(lock_key, 1, timeout=settings.STORAGE_CLEANUP_LOCK_TTL):
+        return {'skipped': True}
+    try:
+        result = reconcile_shard(shard, shards)
+    finally:
+        cache.delete(lock_key)
+
+    if any(result.values()):
+        logger.info(f"Storage shard {shard}/{shards} reconciled: {result}")
+    return result
+
+
+@shared_task(name="storage.tasks.attach_blob_task")
+def attach_blob_task(file_id):
+    user_file = UserFile.objects.filter(
+        pk=file_id,
+        blob__isnull=True
+    ).first()
+    if user_file is not None:
+        user_file.attach_blob()
+
+
+@shared_task(name="storage.tasks.delete_file_contents_task")
+def delete_file_contents_task(blob_refs, file_names):
+    """
+    Physical part of `UserFile.bulk_delete`: drops the blob references
+    given as (blob_id, count) pairs and unlinks legacy files.
+    """
+    for blob_id, count in blob_refs:
+        Blob.release(blob_id, count)
+
+    for file_name in file_names:
+        try:
+            default_storage.delete(file_name)
+        except OSError as e:
+            logger.error(f"Error deleting file {file_name}: {e}")
+
+
+@shared_task(name="storage.tasks.generate_previews_task")
+def generate_previews_task(file_id):
+    user_file = UserFile.objects.filter(pk=file_id).first()
+    if user_file is not None:
+        generate_previews(user_file)
+
+
+@shared_task(name="storage.tasks.evict_previews_task")
+def evict_previews_task():
+    if not cache.add(
+        PREVIEW_EVICTION_LOCK_KEY,
+        1,
+        timeout=settings.STORAGE_CLEANUP_LOCK_TTL
+    ):
+        return {'skipped': True}
+    try:
+        removed = evict_previews()
+    finally:
+        cache.delete(PREVIEW_EVICTION_LOCK_KEY)
+    return {'previews_removed': removed}
+
+
+@shared_task(name="storage.tasks.flush_downloads_task")
+def flush_downloads_task():
+    return {'files_updated': flush_downloads()}
+
+
+@shared_task(name="storage.tasks.reconcile_storage_usage_task")
+def reconcile_storage_usage_task(batch_size=1000):
+    last_id = 0
+    corrected = 0
+
+    while True:
+        user_ids = list(
+            CustomUser.objects.filter(
+                pk__gt=last_id
+            ).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            break
+        corrected += CustomUser.reconcile_storage_usage(user_ids)
+        last_id = user_ids[-1]
+
+    if corrected:
+        logger.warning(f"Storage usage drift corrected for {corrected} users")
+    return {'users_corrected': corrected}
@@ -0,0 +1,85 @@
+from django.urls import reverse
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+
+
+class UserFileAdminTestCase(TransactionTestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            username='fileadmin',
+            email='fileadmin@example.com',
+            full_name='File Admin',
+            password='testpass123'
+        )
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:storage_userfile_changelist')
+
+        self.owners = [
+            CustomUser.objects.create_user(
+                username=f'fileowner{i}',
+                email=f'fileowner{i}@example.com',
+                full_name='File Owner',
+                password='testpass123'
+            )
+            for i in range(2)
+        ]
+        for owner in self.owners:
+            for i in range(2):
+                UserFile.objects.create(
+                    user=owner,
+                    file=SimpleUploadedFile(f'{owner.username}-{i}.txt', b'x')
+                )
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def test_sidebar_does_not_list_users(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, '?user__id__exact=')
+        self.assertEqual(response.context['cl'].result_count, 4)
+
+    def test_filter_by_user(self):
+        owner = self.owners[1]
+        response = self.client.get(
+            self.url,
+            {'user__id__exact': owner.pk, 'o': '1'}
+        )
+        self.assertEqual(
+            {f.user_id for f in response.context['cl'].result_list},
+            {owner.pk}
+        )
+        # The selected user is rendered in the widget, kept with the
+        # other parameters when the filter form is submitted again
+        self.assertContains(response, f'<option value="{owner.pk}" selected>')
+        self.assertContains(response, 'name="o" value="1"')
+
+    def test_invalid_user_filter(self):
+        response = self.client.get(self.url, {'user__id__exact': 'abc'})
+        self.assertRedirects(
+            response,
+            f'{self.url}?e=1',
+            fetch_redirect_response=False
+        )
+
+    def test_user_autocomplete(self):
+        response = self.client.get(
+            reverse('admin:autocomplete'),
+            {
+                'term': 'fileowner1',
+                'app_label': 'storage',
+                'model_name': 'userfile',
+                'field_name': 'user',
+            }
+        )
+        self.assertEqual(
+            [result['id'] for result in response.json()['results']],
+            [str(self.owners[1].pk)]
+        )
@@ -163,6 +163,6 @@ class FileAPITestCase(APITransactionTestCase):
             status.HTTP_200_OK
         )
         self.assertEqual(
-            len(response.data),
+            len(response.json()),
             1
         )
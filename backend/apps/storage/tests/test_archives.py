@@ -0,0 +1,119 @@
+import io
+import zipfile
+
+from django.urls import reverse
+from django.db import connection
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.archives import iter_zip
+from apps.storage.download_stats import flush_downloads
+
+
+class FileArchiveDownloadTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='zipuser',
+            email='zip@example.com',
+            full_name='Zip User',
+            password='testpass123'
+        )
+        self.other = CustomUser.objects.create_user(
+            username='otherzip',
+            email='otherzip@example.com',
+            full_name='Other Zip',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('file-archive-download')
+
+        self.files = [
+            UserFile.objects.create(
+                user=self.user,
+                file=SimpleUploadedFile(name, content),
+                size=len(content)
+            )
+            for name, content in (
+                ('notes.txt', b'hello ' * 1000),
+                ('photo.jpg', b'\xff\xd8' + bytes(range(256))),
+                ('notes.txt', b'second copy'),
+            )
+        ]
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def download(self, files):
+        return self.client.get(
+            self.url,
+            {'ids': ','.join(str(f.pk) for f in files)}
+        )
+
+    def test_streams_archive(self):
+        response = self.download(self.files)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        body = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            self.assertEqual(
+                archive.namelist(),
+                ['notes.txt', 'photo.jpg', 'notes (1).txt']
+            )
+            self.assertEqual(archive.read('notes.txt'), b'hello ' * 1000)
+            self.assertEqual(archive.read('notes (1).txt'), b'second copy')
+            self.assertEqual(
+                archive.getinfo('photo.jpg').compress_type,
+                zipfile.ZIP_STORED
+            )
+            self.assertEqual(
+                archive.getinfo('notes.txt').compress_type,
+                zipfile.ZIP_DEFLATED
+            )
+
+        # Downloads are buffered in Redis until flushed
+        flush_downloads()
+        self.files[0].refresh_from_db()
+        self.assertIsNotNone(self.files[0].last_download)
+
+    def test_files_are_read_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.download(self.files)
+            b''.join(response.streaming_content)
+        self.assertEqual(
+            len([
+                q for q in queries
+                if q['sql'].startswith('SELECT')
+                and 'storage_userfile' in q['sql']
+            ]),
+            1
+        )
+
+    def test_foreign_file_is_forbidden(self):
+        foreign = UserFile.objects.create(
+            user=self.other,
+            file=SimpleUploadedFile('secret.txt', b'secret'),
+            size=6
+        )
+        response = self.download([self.files[0], foreign])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_and_invalid_ids(self):
+        response = self.client.get(self.url, {'ids': '999999'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(self.url, {'ids': 'a,b'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_chunks_are_bounded(self):
+        chunks = list(iter_zip(self.files, chunk_size=64))
+        self.assertTrue(all(chunks))
+        self.assertLess(max(len(chunk) for chunk in chunks), 1024)
@@ -0,0 +1,148 @@
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TransactionTestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+from rest_framework.throttling import AnonRateThrottle
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.download_stats import flush_downloads
+from apps.storage.async_views import (
+    AsyncFileDownloadView,
+    AsyncSharedFileDownloadView,
+)
+
+
+class OncePerMinuteThrottle(AnonRateThrottle):
+    rate = '1/min'
+
+
+class AsyncDownloadTestCase(TransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='asyncuser',
+            email='async@example.com',
+            full_name='Async User',
+            password='testpass123'
+        )
+        self.other = CustomUser.objects.create_user(
+            username='otherasync',
+            email='otherasync@example.com',
+            full_name='Other Async',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.content = bytes(range(256)) * 16
+        self.file = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('async.bin', self.content),
+            size=len(self.content)
+        )
+        self.factory = AsyncRequestFactory()
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    async def download(self, token=None, **headers):
+        if token:
+            headers['Authorization'] = f'Token {token.key}'
+        request = self.factory.get('/', headers=headers)
+        return await AsyncFileDownloadView.as_view()(request, pk=self.file.pk)
+
+    async def read(self, response):
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    async def test_full_download(self):
+        response = await self.download(self.token)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(int(response['Content-Length']), len(self.content))
+        self.assertEqual(await self.read(response), self.content)
+
+        # Downloads are buffered in Redis until flushed
+        await sync_to_async(flush_downloads)()
+        await self.file.arefresh_from_db()
+        self.assertIsNotNone(self.file.last_download)
+
+    async def test_ranges(self):
+        response = await self.download(self.token, Range='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(await self.read(response), self.content[100:200])
+
+        response = await self.download(
+            self.token,
+            Range='bytes=0-9,-10'
+        )
+        body = await self.read(response)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertIn(self.content[-10:], body)
+
+    async def test_access_checks(self):
+        response = await self.download()
+        self.assertEqual(response.status_code, 401)
+
+        other_token = await Token.objects.acreate(user=self.other)
+        response = await self.download(other_token)
+        self.assertEqual(response.status_code, 403)
+
+        self.other.is_superuser = True
+        await self.other.asave()
+        response = await self.download(other_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="async.bin"'
+        )
+
+    async def test_not_modified_is_not_recorded(self):
+        response = await self.download(self.token)
+        response = await self.download(
+            self.token,
+            If_None_Match=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('Content-Disposition', response)
+
+        await sync_to_async(flush_downloads)()
+        await self.file.arefresh_from_db()
+        self.assertEqual(self.file.download_count, 1)
+
+    async def test_shared_link(self):
+        request = self.factory.get('/', headers={'Range': 'bytes=-16'})
+        response = await AsyncSharedFileDownloadView.as_view()(
+            request,
+            shared_link=self.file.shared_link
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(await self.read(response), self.content[-16:])
+
+    async def test_missing_file_in_storage(self):
+        await sync_to_async(self.file.file.storage.delete)(self.file.file.name)
+        response = await self.download(self.token)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_shared_link_is_throttled(self):
+        view = AsyncSharedFileDownloadView.as_view(
+            throttle_classes=[OncePerMinuteThrottle]
+        )
+        responses = [
+            await view(
+                self.factory.get('/'),
+                shared_link=self.file.shared_link
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertEqual(responses[1].status_code, 429)
+        self.assertIn('Retry-After', responses[1])
+
+    def test_default_throttles_apply(self):
+        self.assertEqual(
+            AsyncSharedFileDownloadView.throttle_classes,
+            api_settings.DEFAULT_THROTTLE_CLASSES
+        )
@@ -0,0 +1,145 @@
+import os
+
+from django.urls import reverse
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import Blob, UserFile
+
+
+class FileBatchTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='batchuser',
+            email='batch@example.com',
+            full_name='Batch User',
+            password='testpass123'
+        )
+        self.other = CustomUser.objects.create_user(
+            username='otherbatch',
+            email='otherbatch@example.com',
+            full_name='Other Batch',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('file-batch')
+
+        self.files = []
+        for size in (1, 2, 3):
+            file = UserFile.objects.create(
+                user=self.user,
+                file=SimpleUploadedFile(f'batch{size}.txt', b'x' * size),
+                size=size
+            )
+            file.attach_blob()
+            self.files.append(file)
+        self.foreign = UserFile.objects.create(
+            user=self.other,
+            file=SimpleUploadedFile('foreign.txt', b'x'),
+            size=1
+        )
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        Blob.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def test_delete_by_ids(self):
+        legacy_path = self.foreign.file.path
+        response = self.client.post(
+            self.url,
+            {
+                'action': 'delete',
+                'ids': [self.files[0].pk, self.files[1].pk, self.foreign.pk]
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+        self.assertEqual(
+            list(UserFile.objects.filter(user=self.user)),
+            [self.files[2]]
+        )
+        self.assertTrue(os.path.exists(legacy_path))
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.file_count, 1)
+        self.assertEqual(self.user.storage_used, 3)
+
+        blob = Blob.objects.get()
+        self.assertEqual(blob.refcount, 1)
+        self.assertEqual(blob.size, 3)
+
+    def test_delete_by_filter(self):
+        response = self.client.post(
+            self.url,
+            {'action': 'delete', 'filter': {'size_min': 2}},
+            format='json'
+        )
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            list(UserFile.objects.filter(user=self.user)),
+            [self.files[0]]
+        )
+
+    def test_share_and_unshare(self):
+        ids = [file.pk for file in self.files]
+        self.client.post(
+            self.url,
+            {'action': 'unshare', 'ids': ids},
+            format='json'
+        )
+        self.assertFalse(
+            UserFile.objects.filter(
+                pk__in=ids,
+                shared_link__isnull=False
+            ).exists()
+        )
+
+        response = self.client.post(
+            self.url,
+            {'action': 'share', 'ids': ids, 'expiry_days': 3},
+            format='json'
+        )
+        self.assertEqual(response.data['count'], 3)
+        links = set(
+            UserFile.objects.filter(pk__in=ids).values_list(
+                'shared_link',
+                flat=True
+            )
+        )
+        self.assertEqual(len(links), 3)
+        self.assertNotIn(None, links)
+
+    def test_comment(self):
+        response = self.client.post(
+            self.url,
+            {'action': 'comment', 'filter': {}, 'comment': 'bulk'},
+            format='json'
+        )
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            UserFile.objects.filter(comment='bulk').count(),
+            3
+        )
+
+    def test_invalid_selection(self):
+        response = self.client.post(
+            self.url,
+            {'action': 'delete'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            self.url,
+            {'action': 'comment', 'ids': [self.files[0].pk]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,129 @@
+import hashlib
+
+from django.urls import reverse
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import Blob, UserFile
+
+
+class BlobDeduplicationTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='dedupuser',
+            email='dedup@example.com',
+            full_name='Dedup User',
+            password='testpass123'
+        )
+        self.other = CustomUser.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            full_name='Other User',
+            password='testpass123'
+        )
+        self.content = b'installer' * 1000
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        Blob.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def upload(self, user, name='setup.exe'):
+        self.client.force_authenticate(user=user)
+        response = self.client.post(
+            reverse('file-list'),
+            {'file': SimpleUploadedFile(name, self.content)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return UserFile.objects.get(pk=response.data['id'])
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload(self.user)
+        second = self.upload(self.other, 'copy.exe')
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(Blob.objects.get().refcount, 2)
+        self.assertEqual(second.original_name, 'copy.exe')
+        self.assertEqual(
+            default_storage.listdir(f'user_{self.user.id}_storage')[1],
+            []
+        )
+
+    def test_blob_removed_with_last_reference(self):
+        first = self.upload(self.user)
+        second = self.upload(self.other)
+        blob_name = first.file.name
+
+        first.delete()
+        self.assertEqual(Blob.objects.get().refcount, 1)
+        self.assertTrue(default_storage.exists(blob_name))
+
+        second.delete()
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(default_storage.exists(blob_name))
+
+    def instant_upload(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(
+            reverse('file-instant-upload'),
+            {
+                'sha256': self.sha256,
+                'size': len(self.content),
+                'original_name': 'again.exe'
+            },
+            format='json'
+        )
+
+    def test_instant_upload(self):
+        self.upload(self.user)
+
+        response = self.instant_upload(self.user)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['original_name'], 'again.exe')
+        self.assertEqual(Blob.objects.get().refcount, 2)
+
+    def test_instant_upload_of_foreign_content(self):
+        self.upload(self.user)
+
+        response = self.instant_upload(self.other)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(UserFile.objects.filter(user=self.other).exists())
+        self.assertEqual(Blob.objects.get().refcount, 1)
+
+    def test_instant_upload_unknown_content(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse('file-instant-upload'),
+            {
+                'sha256': '0' * 64,
+                'size': 10,
+                'original_name': 'missing.bin'
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(UserFile.objects.exists())
+
+    def test_attach_blob_for_legacy_file(self):
+        legacy = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('legacy.exe', self.content),
+            size=len(self.content)
+        )
+        old_name = legacy.file.name
+        uploaded = self.upload(self.other)
+
+        legacy.attach_blob()
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.blob_id, uploaded.blob_id)
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertEqual(Blob.objects.get().refcount, 2)
@@ -0,0 +1,162 @@
+import os
+import time
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import Blob, UserFile
+from apps.storage.cleanup import get_checkpoint, reconcile_shard
+
+
+def make_old(file_name):
+    old = time.time() - 2 * 60 * 60
+    os.utime(default_storage.path(file_name), (old, old))
+
+
+def later():
+    return mock.patch('time.time', return_value=time.time() + 2 * 60 * 60)
+
+
+@override_settings(STORAGE_CLEANUP_SHARDS=1)
+class StorageReconcileTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='cleanupuser',
+            email='cleanup@example.com',
+            full_name='Cleanup User',
+            password='testpass123'
+        )
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        Blob.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def create_file(self, name, content=b'content'):
+        return UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile(name, content),
+            size=len(content)
+        )
+
+    def test_rows_with_missing_files(self):
+        kept = self.create_file('kept.txt')
+        lost = self.create_file('lost.txt')
+        default_storage.delete(lost.file.name)
+
+        # Marked on the first pass, deleted once still missing later
+        result = reconcile_shard(0, 1)
+        self.assertEqual(result['missing_files_deleted'], 0)
+        result = reconcile_shard(0, 1)
+        self.assertEqual(result['missing_files_deleted'], 0)
+        with later():
+            result = reconcile_shard(0, 1)
+        self.assertEqual(result['missing_files_deleted'], 1)
+        self.assertEqual(list(UserFile.objects.all()), [kept])
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.file_count, 1)
+
+    def test_file_back_before_second_pass(self):
+        restored = self.create_file('restored.txt')
+        content = restored.file.read()
+        restored.file.close()
+        default_storage.delete(restored.file.name)
+        reconcile_shard(0, 1)
+
+        default_storage.save(restored.file.name, ContentFile(content))
+        reconcile_shard(0, 1)
+        default_storage.delete(restored.file.name)
+        with later():
+            result = reconcile_shard(0, 1)
+        self.assertEqual(result['missing_files_deleted'], 0)
+        self.assertTrue(UserFile.objects.filter(pk=restored.pk).exists())
+
+    @override_settings(STORAGE_CLEANUP_MAX_DELETES=2)
+    def test_deletions_are_capped(self):
+        self.create_file('kept.txt')
+        for i in range(3):
+            default_storage.delete(self.create_file(f'lost{i}.txt').file.name)
+
+        reconcile_shard(0, 1)
+        with later():
+            result = reconcile_shard(0, 1)
+        self.assertEqual(result['missing_files_deleted'], 2)
+        self.assertEqual(UserFile.objects.count(), 2)
+
+    def test_unmounted_storage(self):
+        lost = self.create_file('lost.txt')
+        default_storage.delete(lost.file.name)
+
+        for root in (tempfile.mkdtemp(), '/nonexistent/media'):
+            with self.subTest(root=root), override_settings(MEDIA_ROOT=root):
+                reconcile_shard(0, 1)
+                with later():
+                    result = reconcile_shard(0, 1)
+                self.assertEqual(result, {'skipped': True})
+        self.assertTrue(UserFile.objects.filter(pk=lost.pk).exists())
+
+    def test_files_without_rows(self):
+        kept = self.create_file('kept.txt')
+        make_old(kept.file.name)
+        directory = os.path.dirname(kept.file.name)
+
+        orphan = default_storage.save(
+            f'{directory}/orphan.bin',
+            ContentFile(b'orphan')
+        )
+        make_old(orphan)
+        fresh = default_storage.save(
+            f'{directory}/fresh.bin',
+            ContentFile(b'fresh')
+        )
+
+        blob = Blob.store(kept.file.name, 'ab' * 32, kept.size)
+        stray_blob = default_storage.save(
+            f'blobs/ab/cd/{"cd" * 32}',
+            ContentFile(b'stray')
+        )
+        make_old(stray_blob)
+        make_old(blob.file.name)
+
+        removed = {'orphaned_files_removed': 0, 'orphaned_blobs_removed': 0}
+        for _ in range(256):
+            result = reconcile_shard(0, 1)
+            for key in removed:
+                removed[key] += result[key]
+
+        self.assertEqual(removed['orphaned_files_removed'], 1)
+        self.assertEqual(removed['orphaned_blobs_removed'], 1)
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(fresh))
+        self.assertTrue(default_storage.exists(kept.file.name))
+        self.assertTrue(default_storage.exists(blob.file.name))
+        self.assertFalse(default_storage.exists(stray_blob))
+
+    @override_settings(STORAGE_CLEANUP_BATCH_SIZE=2)
+    def test_checkpoint_resumes(self):
+        files = [self.create_file(f'file{i}.txt') for i in range(3)]
+
+        reconcile_shard(0, 1)
+        self.assertEqual(get_checkpoint(0)['file_id'], files[1].pk)
+
+        default_storage.delete(files[0].file.name)
+        reconcile_shard(0, 1)
+        self.assertEqual(get_checkpoint(0)['file_id'], 0)
+        self.assertTrue(UserFile.objects.filter(pk=files[0].pk).exists())
+
+        reconcile_shard(0, 1)
+        self.assertTrue(UserFile.objects.filter(pk=files[0].pk).exists())
+
+        with later():
+            reconcile_shard(0, 1)
+            reconcile_shard(0, 1)
+        self.assertFalse(UserFile.objects.filter(pk=files[0].pk).exists())
@@ -0,0 +1,161 @@
+import io
+import os
+import unittest
+
+from django.urls import reverse
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import Blob, UserFile
+from apps.storage.compression import (
+    SeekableZstdReader,
+    SeekableZstdWriter,
+    zstandard,
+)
+
+
+CSV_CONTENT = b''.join(
+    f'{i},user{i % 50},2024-01-{i % 28 + 1:02d},ok\n'.encode()
+    for i in range(20000)
+)
+
+
+@unittest.skipIf(zstandard is None, "zstandard is not installed")
+@override_settings(STORAGE_COMPRESSION_FRAME_SIZE=4096)
+class SeekableZstdTest(SimpleTestCase):
+    def compress(self, content):
+        buffer = io.BytesIO()
+        writer = SeekableZstdWriter(buffer)
+        for start in range(0, len(content), 1000):
+            writer.write(content[start:start + 1000])
+        writer.close()
+        buffer.seek(0)
+        return buffer
+
+    def test_round_trip(self):
+        compressed = self.compress(CSV_CONTENT)
+        self.assertLess(len(compressed.getvalue()), len(CSV_CONTENT) // 2)
+
+        reader = SeekableZstdReader(compressed)
+        self.assertEqual(reader.size, len(CSV_CONTENT))
+        self.assertEqual(reader.read(), CSV_CONTENT)
+
+    def test_seek_across_frames(self):
+        reader = SeekableZstdReader(self.compress(CSV_CONTENT))
+        ranges = (
+            (0, 10),
+            (4090, 20),
+            (100000, 9000),
+            (len(CSV_CONTENT) - 5, 50),
+        )
+        for start, length in ranges:
+            reader.seek(start)
+            self.assertEqual(
+                reader.read(length),
+                CSV_CONTENT[start:start + length]
+            )
+
+    def test_empty_file(self):
+        reader = SeekableZstdReader(self.compress(b''))
+        self.assertEqual(reader.size, 0)
+        self.assertEqual(reader.read(), b'')
+
+
+class CompressedUploadTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='zstduser',
+            email='zstd@example.com',
+            full_name='Zstd User',
+            password='testpass123',
+            max_storage=10 * 1024 * 1024
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        Blob.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def upload(self, name, content):
+        response = self.client.post(
+            reverse('file-list'),
+            {'file': SimpleUploadedFile(name, content)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return UserFile.objects.get(pk=response.data['id'])
+
+    def download(self, user_file, **headers):
+        return self.client.get(
+            reverse('file-download', kwargs={'pk': user_file.pk}),
+            **headers
+        )
+
+    @override_settings(STORAGE_COMPRESSION=False)
+    def test_compression_disabled(self):
+        user_file = self.upload('log.csv', CSV_CONTENT)
+        self.assertEqual(user_file.encoding, '')
+        self.assertEqual(
+            default_storage.size(user_file.file.name),
+            len(CSV_CONTENT)
+        )
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_compressible_upload(self):
+        user_file = self.upload('log.csv', CSV_CONTENT)
+        self.assertEqual(user_file.encoding, 'zstd')
+        self.assertEqual(user_file.blob.encoding, 'zstd')
+        self.assertEqual(user_file.size, len(CSV_CONTENT))
+        self.assertLess(
+            default_storage.size(user_file.file.name),
+            len(CSV_CONTENT) // 2
+        )
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.storage_used, len(CSV_CONTENT))
+
+        response = self.download(user_file)
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            CSV_CONTENT
+        )
+
+        response = self.download(user_file, HTTP_RANGE='bytes=300000-300099')
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_206_PARTIAL_CONTENT
+        )
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            CSV_CONTENT[300000:300100]
+        )
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    @override_settings(STORAGE_DOWNLOAD_MODE='accel')
+    def test_not_compressed_for_accel_downloads(self):
+        user_file = self.upload('log.csv', CSV_CONTENT)
+        self.assertEqual(user_file.encoding, '')
+
+        response = self.download(user_file)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            f'/protected-media/{user_file.file.name}'
+        )
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_incompressible_upload(self):
+        content = os.urandom(100000)
+        user_file = self.upload('random.bin', content)
+        self.assertEqual(user_file.encoding, '')
+        self.assertEqual(
+            default_storage.size(user_file.file.name),
+            len(content)
+        )
@@ -0,0 +1,105 @@
+import unittest
+from unittest import mock
+
+from django.urls import reverse
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.download_stats import (
+    DOWNLOAD_COUNT_KEY,
+    LAST_DOWNLOAD_KEY,
+    flush_downloads,
+    get_redis,
+    pending_downloads,
+)
+
+
+def redis_available():
+    redis = get_redis()
+    if redis is None:
+        return False
+    try:
+        return redis.ping()
+    except Exception:
+        return False
+
+
+class DownloadStatsTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='statsuser',
+            email='stats@example.com',
+            full_name='Stats User',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.file = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('stats.txt', b'stats'),
+            size=5
+        )
+        self.url = reverse('file-download', kwargs={'pk': self.file.pk})
+
+    def tearDown(self):
+        redis = get_redis()
+        if redis is not None and redis_available():
+            redis.delete(LAST_DOWNLOAD_KEY, DOWNLOAD_COUNT_KEY)
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def download(self, times=1):
+        for _ in range(times):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def list_row(self):
+        return self.client.get(reverse('file-list')).json()[0]
+
+    @unittest.skipIf(redis_available(), "Downloads are buffered in Redis")
+    def test_written_directly_without_redis(self):
+        self.download(times=2)
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.download_count, 2)
+        self.assertIsNotNone(self.file.last_download)
+
+    def test_written_directly_when_redis_is_down(self):
+        redis = mock.Mock()
+        redis.pipeline.return_value.execute.side_effect = \
+            RedisConnectionError('Connection refused')
+        with mock.patch(
+            'apps.storage.download_stats.get_redis',
+            return_value=redis
+        ):
+            self.download(times=2)
+            self.assertEqual(self.list_row()['download_count'], 2)
+
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.download_count, 2)
+        self.assertIsNotNone(self.file.last_download)
+
+    @unittest.skipUnless(redis_available(), "Redis is not available")
+    def test_buffered_and_flushed(self):
+        self.download(times=3)
+
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.download_count, 0)
+        self.assertIsNone(self.file.last_download)
+        self.assertEqual(pending_downloads([self.file.pk])[self.file.pk][1], 3)
+
+        row = self.list_row()
+        self.assertEqual(row['download_count'], 3)
+        self.assertIsNotNone(row['last_download'])
+
+        self.assertEqual(flush_downloads(), 1)
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.download_count, 3)
+        self.assertIsNotNone(self.file.last_download)
+        self.assertEqual(pending_downloads([self.file.pk]), {})
+        self.assertEqual(self.list_row()['download_count'], 3)
@@ -0,0 +1,163 @@
+from django.urls import reverse
+from django.utils.http import http_date
+from django.test import SimpleTestCase, override_settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.downloads import parse_range_header
+from apps.storage.download_stats import flush_downloads
+
+
+class RangeHeaderParsingTest(SimpleTestCase):
+    def test_parse_range_header(self):
+        self.assertIsNone(parse_range_header('', 100))
+        self.assertIsNone(parse_range_header('items=0-1', 100))
+        self.assertEqual(parse_range_header('bytes=0-9', 100), [(0, 9)])
+        self.assertEqual(parse_range_header('bytes=90-', 100), [(90, 99)])
+        self.assertEqual(parse_range_header('bytes=-10', 100), [(90, 99)])
+        self.assertEqual(
+            parse_range_header('bytes=0-9,5-19,50-59', 100),
+            [(0, 19), (50, 59)]
+        )
+        self.assertEqual(parse_range_header('bytes=200-300', 100), [])
+
+
+class FileRangeDownloadTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='rangeuser',
+            email='range@example.com',
+            full_name='Range User',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.content = bytes(range(256)) * 4
+        self.file = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('data.bin', self.content),
+            size=len(self.content)
+        )
+        self.url = reverse('file-download', kwargs={'pk': self.file.pk})
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def test_full_download_advertises_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_single_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_206_PARTIAL_CONTENT
+        )
+        self.assertEqual(
+            response['Content-Range'],
+            f'bytes 10-19/{len(self.content)}'
+        )
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            self.content[10:20]
+        )
+
+    def test_multiple_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3,100-103')
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_206_PARTIAL_CONTENT
+        )
+        self.assertTrue(
+            response['Content-Type'].startswith('multipart/byteranges')
+        )
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertIn(self.content[0:4], body)
+        self.assertIn(self.content[100:104], body)
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-6000')
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(
+            response['Content-Range'],
+            f'bytes */{len(self.content)}'
+        )
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+    def test_stale_if_range_serves_full_file(self):
+        response = self.client.get(
+            self.url,
+            HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_range_date_must_match_exactly(self):
+        last_modified = int(self.file.upload_date.timestamp())
+        for if_range, expected in (
+            (http_date(last_modified), status.HTTP_206_PARTIAL_CONTENT),
+            (http_date(last_modified + 60), status.HTTP_200_OK),
+            (http_date(last_modified - 60), status.HTTP_200_OK),
+        ):
+            with self.subTest(if_range=if_range):
+                response = self.client.get(
+                    self.url,
+                    HTTP_RANGE='bytes=0-9',
+                    HTTP_IF_RANGE=if_range
+                )
+                self.assertEqual(response.status_code, expected)
+
+    def test_shared_link_range(self):
+        self.client.logout()
+        url = reverse(
+            'shared-file-download',
+            kwargs={'shared_link': self.file.shared_link}
+        )
+        response = self.client.get(url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_206_PARTIAL_CONTENT
+        )
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            self.content[-4:]
+        )
+
+    @override_settings(STORAGE_DOWNLOAD_MODE='accel')
+    def test_accel_redirect_mode(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            f'/protected-media/{self.file.file.name}'
+        )
+        self.assertEqual(response.content, b'')
+        self.assertIn(
+            f'attachment; filename="{self.file.original_name}"',
+            response['Content-Disposition']
+        )
+        # Downloads are buffered in Redis until flushed
+        flush_downloads()
+        self.file.refresh_from_db()
+        self.assertIsNotNone(self.file.last_download)
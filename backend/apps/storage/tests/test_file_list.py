@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.caching import file_list_cache_timeout
+
+
+class FileListPaginationTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='listuser',
+            email='list@example.com',
+            full_name='List User',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('file-list')
+
+        for size in (5, 1, 4, 2, 3):
+            UserFile.objects.create(
+                user=self.user,
+                file=SimpleUploadedFile(f'file{size}.txt', b'x' * size),
+                size=size
+            )
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def collect_pages(self, params):
+        names, pages = [], 0
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names += [f['original_name'] for f in response.json()['results']]
+            pages += 1
+            if not response.json()['next']:
+                return names, pages
+            response = self.client.get(response.json()['next'])
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json()), 5)
+
+    def test_cursor_pages_by_size(self):
+        names, pages = self.collect_pages({'ordering': 'size', 'page_size': 2})
+        self.assertEqual(
+            names,
+            ['file1.txt', 'file2.txt', 'file3.txt', 'file4.txt', 'file5.txt']
+        )
+        self.assertEqual(pages, 3)
+
+    def test_cursor_pages_by_nullable_date(self):
+        UserFile.objects.filter(size__in=(2, 4)).update(
+            last_download=timezone.now()
+        )
+        UserFile.objects.filter(size=4).update(
+            last_download=timezone.now() - timedelta(days=1)
+        )
+
+        names, _ = self.collect_pages({
+            'ordering': '-last_download',
+            'page_size': 1
+        })
+        self.assertEqual(len(names), 5)
+        self.assertEqual(names[3:], ['file2.txt', 'file4.txt'])
+
+        names, _ = self.collect_pages({
+            'ordering': 'last_download',
+            'page_size': 2
+        })
+        self.assertEqual(names[:2], ['file4.txt', 'file2.txt'])
+        self.assertEqual(len(set(names)), 5)
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'size_min': 2, 'size_max': 4})
+        self.assertEqual(
+            sorted(f['size'] for f in response.json()),
+            [2, 3, 4]
+        )
+
+        UserFile.objects.filter(size__in=(1, 2)).update(
+            shared_expiry=timezone.now() - timedelta(days=1)
+        )
+        response = self.client.get(self.url, {'shared': 'false'})
+        self.assertEqual(
+            sorted(f['size'] for f in response.json()),
+            [1, 2]
+        )
+
+        tomorrow = (timezone.now() + timedelta(days=1)).isoformat()
+        response = self.client.get(self.url, {'uploaded_after': tomorrow})
+        self.assertEqual(response.json(), [])
+
+    def test_invalid_parameters(self):
+        response = self.client.get(self.url, {'ordering': 'comment'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FileListCacheTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            full_name='Cache User',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('file-list')
+        self.file = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('cached.txt', b'cached'),
+            size=6
+        )
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def test_hit_skips_database(self):
+        first = self.client.get(self.url, {'ordering': 'size'})
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {'ordering': 'size'})
+        self.assertEqual(first.content, second.content)
+
+    def test_mutations_invalidate_every_page(self):
+        self.client.get(self.url)
+        self.client.get(self.url, {'ordering': 'size'})
+
+        self.client.patch(
+            reverse('file-detail', kwargs={'pk': self.file.pk}),
+            {'comment': 'updated'},
+            format='json'
+        )
+        for params in ({}, {'ordering': 'size'}):
+            rows = self.client.get(self.url, params).json()
+            self.assertEqual(rows[0]['comment'], 'updated')
+
+        self.client.get(
+            reverse('file-download', kwargs={'pk': self.file.pk})
+        )
+        rows = self.client.get(self.url).json()
+        self.assertIsNotNone(rows[0]['last_download'])
+
+    def test_timeout_ends_at_next_link_expiry(self):
+        self.file.shared_expiry = timezone.now() + timedelta(seconds=30)
+        self.file.save()
+
+        response = self.client.get(self.url)
+        self.assertLessEqual(
+            file_list_cache_timeout(response.json()),
+            31
+        )
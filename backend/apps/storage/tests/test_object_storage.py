@@ -0,0 +1,157 @@
+import os
+import unittest
+from urllib.request import Request, urlopen
+
+from django.urls import reverse
+from django.core.cache import cache
+from django.test import override_settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import Blob, UploadSession, UserFile
+
+try:
+    import storages
+except ImportError:
+    storages = None
+
+
+# Any S3-compatible endpoint works, e.g. the minio service of
+# docker-compose (`docker compose --profile s3 up minio`)
+S3_ENDPOINT_URL = os.environ.get('S3_TEST_ENDPOINT_URL')
+S3_OPTIONS = {
+    'bucket_name': os.environ.get('S3_TEST_BUCKET_NAME', 'mycloud-test'),
+    'endpoint_url': S3_ENDPOINT_URL,
+    'access_key': os.environ.get('S3_TEST_ACCESS_KEY', 'minioadmin'),
+    'secret_key': os.environ.get('S3_TEST_SECRET_KEY', 'minioadmin'),
+    'region_name': 'us-east-1',
+    'signature_version': 's3v4',
+    'default_acl': None,
+    'file_overwrite': False,
+}
+
+
+@unittest.skipUnless(
+    storages is not None and S3_ENDPOINT_URL,
+    "Needs django-storages and S3_TEST_ENDPOINT_URL"
+)
+@override_settings(
+    STORAGES={
+        'default': {
+            'BACKEND': 'storages.backends.s3.S3Storage',
+            'OPTIONS': S3_OPTIONS,
+        },
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+        },
+    },
+    STORAGE_DOWNLOAD_MODE='redirect'
+)
+class ObjectStorageTestCase(APITransactionTestCase):
+    def setUp(self):
+        bucket = default_storage.bucket
+        if bucket.creation_date is None:
+            bucket.create()
+
+        self.user = CustomUser.objects.create_user(
+            username='s3user',
+            email='s3@example.com',
+            full_name='S3 User',
+            password='testpass123',
+            max_storage=10 * 1024 * 1024
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        UploadSession.objects.all().delete()
+        for user_file in UserFile.objects.all():
+            user_file.delete()
+        Blob.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def test_upload_and_presigned_download(self):
+        content = b'object storage' * 1000
+        response = self.client.post(
+            reverse('file-list'),
+            {'file': SimpleUploadedFile('s3.bin', content)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user_file = UserFile.objects.get(pk=response.data['id'])
+        self.assertTrue(user_file.file_exists)
+        # Kept as is, the bucket serves the stored bytes
+        self.assertEqual(user_file.encoding, '')
+
+        response = self.client.get(
+            reverse('file-download', kwargs={'pk': user_file.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        with urlopen(response['Location']) as download:
+            self.assertEqual(download.read(), content)
+            self.assertIn('s3.bin', download.headers['Content-Disposition'])
+
+    def test_presigned_upload_session(self):
+        content = b'direct upload' * 1000
+        response = self.client.post(
+            reverse('upload-session-list'),
+            {'original_name': 'direct.bin', 'size': len(content)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        session_id = response.data['id']
+
+        with urlopen(Request(
+            response.data['upload_url'],
+            data=content,
+            method='PUT'
+        )) as upload:
+            self.assertEqual(upload.status, 200)
+
+        response = self.client.post(
+            reverse('upload-session-complete', kwargs={'pk': session_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user_file = UserFile.objects.get(pk=response.data['id'])
+        with user_file.file.open('rb') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_incomplete_direct_upload_is_rejected(self):
+        response = self.client.post(
+            reverse('upload-session-list'),
+            {'original_name': 'direct.bin', 'size': 100},
+            format='json'
+        )
+        session_id = response.data['id']
+
+        response = self.client.patch(
+            reverse('upload-session-detail', kwargs={'pk': session_id}),
+            data=b'0' * 100,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET='0'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+        response = self.client.post(
+            reverse('upload-session-complete', kwargs={'pk': session_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_delete_removes_object(self):
+        user_file = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('gone.txt', b'gone')
+        )
+        name = user_file.file.name
+        self.assertTrue(default_storage.exists(name))
+
+        user_file.delete()
+        self.assertFalse(default_storage.exists(name))
@@ -0,0 +1,136 @@
+import os
+import io
+import time
+import shutil
+import tempfile
+import unittest
+
+from django.urls import reverse
+from django.core.cache import cache
+from django.test import override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.previews import Image, evict_previews, preview_path
+
+
+class PreviewTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.preview_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            STORAGE_PREVIEW_ROOT=self.preview_root
+        )
+        self.settings_override.enable()
+
+        self.user = CustomUser.objects.create_user(
+            username='previewuser',
+            email='preview@example.com',
+            full_name='Preview User',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.preview_root, ignore_errors=True)
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def create_file(self, name, content):
+        return UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile(name, content)
+        )
+
+
+class FilePreviewTestCase(PreviewTestCase):
+    def test_file_without_preview(self):
+        user_file = self.create_file('notes.txt', b'text')
+        url = reverse('file-preview', kwargs={'pk': user_file.pk})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(url, {'size': 'huge'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_preview_of_foreign_file_is_denied(self):
+        other = CustomUser.objects.create_user(
+            username='otherpreview',
+            email='otherpreview@example.com',
+            full_name='Other User',
+            password='testpass123'
+        )
+        user_file = UserFile.objects.create(
+            user=other,
+            file=SimpleUploadedFile('other.txt', b'text')
+        )
+        response = self.client.get(
+            reverse('file-preview', kwargs={'pk': user_file.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(STORAGE_PREVIEW_CACHE_SIZE=150)
+    def test_eviction_removes_least_recently_used(self):
+        now = time.time()
+        paths = []
+        for age in (300, 200, 100):
+            path = os.path.join(self.preview_root, 'thumb', f'{age}.jpg')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(path, (now - age, now - age))
+            paths.append(path)
+
+        self.assertEqual(evict_previews(), 2)
+        self.assertEqual(
+            [os.path.exists(path) for path in paths],
+            [False, False, True]
+        )
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class ImagePreviewTestCase(PreviewTestCase):
+    def image_content(self, size=(800, 600)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_previews_generated_in_background(self):
+        user_file = self.create_file('photo.png', self.image_content())
+
+        for kind, size in (('thumb', 256), ('preview', 1024)):
+            with Image.open(preview_path(user_file, kind)) as image:
+                self.assertEqual(max(image.size), min(size, 800))
+
+    def test_preview_endpoint(self):
+        user_file = self.create_file('photo.png', self.image_content())
+        url = reverse('file-preview', kwargs={'pk': user_file.pk})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertTrue(b''.join(response.streaming_content))
+
+        response = self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_preview_regenerated_on_miss(self):
+        user_file = self.create_file('photo.png', self.image_content())
+        path = preview_path(user_file, 'thumb')
+        os.remove(path)
+
+        response = self.client.get(
+            reverse('file-preview', kwargs={'pk': user_file.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(os.path.exists(path))
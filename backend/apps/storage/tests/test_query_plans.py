@@ -0,0 +1,182 @@
+import os
+import json
+import uuid
+import unittest
+from datetime import timedelta
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.accounts.models import CustomUser
+from apps.keyset import order_by_keyset
+from apps.storage.filters import search_files
+from apps.storage.models import Blob, UploadSession, UserFile
+from apps.storage.pagination import EstimatedCountPaginator
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Seeds enough rows for the planner to prefer indexes, then checks
+    that no hot query falls back to a sequential scan.
+    """
+    USERS = 200
+    FILES_PER_USER = 250
+    tables = ()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = CustomUser.objects.bulk_create(
+            CustomUser(
+                username=f'planuser{i}',
+                email=f'planuser{i}@example.com',
+                full_name='Plan User',
+                # bulk_create skips save(), which fills the unique path
+                storage_path=os.path.join('user_storage', f'plan_{i}')
+            )
+            for i in range(cls.USERS)
+        )
+        now = timezone.now()
+        UserFile.objects.bulk_create(
+            (
+                UserFile(
+                    user=user,
+                    original_name=f'file{i}.txt',
+                    file=f'user_{user.pk}_storage/{uuid.uuid4()}.txt',
+                    size=i,
+                    shared_link=uuid.uuid4() if i % 10 == 0 else None,
+                    shared_expiry=now + timedelta(days=i % 30 - 1)
+                    if i % 10 == 0 else None,
+                    last_download=now - timedelta(hours=i) if i % 3 else None
+                )
+                for user in cls.users
+                for i in range(cls.FILES_PER_USER)
+            ),
+            batch_size=5000
+        )
+        UploadSession.objects.bulk_create(
+            (
+                UploadSession(
+                    user=user,
+                    original_name='upload.bin',
+                    file=f'user_{user.pk}_storage/{uuid.uuid4()}.bin',
+                    size=100,
+                    expires_at=now + timedelta(hours=i)
+                )
+                for user in cls.users
+                for i in range(20)
+            ),
+            batch_size=5000
+        )
+        Blob.objects.bulk_create(
+            (
+                Blob(
+                    sha256=f'{i:064x}',
+                    file=f'blobs/{i:064x}',
+                    size=i
+                )
+                for i in range(20000)
+            ),
+            batch_size=5000
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertIndexed(self, queryset):
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        seq_scans = [
+            node['Relation Name'] for node in plan_nodes(plan)
+            if node['Node Type'] == 'Seq Scan'
+        ]
+        self.assertEqual(seq_scans, [], queryset.explain())
+
+    @contextmanager
+    def seq_scans_disabled(self):
+        """
+        For tables too small for the planner to prefer an index: the
+        plan then shows whether the query can use one at all.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('RESET enable_seqscan')
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    "Query plans are checked on PostgreSQL"
+)
+class StorageQueryPlanTestCase(QueryPlanTestCase):
+    def test_file_list(self):
+        user = self.users[0]
+        for ordering in ('-upload_date', 'size', 'original_name',
+                         '-last_download'):
+            with self.subTest(ordering=ordering):
+                self.assertIndexed(
+                    order_by_keyset(
+                        UserFile.objects.filter(user=user),
+                        ordering
+                    )[:100]
+                )
+
+    def test_file_search(self):
+        for query in ('file12', 'fiel12'):
+            with self.subTest(query=query):
+                self.assertIndexed(
+                    search_files(
+                        UserFile.objects.filter(user=self.users[0]),
+                        query
+                    ).order_by('-rank', '-id')[:50]
+                )
+
+    def test_shared_link_lookup(self):
+        self.assertIndexed(
+            UserFile.objects.filter(shared_link=uuid.uuid4())
+        )
+
+    def test_expired_links(self):
+        self.assertIndexed(
+            UserFile.objects.filter(
+                shared_expiry__lt=timezone.now()
+            ).exclude(
+                shared_link__isnull=True
+            ).values('shared_link')
+        )
+
+    def test_expired_upload_sessions(self):
+        self.assertIndexed(
+            UploadSession.objects.filter(
+                expires_at__lt=timezone.now()
+            )[:1000]
+        )
+
+    def test_blob_lookup(self):
+        self.assertIndexed(
+            Blob.objects.filter(sha256=f'{5:064x}')
+        )
+
+    def test_estimated_admin_count(self):
+        total = self.USERS * self.FILES_PER_USER
+        paginator = EstimatedCountPaginator(UserFile.objects.all(), 100)
+        paginator.estimate_threshold = total // 2
+        with CaptureQueriesContext(connection) as queries:
+            self.assertAlmostEqual(paginator.count, total, delta=total / 10)
+        self.assertIn('reltuples', queries[0]['sql'])
+
+        paginator = EstimatedCountPaginator(
+            UserFile.objects.filter(user=self.users[0]),
+            100
+        )
+        paginator.estimate_threshold = 1
+        self.assertEqual(paginator.count, self.FILES_PER_USER)
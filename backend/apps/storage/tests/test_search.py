@@ -0,0 +1,126 @@
+import unittest
+
+from django.urls import reverse
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+
+
+class FileSearchTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='searchuser',
+            email='search@example.com',
+            full_name='Search User',
+            password='testpass123'
+        )
+        self.other = CustomUser.objects.create_user(
+            username='othersearch',
+            email='othersearch@example.com',
+            full_name='Other User',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('file-search')
+
+        for name, comment in (
+            ('annual_report_2023.pdf', ''),
+            ('holiday.jpg', 'photos for the report'),
+            ('budget.xlsx', ''),
+            ('repord-draft.docx', ''),
+        ):
+            self.create_file(self.user, name, comment)
+        self.create_file(self.other, 'secret_report.pdf', '')
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def create_file(self, user, name, comment):
+        return UserFile.objects.create(
+            user=user,
+            file=SimpleUploadedFile(name, b'content'),
+            comment=comment
+        )
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_query_is_required(self):
+        for params in ({'q': 'ab'}, {}, {'shared': 'true'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn('q', response.json())
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql',
+        "Trigram search needs PostgreSQL"
+    )
+    def test_ranked_substring_and_fuzzy_matches(self):
+        names = [
+            f['original_name']
+            for f in self.search(q='REPORT')['results']
+        ]
+        self.assertEqual(names[0], 'annual_report_2023.pdf')
+        self.assertIn('holiday.jpg', names)
+        self.assertIn('repord-draft.docx', names)
+        self.assertNotIn('budget.xlsx', names)
+        self.assertNotIn('secret_report.pdf', names)
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql',
+        "Trigram search needs PostgreSQL"
+    )
+    def test_cursor_pagination(self):
+        first = self.search(q='report', page_size=1)
+        self.assertEqual(len(first['results']), 1)
+
+        names = [first['results'][0]['original_name']]
+        next_url = first['next']
+        while next_url:
+            page = self.client.get(next_url).json()
+            names += [f['original_name'] for f in page['results']]
+            next_url = page['next']
+        self.assertEqual(names, [
+            f['original_name']
+            for f in self.search(q='report')['results']
+        ])
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql',
+        "Trigram search needs PostgreSQL"
+    )
+    def test_shared_files_are_found(self):
+        # Files are shared on upload, absent filters must not exclude them
+        names = [
+            f['original_name']
+            for f in self.search(q='budget')['results']
+        ]
+        self.assertEqual(names, ['budget.xlsx'])
+        self.assertEqual(self.search(q='budget', shared='false')['results'], [])
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql',
+        "Trigram search needs PostgreSQL"
+    )
+    def test_list_filters_apply(self):
+        big = self.create_file(self.user, 'big_report.bin', '')
+        UserFile.objects.filter(pk=big.pk).update(size=10 ** 6)
+        names = [
+            f['original_name']
+            for f in self.search(q='report', size_min=1000)['results']
+        ]
+        self.assertEqual(names, ['big_report.bin'])
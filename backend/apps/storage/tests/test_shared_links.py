@@ -0,0 +1,143 @@
+import uuid
+from unittest import mock
+from datetime import timedelta
+
+from django.urls import reverse
+from django.db import connection
+from django.utils import timezone
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.tasks import cleanup_files_task
+
+
+class SharedLinkCacheTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='shareuser',
+            email='share@example.com',
+            full_name='Share User',
+            password='testpass123'
+        )
+        self.file = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('shared.txt', b'shared content'),
+            size=14
+        )
+        self.link = self.file.shared_link
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def download(self, link=None):
+        return self.client.get(
+            reverse(
+                'shared-file-download',
+                kwargs={'shared_link': link or self.link}
+            )
+        )
+
+    def selects(self, queries):
+        return [
+            q['sql'] for q in queries.captured_queries
+            if q['sql'].startswith('SELECT')
+        ]
+
+    def test_repeated_hits_skip_lookup(self):
+        self.assertEqual(self.download().status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.download()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'shared content')
+        self.assertEqual(self.selects(queries), [])
+
+    def test_unknown_link_is_cached(self):
+        link = uuid.uuid4()
+        self.assertEqual(
+            self.download(link).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.download(link).status_code,
+                status.HTTP_404_NOT_FOUND
+            )
+
+    def test_revoked_link(self):
+        self.download()
+        self.client.force_authenticate(user=self.user)
+        self.client.delete(
+            reverse('file-share', kwargs={'pk': self.file.pk})
+        )
+        self.assertEqual(
+            self.download().status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+    def test_renewed_link(self):
+        UserFile.objects.filter(pk=self.file.pk).update(
+            shared_expiry=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(self.download().status_code, status.HTTP_410_GONE)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(
+            reverse('file-share', kwargs={'pk': self.file.pk}),
+            {'expiry_days': 3},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.download(response.data['shared_link']).status_code,
+            status.HTTP_200_OK
+        )
+
+    def test_deleted_file(self):
+        self.download()
+        self.file.delete()
+        self.assertEqual(
+            self.download().status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+    def test_attached_blob(self):
+        self.download()
+        UserFile.objects.get(pk=self.file.pk).attach_blob()
+
+        response = self.download()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'shared content')
+
+    def test_server_error_hides_details(self):
+        with mock.patch(
+            'apps.storage.views.build_file_response',
+            side_effect=OSError('/srv/media/user_1_storage/shared.txt')
+        ), self.assertLogs('apps.storage.views', 'ERROR') as logs:
+            response = self.download()
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+        self.assertNotIn(b'/srv/media', response.content)
+        self.assertIn('/srv/media', logs.output[0])
+
+    def test_cleanup_task(self):
+        self.download()
+        UserFile.objects.filter(pk=self.file.pk).update(
+            shared_expiry=timezone.now() - timedelta(days=1)
+        )
+        result = cleanup_files_task()
+        self.assertEqual(result['expired_links_cleared'], 1)
+        self.assertEqual(
+            self.download().status_code,
+            status.HTTP_404_NOT_FOUND
+        )
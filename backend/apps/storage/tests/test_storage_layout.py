@@ -0,0 +1,80 @@
+import os
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile, user_directory_path
+
+
+class StorageLayoutTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='layoutuser',
+            email='layout@example.com',
+            full_name='Layout User',
+            password='testpass123'
+        )
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def test_fan_out_path(self):
+        instance = UserFile(user=self.user)
+        with override_settings(STORAGE_USER_DIR_LEVELS=2):
+            parts = user_directory_path(instance, 'report.pdf').split('/')
+        self.assertEqual(parts[0], f'user_{self.user.pk}_storage')
+        self.assertEqual([len(part) for part in parts[1:3]], [2, 2])
+        self.assertTrue(parts[3].endswith('.pdf'))
+
+        with override_settings(STORAGE_USER_DIR_LEVELS=0):
+            parts = user_directory_path(instance, 'report.pdf').split('/')
+        self.assertEqual(len(parts), 2)
+
+    def test_migrate_flat_files(self):
+        with override_settings(STORAGE_USER_DIR_LEVELS=0):
+            user_file = UserFile.objects.create(
+                user=self.user,
+                file=SimpleUploadedFile('old.txt', b'legacy content')
+            )
+        old_name = user_file.file.name
+        self.assertEqual(
+            os.path.dirname(old_name),
+            f'user_{self.user.pk}_storage'
+        )
+
+        with override_settings(STORAGE_USER_DIR_LEVELS=2):
+            call_command(
+                'migrate_storage_layout',
+                pause=0,
+                stdout=StringIO()
+            )
+
+        user_file.refresh_from_db()
+        self.assertEqual(len(user_file.file.name.split('/')), 4)
+        self.assertEqual(
+            os.path.basename(user_file.file.name),
+            os.path.basename(old_name)
+        )
+        self.assertFalse(default_storage.exists(old_name))
+
+        response = self.client.get(
+            reverse(
+                'shared-file-download',
+                kwargs={'shared_link': user_file.shared_link}
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            b'legacy content'
+        )
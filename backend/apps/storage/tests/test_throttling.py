@@ -0,0 +1,122 @@
+import time
+import unittest
+
+from django.urls import reverse
+from django.core.cache import cache
+from django.test import override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.download_stats import get_redis
+from apps.storage.throttling import transfer_limiter
+from apps.storage.tests.test_download_stats import redis_available
+
+
+def limits(**scopes):
+    value = {
+        'global': {'rate': None, 'concurrency': None},
+        'user': {'rate': None, 'concurrency': None},
+        'link': {'rate': None, 'concurrency': None},
+    }
+    value.update(scopes)
+    return value
+
+
+class TransferLimitTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='limituser',
+            email='limit@example.com',
+            full_name='Limit User',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.content = b'x' * 64 * 1024
+        self.file = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('limited.bin', self.content),
+            size=len(self.content)
+        )
+        self.url = reverse('file-download', kwargs={'pk': self.file.pk})
+
+    def tearDown(self):
+        redis = get_redis()
+        if redis is not None and redis_available():
+            for key in redis.scan_iter('storage:transfers:*'):
+                redis.delete(key)
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def test_unlimited_by_default(self):
+        self.assertIsNone(transfer_limiter(user_id=self.user.id))
+
+    @unittest.skipUnless(redis_available(), "Redis is not available")
+    @override_settings(STORAGE_TRANSFER_LIMITS=limits(
+        user={'rate': None, 'concurrency': 1}
+    ))
+    def test_user_concurrency(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        second = self.client.get(self.url)
+        self.assertEqual(
+            second.status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertIn('Retry-After', second)
+
+        self.assertEqual(b''.join(first.streaming_content), self.content)
+        first.close()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+
+    @unittest.skipUnless(redis_available(), "Redis is not available")
+    @override_settings(STORAGE_TRANSFER_LIMITS=limits(
+        user={'rate': None, 'concurrency': 1}
+    ))
+    def test_archive_concurrency(self):
+        url = reverse('file-archive-download') + f'?ids={self.file.pk}'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        second = self.client.get(url)
+        self.assertEqual(
+            second.status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+        b''.join(first.streaming_content)
+        first.close()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+
+    @unittest.skipUnless(redis_available(), "Redis is not available")
+    @override_settings(STORAGE_TRANSFER_LIMITS=limits(**{
+        'global': {'rate': None, 'concurrency': 1}
+    }))
+    def test_global_concurrency(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+        self.assertEqual(
+            second.status_code,
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertIn('Retry-After', second)
+        first.close()
+
+    @unittest.skipUnless(redis_available(), "Redis is not available")
+    @override_settings(STORAGE_TRANSFER_LIMITS=limits(
+        user={'rate': 32 * 1024, 'concurrency': None}
+    ))
+    def test_user_rate(self):
+        started = time.monotonic()
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertGreaterEqual(time.monotonic() - started, 0.9)
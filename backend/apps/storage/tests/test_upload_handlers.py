@@ -0,0 +1,219 @@
+import io
+import os
+
+from django.conf import settings
+from django.urls import reverse
+from django.http import UnreadablePostError
+from django.db import connection
+from django.core.cache import cache
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.test import (
+    APIRequestFactory,
+    APITransactionTestCase,
+    force_authenticate,
+)
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UserFile
+from apps.storage.views import FileListView
+from apps.storage.upload_handlers import memory_budget
+
+
+class DisconnectingStream(io.BytesIO):
+    """
+    Request body whose client goes away after `limit` bytes.
+    """
+
+    def __init__(self, data, limit):
+        super().__init__(data)
+        self.limit = limit
+
+    def read(self, size=-1):
+        if self.tell() >= self.limit:
+            raise UnreadablePostError('Client disconnected')
+        if size is None or size < 0:
+            size = self.limit - self.tell()
+        return super().read(min(size, self.limit - self.tell()))
+
+
+class StreamingUploadTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='streamuser',
+            email='stream@example.com',
+            full_name='Stream User',
+            password='testpass123',
+            max_storage=10 * 1024 * 1024
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('file-list')
+
+    def tearDown(self):
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def user_dir_files(self):
+        path = default_storage.path(f'user_{self.user.id}_storage')
+        return [
+            name
+            for _, _, names in os.walk(path)
+            for name in names
+        ]
+
+    def test_upload_is_written_once_to_final_path(self):
+        content = b'streamed' * 100000
+        response = self.client.post(
+            self.url,
+            {'file': SimpleUploadedFile('stream.bin', content)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user_file = UserFile.objects.get(pk=response.data['id'])
+        self.assertEqual(user_file.original_name, 'stream.bin')
+        self.assertEqual(user_file.size, len(content))
+        with user_file.open_content() as f:
+            self.assertEqual(f.read(), content)
+        self.assertTrue(user_file.file.name.startswith('blobs/'))
+        self.assertEqual(self.user_dir_files(), [])
+        self.assertEqual(memory_budget._reserved, 0)
+
+    def test_rejected_upload_leaves_no_file(self):
+        self.user.max_storage = 10
+        self.user.save()
+
+        response = self.client.post(
+            self.url,
+            {'file': SimpleUploadedFile('big.bin', b'x' * 100)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.user_dir_files(), [])
+
+    def test_client_disconnect_releases_upload(self):
+        request = APIRequestFactory().post(
+            self.url,
+            {'file': SimpleUploadedFile('cut.bin', b'x' * 3 * 1024 * 1024)},
+            format='multipart'
+        )
+        request._stream = DisconnectingStream(
+            request.read(),
+            2 * 1024 * 1024
+        )
+        request._read_started = False
+        force_authenticate(request, user=self.user)
+
+        with self.assertRaises(UnreadablePostError):
+            FileListView.as_view()(request)
+        self.assertEqual(memory_budget._reserved, 0)
+        self.assertEqual(self.user_dir_files(), [])
+        self.assertFalse(UserFile.objects.exists())
+
+    @override_settings(UPLOAD_MEMORY_BUDGET=0)
+    def test_memory_budget_exhausted(self):
+        response = self.client.post(
+            self.url,
+            {'file': SimpleUploadedFile('a.txt', b'abc')},
+            format='multipart'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertIn('Retry-After', response)
+        self.assertFalse(UserFile.objects.exists())
+        self.assertEqual(memory_budget._reserved, 0)
+        self.assertEqual(response.wsgi_request.POST, {})
+
+    def test_memory_budget_counts_form_fields(self):
+        # One chunk is free, but the form fields may take more
+        held = settings.UPLOAD_MEMORY_BUDGET - settings.UPLOAD_CHUNK_SIZE
+        self.assertTrue(memory_budget.reserve(held))
+        try:
+            response = self.client.post(
+                self.url,
+                {'file': SimpleUploadedFile('a.bin', b'x' * 2 * 1024 * 1024)},
+                format='multipart'
+            )
+        finally:
+            memory_budget.release(held)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(memory_budget._reserved, 0)
+
+    def test_json_body_is_bounded(self):
+        user_file = UserFile.objects.create(
+            user=self.user,
+            file=SimpleUploadedFile('a.txt', b'abc'),
+            original_name='a.txt',
+            size=3
+        )
+        url = reverse('file-detail', kwargs={'pk': user_file.pk})
+        comment = 'x' * (settings.DATA_UPLOAD_MAX_MEMORY_SIZE + 1)
+
+        response = self.client.patch(url, {'comment': comment}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        user_file.refresh_from_db()
+        self.assertEqual(user_file.comment, '')
+
+    def test_bulk_upload(self):
+        files = [
+            SimpleUploadedFile(f'bulk{i}.txt', f'content {i}'.encode())
+            for i in range(5)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('file-bulk-upload'),
+                {'files': files, 'comment': 'batch'},
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            len([
+                q for q in queries.captured_queries
+                if q['sql'].startswith('INSERT INTO "storage_userfile"')
+            ]),
+            1
+        )
+        self.assertEqual(
+            [f['original_name'] for f in response.data],
+            [f'bulk{i}.txt' for i in range(5)]
+        )
+        self.assertEqual(
+            UserFile.objects.filter(user=self.user, comment='batch').count(),
+            5
+        )
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.file_count, 5)
+        self.assertEqual(
+            self.user.storage_used,
+            sum(len(f'content {i}') for i in range(5))
+        )
+        self.assertEqual(self.user_dir_files(), [])
+
+    def test_bulk_upload_checks_total_quota(self):
+        self.user.max_storage = 150
+        self.user.save()
+
+        response = self.client.post(
+            reverse('file-bulk-upload'),
+            {
+                'files': [
+                    SimpleUploadedFile('one.bin', b'x' * 100),
+                    SimpleUploadedFile('two.bin', b'y' * 100)
+                ]
+            },
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(UserFile.objects.exists())
+        self.assertEqual(self.user_dir_files(), [])
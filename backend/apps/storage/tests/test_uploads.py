@@ -0,0 +1,166 @@
+from unittest import mock
+
+from django.urls import reverse
+from django.db import connection
+from django.core.cache import cache
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.accounts.models import CustomUser
+from apps.storage.models import UploadSession, UserFile
+
+
+class UploadSessionAPITestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='uploader',
+            email='uploader@example.com',
+            full_name='Upload User',
+            password='testpass123',
+            max_storage=10 * 1024 * 1024
+        )
+        self.client.force_authenticate(user=self.user)
+        self.content = b'0123456789' * 100
+
+    def tearDown(self):
+        UploadSession.objects.all().delete()
+        UserFile.objects.all().delete()
+        CustomUser.objects.all().delete()
+        cache.clear()
+
+    def create_session(self, size=None):
+        response = self.client.post(
+            reverse('upload-session-list'),
+            {
+                'original_name': 'big.bin',
+                'size': len(self.content) if size is None else size,
+                'comment': 'resumable'
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED
+        )
+        return response.data['id']
+
+    def send_chunk(self, session_id, offset, data):
+        return self.client.patch(
+            reverse('upload-session-detail', kwargs={'pk': session_id}),
+            data=data,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_chunked_upload_and_finalize(self):
+        session_id = self.create_session()
+
+        response = self.send_chunk(session_id, 0, self.content[:400])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Upload-Offset'], '400')
+
+        response = self.send_chunk(session_id, 400, self.content[400:])
+        self.assertEqual(response.data['offset'], len(self.content))
+
+        response = self.client.post(
+            reverse('upload-session-complete', kwargs={'pk': session_id})
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED
+        )
+        self.assertEqual(response.data['original_name'], 'big.bin')
+        self.assertEqual(response.data['comment'], 'resumable')
+
+        user_file = UserFile.objects.get(pk=response.data['id'])
+        with user_file.file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_offset_mismatch_returns_conflict(self):
+        session_id = self.create_session()
+        self.send_chunk(session_id, 0, self.content[:100])
+
+        response = self.send_chunk(session_id, 0, self.content[:100])
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_409_CONFLICT
+        )
+        self.assertEqual(response['Upload-Offset'], '100')
+
+        response = self.client.get(
+            reverse('upload-session-detail', kwargs={'pk': session_id})
+        )
+        self.assertEqual(response.data['offset'], 100)
+
+    def test_concurrent_chunk_returns_conflict(self):
+        session_id = self.create_session()
+        session = UploadSession.objects.get(pk=session_id)
+        self.assertTrue(session.claim())
+
+        response = self.send_chunk(session_id, 0, self.content[:100])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], '0')
+
+        session.release()
+        response = self.send_chunk(session_id, 0, self.content[:100])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_body_is_read_outside_of_a_transaction(self):
+        append = UploadSession.append
+        in_transaction = []
+
+        def checked_append(session, stream, offset):
+            in_transaction.append(connection.in_atomic_block)
+            return append(session, stream, offset)
+
+        session_id = self.create_session()
+        with mock.patch.object(UploadSession, 'append', checked_append):
+            response = self.send_chunk(session_id, 0, self.content[:100])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(in_transaction, [False])
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        session_id = self.create_session()
+        self.send_chunk(session_id, 0, self.content[:100])
+
+        response = self.client.post(
+            reverse('upload-session-complete', kwargs={'pk': session_id})
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_409_CONFLICT
+        )
+        self.assertFalse(UserFile.objects.exists())
+
+    def test_chunk_larger_than_declared_size(self):
+        session_id = self.create_session(size=10)
+
+        response = self.send_chunk(session_id, 0, self.content[:20])
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            UploadSession.objects.get(pk=session_id).offset,
+            0
+        )
+
+    def test_quota_checked_at_session_creation(self):
+        response = self.client.post(
+            reverse('upload-session-list'),
+            {
+                'original_name': 'huge.bin',
+                'size': 11 * 1024 * 1024
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        self.assertIn(
+            'exceeded',
+            str(response.data).lower()
+        )
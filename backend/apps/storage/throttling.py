@@ -0,0 +1,196 @@
+import time
+import uuid
+import asyncio
+
+from django.conf import settings
+from rest_framework import exceptions
+
+from .download_stats import get_redis
+
+
+ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return tostring(oldest[2] - ARGV[1])
+end
+redis.call('ZADD', KEYS[1], ARGV[1] + ARGV[2], ARGV[4])
+redis.call('EXPIRE', KEYS[1], math.ceil(ARGV[2]))
+return '0'
+"""
+
+# Token buckets holding one second of traffic; taking more than is
+# available leaves a debt the caller pays off by sleeping
+CONSUME_SCRIPT = """
+local now = tonumber(ARGV[1])
+local size = tonumber(ARGV[2])
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i + 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or rate
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(rate, tokens + math.max(now - ts, 0) * rate) - size
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', key, 60)
+    if tokens < 0 then
+        wait = math.max(wait, -tokens / rate)
+    end
+end
+return tostring(wait)
+"""
+
+
+class TransferCapacityExhausted(exceptions.APIException):
+    status_code = 503
+    default_detail = "Too many downloads are in progress. " \
+        "Please retry later"
+    default_code = 'transfer_capacity_exhausted'
+
+    def __init__(self, wait=None, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+
+class TransferLimiter:
+    """
+    Bandwidth (bytes per second) and concurrent transfer limits of
+    one download, checked in Redis for every scope it belongs to:
+    'global', 'user' (the downloading user) and 'link' (a shared link).
+    Limits come from STORAGE_TRANSFER_LIMITS.
+    """
+
+    def __init__(self, redis, scopes):
+        self.redis = redis
+        self.scopes = scopes
+        self.token = uuid.uuid4().hex
+        self.slots = []
+        self.acquire_script = redis.register_script(ACQUIRE_SCRIPT)
+        self.consume_script = redis.register_script(CONSUME_SCRIPT)
+
+    @property
+    def rate_scopes(self):
+        return [(name, key, limits) for name, key, limits in self.scopes
+                if limits.get('rate')]
+
+    def acquire(self):
+        """
+        Takes a transfer slot in every scope with a concurrency limit,
+        raising 429 (user, link) or 503 (global) when one is full.
+        """
+        now = time.time()
+        ttl = settings.STORAGE_TRANSFER_SLOT_TTL
+        for name, key, limits in self.scopes:
+            if not limits.get('concurrency'):
+                continue
+            wait = float(self.acquire_script(
+                keys=[f'{key}:slots'],
+                args=[now, ttl, limits['concurrency'], self.token]
+            ))
+            if wait > 0:
+                self.release()
+                if name == 'global':
+                    raise TransferCapacityExhausted(wait=wait)
+                raise exceptions.Throttled(wait=wait)
+            self.slots.append(f'{key}:slots')
+
+    def release(self):
+        if self.slots:
+            pipe = self.redis.pipeline(transaction=False)
+            for slot in self.slots:
+                pipe.zrem(slot, self.token)
+            pipe.execute()
+            self.slots = []
+
+    def consume(self, size):
+        """
+        Accounts `size` sent bytes and returns how long to sleep before
+        sending more. Also keeps the transfer slots alive.
+        """
+        now = time.time()
+        if self.slots:
+            expiry = now + settings.STORAGE_TRANSFER_SLOT_TTL
+            pipe = self.redis.pipeline(transaction=False)
+            for slot in self.slots:
+                pipe.zadd(slot, {self.token: expiry}, xx=True)
+            pipe.execute()
+
+        scopes = self.rate_scopes
+        if not scopes:
+            return 0
+        return float(self.consume_script(
+            keys=[f'{key}:bucket' for _, key, _ in scopes],
+            args=[now, size] + [limits['rate'] for _, _, limits in scopes]
+        ))
+
+    @property
+    def accel_rate(self):
+        rates = [limits['rate'] for _, _, limits in self.rate_scopes]
+        return min(rates) if rates else None
+
+    def limit_response(self, response):
+        """
+        Paces the body of `response` and frees the slots once it is
+        sent. Under X-Accel-Redirect nginx is asked to cap the rate.
+        """
+        if 'X-Accel-Redirect' in response:
+            self.release()
+            if self.accel_rate:
+                response['X-Accel-Limit-Rate'] = self.accel_rate
+            return response
+
+        if not response.streaming:
+            self.release()
+            return response
+
+        if response.is_async:
+            response.streaming_content = self._aiter(
+                response.streaming_content
+            )
+        else:
+            response.streaming_content = self._iter(
+                response.streaming_content
+            )
+        response._resource_closers.append(self.release)
+        return response
+
+    def _iter(self, content):
+        try:
+            for chunk in content:
+                time.sleep(self.consume(len(chunk)))
+                yield chunk
+        finally:
+            self.release()
+
+    async def _aiter(self, content):
+        try:
+            async for chunk in content:
+                await asyncio.sleep(
+                    await asyncio.to_thread(self.consume, len(chunk))
+                )
+                yield chunk
+        finally:
+            await asyncio.to_thread(self.release)
+
+
+def transfer_limiter(user_id=None, shared_link=None):
+    """
+    Returns the TransferLimiter of a download, or None when no limit
+    applies or Redis is not available.
+    """
+    limits = settings.STORAGE_TRANSFER_LIMITS
+    scopes = [('global', 'storage:transfers:global', limits['global'])]
+    if user_id is not None:
+        scopes.append(
+            ('user', f'storage:transfers:user:{user_id}', limits['user'])
+        )
+    if shared_link is not None:
+        scopes.append(
+            ('link', f'storage:transfers:link:{shared_link}', limits['link'])
+        )
+    scopes = [scope for scope in scopes if any(scope[2].values())]
+
+    redis = get_redis() if scopes else None
+    if redis is None:
+        return None
+    return TransferLimiter(redis, scopes)
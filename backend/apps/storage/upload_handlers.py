@@ -0,0 +1,274 @@
+import os
+import hashlib
+import tempfile
+import threading
+
+from django.conf import settings
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    SkipFile,
+    StopFutureHandlers,
+)
+from rest_framework import exceptions
+
+from .backends import is_local_storage
+from .compression import (
+    ENCODING_ZSTD,
+    SeekableZstdWriter,
+    compression_enabled,
+    is_compressible,
+    open_decoded,
+)
+from .models import UserFile, user_directory_path
+
+
+class UploadMemoryExhausted(exceptions.APIException):
+    status_code = 503
+    default_detail = "The server is busy receiving other uploads. " \
+        "Please retry later"
+    default_code = 'upload_memory_exhausted'
+    wait = 5
+
+
+class UploadMemoryBudget:
+    """
+    Per-worker accounting of the memory held by in-flight upload
+    chunks (UPLOAD_MEMORY_BUDGET bytes shared by all threads).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reserved = 0
+
+    def reserve(self, size):
+        with self._lock:
+            if self._reserved + size > settings.UPLOAD_MEMORY_BUDGET:
+                return False
+            self._reserved += size
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self._reserved = max(self._reserved - size, 0)
+
+
+memory_budget = UploadMemoryBudget()
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    An upload that is already written to its final storage name.
+
+    Assign `storage_name` to a FileField instead of the object itself,
+    so the content is not copied a second time.
+    """
+
+    def __init__(self, storage_name, name, size, sha256, content_encoding='',
+                 content_type=None, charset=None, content_type_extra=None):
+        super().__init__(
+            None,
+            name,
+            content_type,
+            size,
+            charset,
+            content_type_extra
+        )
+        self.storage_name = storage_name
+        self.sha256 = sha256
+        self.content_encoding = content_encoding
+
+    def open(self, mode='rb'):
+        self.file = open_decoded(
+            default_storage,
+            self.storage_name,
+            self.content_encoding
+        )
+        return self
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    def discard(self):
+        self.close()
+        default_storage.delete(self.storage_name)
+
+
+class StreamingFileUploadHandler(FileUploadHandler):
+    """
+    Writes uploaded chunks straight to their final location under
+    `user_directory_path`, computing size and SHA-256 on the way.
+    Files whose first chunk compresses well are stored as seekable
+    zstd (the size and hash stay those of the original content).
+    With an object storage the chunks are spooled to a temporary
+    file and sent to the bucket when the file is complete.
+
+    Every upload holds its share of the worker's UPLOAD_MEMORY_BUDGET
+    (see `reserve_memory`) while it is being parsed.
+    """
+    chunk_size = settings.UPLOAD_CHUNK_SIZE
+
+    def __init__(self, request=None, field_names=('file',)):
+        super().__init__(request)
+        self.field_names = field_names
+        self.reserved = 0
+        self.file = None
+        self.storage_name = None
+        self.stored_names = []
+        self.remote = not is_local_storage()
+        self.compress = compression_enabled()
+        self.writer = None
+
+    def reserve_memory(self):
+        """
+        Reserves what parsing the request can hold at once: one chunk
+        of file content plus the non-file fields, which Django caps at
+        DATA_UPLOAD_MAX_MEMORY_SIZE, or the whole body if it is smaller.
+        Returns False when the budget is exhausted.
+        """
+        try:
+            content_length = int(self.request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        size = self.chunk_size + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        if content_length > 0:
+            size = min(size, content_length)
+        if not memory_budget.reserve(size):
+            return False
+        self.reserved = size
+        return True
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        if field_name not in self.field_names:
+            raise SkipFile()
+        super().new_file(field_name, file_name, *args, **kwargs)
+
+        self.storage_name = default_storage.get_available_name(
+            user_directory_path(UserFile(user=self.request.user), file_name)
+        )
+        if self.remote:
+            # Object storages take the content in one request once
+            # the file is complete
+            self.file = tempfile.TemporaryFile()
+        else:
+            path = default_storage.path(self.storage_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.file = open(path, 'xb')
+            self.stored_names.append(self.storage_name)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.writer = None
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and self.compress and is_compressible(raw_data):
+            self.writer = SeekableZstdWriter(self.file)
+        (self.writer or self.file).write(raw_data)
+        self.sha256.update(raw_data)
+        self.size += len(raw_data)
+
+    def file_complete(self, file_size):
+        encoding = ''
+        if self.writer is not None:
+            self.writer.close()
+            encoding = ENCODING_ZSTD
+        if self.remote:
+            self.file.seek(0)
+            self.storage_name = default_storage.save(
+                self.storage_name,
+                File(self.file)
+            )
+            self.stored_names.append(self.storage_name)
+        self.file.close()
+        self.file = None
+        return StoredUploadedFile(
+            self.storage_name,
+            self.file_name,
+            self.size,
+            self.sha256.hexdigest(),
+            encoding,
+            self.content_type,
+            self.charset,
+            self.content_type_extra
+        )
+
+    def upload_interrupted(self):
+        self.discard_partial()
+
+    def upload_complete(self):
+        self.discard_partial()
+        self.release_memory()
+
+    def discard_partial(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            if not self.remote:
+                default_storage.delete(self.storage_name)
+                self.stored_names.remove(self.storage_name)
+
+    def release_memory(self):
+        if self.reserved:
+            memory_budget.release(self.reserved)
+            self.reserved = 0
+
+    def cleanup(self):
+        """
+        Removes every file written by the handler that the view did not
+        take over, and returns the memory slot. Safe to call several
+        times.
+        """
+        self.discard_partial()
+        for storage_name in self.stored_names:
+            default_storage.delete(storage_name)
+        self.stored_names = []
+        self.release_memory()
+
+
+class StreamingUploadMixin:
+    """
+    Installs StreamingFileUploadHandler for POST requests of a view and
+    makes sure it is cleaned up whatever the outcome of the request.
+    """
+    upload_field_names = ('file',)
+
+    upload_handler = None
+
+    def dispatch(self, request, *args, **kwargs):
+        # Not in finalize_response: a client disconnecting mid-body
+        # makes the parser raise an error DRF does not turn into a
+        # response, and Django then skips upload_complete too
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.upload_handler is not None:
+                self.upload_handler.cleanup()
+
+    def initialize_request(self, request, *args, **kwargs):
+        self.upload_handler = None
+        self.upload_rejected = False
+        if request.method == 'POST':
+            handler = StreamingFileUploadHandler(
+                request,
+                field_names=self.upload_field_names
+            )
+            if handler.reserve_memory():
+                self.upload_handler = handler
+                request.upload_handlers = [handler]
+            else:
+                # The body of a refused upload is never read, not even
+                # by error reporting going through request.POST
+                self.upload_rejected = True
+                request._post = QueryDict()
+                request._files = MultiValueDict()
+        return super().initialize_request(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.upload_rejected:
+            raise UploadMemoryExhausted()
@@ -1,19 +1,45 @@
+from django.conf import settings
 from django.urls import path
 
+from .async_views import (
+    AsyncFileDownloadView,
+    AsyncSharedFileDownloadView,
+)
 from .views import (
+    FileArchiveDownloadView,
+    FileBatchView,
+    FileBulkUploadView,
     FileDetailView,
     FileDownloadView,
+    FileInstantUploadView,
     FileListView,
+    FilePreviewView,
+    FileSearchView,
     FileShareView,
     SharedFileDownloadView,
+    UploadSessionCompleteView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
 )
 
+if settings.STORAGE_ASYNC_DOWNLOADS:
+    file_download_view = AsyncFileDownloadView
+    shared_download_view = AsyncSharedFileDownloadView
+else:
+    file_download_view = FileDownloadView
+    shared_download_view = SharedFileDownloadView
+
 urlpatterns = [
     path(
         'files/',
         FileListView.as_view(),
         name='file-list'
     ),
+    path(
+        'files/search/',
+        FileSearchView.as_view(),
+        name='file-search'
+    ),
     path(
         'files/<int:pk>/',
         FileDetailView.as_view(),
@@ -21,9 +47,14 @@ urlpatterns = [
     ),
     path(
         'files/<int:pk>/download/',
-        FileDownloadView.as_view(),
+        file_download_view.as_view(),
         name='file-download'
     ),
+    path(
+        'files/<int:pk>/preview/',
+        FilePreviewView.as_view(),
+        name='file-preview'
+    ),
     path(
         'files/<int:pk>/share/',
         FileShareView.as_view(),
@@ -31,7 +62,42 @@ urlpatterns = [
     ),
     path(
         'shared/<uuid:shared_link>/',
-        SharedFileDownloadView.as_view(),
+        shared_download_view.as_view(),
         name='shared-file-download'
     ),
+    path(
+        'files/bulk/',
+        FileBulkUploadView.as_view(),
+        name='file-bulk-upload'
+    ),
+    path(
+        'files/batch/',
+        FileBatchView.as_view(),
+        name='file-batch'
+    ),
+    path(
+        'files/archive/',
+        FileArchiveDownloadView.as_view(),
+        name='file-archive-download'
+    ),
+    path(
+        'files/instant/',
+        FileInstantUploadView.as_view(),
+        name='file-instant-upload'
+    ),
+    path(
+        'files/uploads/',
+        UploadSessionCreateView.as_view(),
+        name='upload-session-list'
+    ),
+    path(
+        'files/uploads/<uuid:pk>/',
+        UploadSessionDetailView.as_view(),
+        name='upload-session-detail'
+    ),
+    path(
+        'files/uploads/<uuid:pk>/complete/',
+        UploadSessionCompleteView.as_view(),
+        name='upload-session-complete'
+    ),
 ]
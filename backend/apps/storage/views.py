@@ -1,75 +1,140 @@
-import os
+import logging
+from io import BytesIO
 from datetime import timedelta
 
+from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
 from django.core.cache import cache
-from django.http import FileResponse, Http404
+from django.urls import reverse
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import PermissionDenied
 
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser
-from rest_framework import generics, permissions, serializers, status
-
-from .models import UserFile
+from rest_framework.renderers import JSONRenderer
+from rest_framework import exceptions, generics, permissions, serializers, status
+
+from .models import Blob, UploadSession, UserFile
+from .tasks import attach_blob_task
+from .archives import iter_zip
+from .backends import is_local_storage
+from .download_stats import record_downloads
+from .downloads import build_file_response
+from .caching import (
+    file_list_cache_key,
+    file_list_cache_timeout,
+    invalidate_shared_links,
+    invalidate_user_files,
+    resolve_shared_link,
+)
+from .filters import (
+    FileFilterBackend,
+    FileSearchFilterBackend,
+    filter_files,
+)
+from .pagination import FileCursorPagination, FileSearchPagination
+from .previews import get_preview
+from .throttling import TransferCapacityExhausted, transfer_limiter
+from .upload_handlers import StreamingUploadMixin
 from apps.accounts.models import CustomUser
 from .renderers.binary_file import BinaryFileRenderer
-from .serializers import FileSerializer, FileShareSerializer
-from mycloud.settings.base import CACHE_TTL
+from .serializers import (
+    ArchiveDownloadSerializer,
+    FileBatchSerializer,
+    FileSerializer,
+    FileShareSerializer,
+    InstantUploadSerializer,
+    UploadSessionSerializer,
+)
+
 
+logger = logging.getLogger(__name__)
 
-class FileListView(generics.ListCreateAPIView):
+
+class FileListView(StreamingUploadMixin, generics.ListCreateAPIView):
     serializer_class = FileSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser]
+    filter_backends = [FileFilterBackend]
+    pagination_class = FileCursorPagination
 
-    def get_cache_key(self):
+    def get_target_user_id(self):
         user = self.request.user
-        user_id = user.id
         if user.is_superuser and 'user_id' in self.request.query_params:
-            user_id = self.request.query_params['user_id']
-        return f'user_files_{user_id}'
+            try:
+                return int(self.request.query_params['user_id'])
+            except ValueError:
+                raise Http404("User not found")
+        return user.id
 
     def get_queryset(self):
-        cache_key = self.get_cache_key()
-        queryset = cache.get(cache_key)
-        
-        if queryset is None:
-            user = self.request.user
-
-            if user.is_superuser and 'user_id' in self.request.query_params:
-                target_user = get_object_or_404(
-                    CustomUser,
-                    id=self.request.query_params['user_id']
-                )
-                queryset = UserFile.objects.filter(
-                    user=target_user
-                )
-            else:
-                queryset = UserFile.objects.filter(
-                    user=user
-                )
+        user = self.request.user
 
-            queryset = queryset.select_related('user').only(
-                'id',
-                'original_name',
-                'size',
-                'upload_date',
-                'last_download',
-                'comment',
-                'shared_link',
-                'shared_expiry',
-                'user__username'
+        if user.is_superuser and 'user_id' in self.request.query_params:
+            target_user = get_object_or_404(
+                CustomUser,
+                id=self.get_target_user_id()
             )
-            
+            queryset = UserFile.objects.filter(
+                user=target_user
+            )
+        else:
+            queryset = UserFile.objects.filter(
+                user=user
+            )
+
+        return queryset.select_related('user').only(
+            'id',
+            'original_name',
+            'size',
+            'upload_date',
+            'last_download',
+            'download_count',
+            'comment',
+            'shared_link',
+            'shared_expiry',
+            'user__username'
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        Serves the rendered JSON of the page from the cache; a hit
+        skips both the ORM and the serializers.
+        """
+        cache_key = file_list_cache_key(
+            request,
+            self.get_target_user_id()
+        )
+        content = cache.get(cache_key)
+
+        if content is None:
+            response = super().list(request, *args, **kwargs)
+            rows = response.data
+            if isinstance(rows, dict):
+                rows = rows['results']
+
+            content = JSONRenderer().render(response.data)
             cache.set(
                 cache_key,
-                queryset,
-                timeout=CACHE_TTL
+                content,
+                timeout=file_list_cache_timeout(rows)
             )
 
-        return queryset
+        return HttpResponse(
+            content,
+            content_type='application/json'
+        )
 
     def create(self, request, *args, **kwargs):
         file_obj = self.request.FILES.get('file')
@@ -80,21 +145,38 @@ class FileListView(generics.ListCreateAPIView):
 
         user = request.user
         if not user.has_storage_space(file_obj.size):
+            file_obj.discard()
             raise serializers.ValidationError({
                 'error': "You have exceeded the maximum storage limit. "
                         "Please contact the administrator at admin@mail.ru "
                         "to increase your storage quota"
             })
 
-        instance = UserFile.objects.create(
-            user=user,
-            original_name=file_obj.name,
-            size=file_obj.size,
-            file=file_obj,
-            comment=request.data.get('comment', '')
-        )
+        try:
+            blob = Blob.store(
+                file_obj.storage_name,
+                file_obj.sha256,
+                file_obj.size,
+                file_obj.content_encoding
+            )
+        finally:
+            file_obj.discard()
+
+        try:
+            instance = UserFile.objects.create(
+                user=user,
+                blob=blob,
+                original_name=file_obj.name,
+                size=file_obj.size,
+                file=blob.file.name,
+                encoding=blob.encoding,
+                comment=request.data.get('comment', '')
+            )
+        except Exception:
+            Blob.release(blob.pk)
+            raise
 
-        cache.delete(self.get_cache_key())
+        invalidate_user_files(user.id)
         serializer = self.get_serializer(instance)
         headers = self.get_success_headers(serializer.data)
 
@@ -106,13 +188,100 @@ class FileListView(generics.ListCreateAPIView):
 
     @action(detail=False, methods=['post'])
     def clear_cache(self, request):
-        cache.delete(self.get_cache_key())
+        invalidate_user_files(self.get_target_user_id())
         return Response(
             {'status': 'cache cleared'},
             status=status.HTTP_200_OK
         )
 
 
+class FileSearchView(FileListView):
+    """
+    Ranked search over names and comments of the files:
+    GET files/search/?q=report
+    Takes the list filters and `user_id`, and shares its cache.
+    """
+    http_method_names = ['get', 'head', 'options']
+    filter_backends = [FileSearchFilterBackend]
+    pagination_class = FileSearchPagination
+
+
+class FileBulkUploadView(StreamingUploadMixin, generics.GenericAPIView):
+    """
+    Uploads every `files` part of one multipart request: a single quota
+    check for the whole batch, one INSERT and one cache invalidation.
+    """
+    serializer_class = FileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    upload_field_names = ('files',)
+
+    def post(self, request):
+        uploads = request.FILES.getlist('files')
+        if not uploads:
+            raise serializers.ValidationError({
+                'files': "No files were uploaded"
+            })
+
+        user = request.user
+        if not user.has_storage_space(sum(f.size for f in uploads)):
+            raise serializers.ValidationError({
+                'error': "You have exceeded the maximum storage limit. "
+                        "Please contact the administrator at admin@mail.ru "
+                        "to increase your storage quota"
+            })
+
+        comment = request.data.get('comment', '')
+        results, instances = [], []
+        for file_obj in uploads:
+            try:
+                blob = Blob.store(
+                    file_obj.storage_name,
+                    file_obj.sha256,
+                    file_obj.size,
+                    file_obj.content_encoding
+                )
+            except OSError as e:
+                results.append({
+                    'original_name': file_obj.name,
+                    'error': str(e)
+                })
+                continue
+            finally:
+                file_obj.discard()
+
+            instance = UserFile(
+                blob=blob,
+                original_name=file_obj.name,
+                size=file_obj.size,
+                file=blob.file.name,
+                encoding=blob.encoding,
+                comment=comment
+            )
+            instances.append(instance)
+            results.append(instance)
+
+        try:
+            UserFile.bulk_create_for_user(user, instances)
+        except Exception:
+            for instance in instances:
+                Blob.release(instance.blob_id)
+            raise
+
+        invalidate_user_files(user.id)
+        failed = len(results) - len(instances)
+        results = [
+            self.get_serializer(result).data
+            if isinstance(result, UserFile) else result
+            for result in results
+        ]
+        return Response(
+            results,
+            status=status.HTTP_207_MULTI_STATUS if failed
+            else status.HTTP_201_CREATED
+        )
+
+
 class FileDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = FileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -139,6 +308,7 @@ class FileDetailView(generics.RetrieveUpdateDestroyAPIView):
             'size',
             'upload_date',
             'last_download',
+            'download_count',
             'comment',
             'shared_link',
             'shared_expiry',
@@ -156,22 +326,62 @@ class FileDetailView(generics.RetrieveUpdateDestroyAPIView):
                 update_fields=['shared_expiry']
             )
 
-        cache_key = f'user_files_{instance.user.id}'
-        cache.delete(cache_key)
+        invalidate_shared_links([instance.shared_link])
+        invalidate_user_files(instance.user_id)
 
     def perform_destroy(self, instance):
         user_id = instance.user.id
         instance.delete()
 
-        cache_key = f'user_files_{user_id}'
-        cache.delete(cache_key)
+        invalidate_user_files(user_id)
+
+
+def check_file_access(user, user_file):
+    if not user.is_superuser and user_file.user_id != user.id:
+        raise PermissionDenied(
+            "You don't have the rights to download this file"
+        )
+
+
+def attachment_response(request, user_file, asynchronous=False):
+    """
+    Response of the owner's download of `user_file`. The download is
+    recorded only when the response serves the file, not for a 304
+    or a 416.
+    """
+    response = build_file_response(
+        request,
+        user_file,
+        content_type='application/octet-stream',
+        asynchronous=asynchronous
+    )
+    if response.status_code in (200, 206, 302):
+        response['Content-Disposition'] = f'attachment; filename="{user_file.original_name}"'
+        record_downloads([user_file])
+    return response
+
+
+def shared_file_response(request, user_file, asynchronous=False):
+    """
+    Response of a download of `user_file` through its shared link,
+    recorded like in `attachment_response`.
+    """
+    response = build_file_response(
+        request,
+        user_file,
+        asynchronous=asynchronous
+    )
+    if response.status_code in (200, 206, 302):
+        record_downloads([user_file])
+    return response
 
 
 class FileDownloadView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    renderer_classes = [BinaryFileRenderer]
+    renderer_classes = [JSONRenderer, BinaryFileRenderer]
 
     def get(self, request, pk):
+        limiter = None
         try:
             user_file = self.get_object(pk)
             if not user_file.file:
@@ -179,29 +389,27 @@ class FileDownloadView(generics.GenericAPIView):
                     "File not found"
                 )
 
-            user_file.last_download = timezone.now()
-            user_file.save(
-                update_fields=['last_download']
-            )
-
-            file_path = user_file.file.path
-            if not os.path.exists(file_path):
+            if not user_file.file_exists:
                 raise Http404(
-                    "File not found on disk"
+                    "File not found in storage"
                 )
 
-            response = FileResponse(
-                open(file_path, 'rb'),
-                content_type='application/octet-stream',
-                as_attachment=True,
-                filename=user_file.original_name
-            )
+            limiter = transfer_limiter(user_id=request.user.id)
+            if limiter is not None:
+                limiter.acquire()
 
-            response['Content-Disposition'] = f'attachment; filename="{user_file.original_name}"'
+            response = attachment_response(request, user_file)
+            if limiter is not None:
+                response = limiter.limit_response(response)
             return response
 
-        except Exception as e:
-            print(f"Error downloading file: {str(e)}")
+        except (exceptions.Throttled, TransferCapacityExhausted):
+            raise
+
+        except Exception:
+            if limiter is not None:
+                limiter.release()
+            logger.exception(f"Error downloading file {pk}")
             return Response(
                 {"detail": "Internal server error"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -212,50 +420,147 @@ class FileDownloadView(generics.GenericAPIView):
             UserFile,
             pk=pk
         )
+        self.check_file_access(file)
+        return file
+
+    def check_file_access(self, file):
+        check_file_access(self.request.user, file)
 
-        is_superuser = self.request.user.is_superuser
-        if not is_superuser and file.user != self.request.user:
-            raise PermissionDenied(
-                "You don't have the rights to download this file"
+
+class FileArchiveDownloadView(FileDownloadView):
+    """
+    Streams several files as a single ZIP archive:
+    GET files/archive/?ids=1,2,3
+    """
+    renderer_classes = [JSONRenderer]
+
+    def get(self, request):
+        serializer = ArchiveDownloadSerializer(
+            data=request.query_params
+        )
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        files = UserFile.objects.filter(
+            pk__in=ids
+        ).only(
+            'id',
+            'user_id',
+            'file',
+            'original_name',
+            'size',
+            'upload_date',
+            'encoding'
+        ).in_bulk()
+        if len(files) != len(ids):
+            raise Http404(
+                "File not found"
             )
+        for file in files.values():
+            self.check_file_access(file)
 
-        return file
+        limiter = transfer_limiter(user_id=request.user.id)
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = StreamingHttpResponse(
+                iter_zip(files[pk] for pk in ids),
+                content_type='application/zip'
+            )
+            response['Content-Disposition'] = 'attachment; filename="files.zip"'
+
+            record_downloads(files.values())
+        except Exception:
+            if limiter is not None:
+                limiter.release()
+            raise
+
+        if limiter is not None:
+            response = limiter.limit_response(response)
+        return response
+
+
+class FilePreviewView(FileDownloadView):
+    """
+    Serves a JPEG derivative of an image or PDF:
+    GET files/{id}/preview/?size=thumb|preview
+    """
+    renderer_classes = [JSONRenderer]
+
+    def get(self, request, pk):
+        user_file = self.get_object(pk)
+        kind = request.query_params.get('size', 'thumb')
+        if kind not in settings.STORAGE_PREVIEW_SIZES:
+            raise serializers.ValidationError({
+                'size': "Must be one of: "
+                        f"{', '.join(settings.STORAGE_PREVIEW_SIZES)}"
+            })
+
+        # A file never changes, neither do its derivatives
+        etag = quote_etag(
+            f'{user_file.pk}-{int(user_file.upload_date.timestamp())}-{kind}'
+        )
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            path = get_preview(user_file, kind)
+            if path is None:
+                raise Http404(
+                    "Preview is not available for this file"
+                )
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type='image/jpeg'
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = \
+            f'private, max-age={settings.STORAGE_PREVIEW_MAX_AGE}, immutable'
+        return response
 
 
 class SharedFileDownloadView(generics.GenericAPIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, shared_link):
-        try:
-            user_file = get_object_or_404(
-                UserFile,
-                shared_link=shared_link
+        user_file = resolve_shared_link(shared_link)
+        if user_file is None:
+            raise Http404(
+                "File not found"
             )
 
+        limiter = None
+        try:
             if user_file.is_shared_link_expired():
                 return Response(
                     {"detail": "Срок действия ссылки истек"},
                     status=status.HTTP_410_GONE
                 )
 
-            user_file.last_download = timezone.now()
-            user_file.save()
-
             if not user_file.file:
                 raise Http404(
                     "File not found on server"
                 )
 
-            response = FileResponse(
-                user_file.file,
-                as_attachment=True,
-                filename=user_file.original_name
+            limiter = transfer_limiter(
+                user_id=request.user.id,
+                shared_link=shared_link
             )
+            if limiter is not None:
+                limiter.acquire()
+
+            response = shared_file_response(request, user_file)
+            if limiter is not None:
+                response = limiter.limit_response(response)
             return response
 
-        except Exception as e:
+        except (exceptions.Throttled, TransferCapacityExhausted):
+            raise
+
+        except Exception:
+            if limiter is not None:
+                limiter.release()
+            logger.exception(f"Error downloading shared file {user_file.pk}")
             return Response(
-                {"detail": str(e)},
+                {"detail": "Internal server error"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
@@ -272,6 +577,7 @@ class FileShareView(generics.UpdateAPIView):
 
     def patch(self, request, *args, **kwargs):
         instance = self.get_object()
+        old_link = instance.shared_link
         serializer = self.get_serializer(
             instance,
             data=request.data,
@@ -283,8 +589,8 @@ class FileShareView(generics.UpdateAPIView):
         )
         serializer.save()
 
-        cache_key = f'user_files_{instance.user.id}'
-        cache.delete(cache_key)
+        invalidate_shared_links([old_link, instance.shared_link])
+        invalidate_user_files(instance.user_id)
         return Response(
             serializer.data
         )
@@ -292,13 +598,261 @@ class FileShareView(generics.UpdateAPIView):
     def delete(self, request, *args, **kwargs):
         instance = self.get_object()
         user_id = instance.user.id
-        
+        old_link = instance.shared_link
+
         instance.shared_link = None
         instance.shared_expiry = None
         instance.save()
 
-        cache_key = f'user_files_{user_id}'
-        cache.delete(cache_key)
+        invalidate_shared_links([old_link])
+        invalidate_user_files(user_id)
         return Response(
             status=status.HTTP_204_NO_CONTENT
         )
+
+
+class FileBatchView(generics.GenericAPIView):
+    """
+    Applies one action to many files of the user at once, selected
+    by `ids` or by the file list `filter`.
+    """
+    serializer_class = FileBatchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UserFile.objects.filter(
+            user=self.request.user
+        )
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = self.get_queryset()
+        if 'ids' in data:
+            queryset = queryset.filter(pk__in=data['ids'])
+        else:
+            queryset = filter_files(queryset, data['filter'])
+
+        action = data['action']
+        if action == 'delete':
+            count = UserFile.bulk_delete(queryset)
+        elif action == 'share':
+            count = UserFile.bulk_share(
+                queryset,
+                data.get('expiry_days')
+            )
+        elif action == 'unshare':
+            with transaction.atomic():
+                links = list(
+                    queryset.select_for_update().exclude(
+                        shared_link__isnull=True
+                    ).values_list('shared_link', flat=True)
+                )
+                count = queryset.update(
+                    shared_link=None,
+                    shared_expiry=None
+                )
+            invalidate_shared_links(links)
+        else:
+            count = queryset.update(
+                comment=data['comment']
+            )
+
+        invalidate_user_files(request.user.id)
+        return Response({
+            'action': action,
+            'count': count
+        })
+
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        pending = UploadSession.objects.filter(
+            user=user,
+            expires_at__gt=timezone.now()
+        ).aggregate(
+            total=Sum('size')
+        )['total'] or 0
+
+        size = serializer.validated_data['size']
+        if not user.has_storage_space(size + pending):
+            raise serializers.ValidationError({
+                'error': "You have exceeded the maximum storage limit. "
+                        "Please contact the administrator at admin@mail.ru "
+                        "to increase your storage quota"
+            })
+
+        serializer.save(user=user)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response['Upload-Offset'] = response.data['offset']
+        response['Location'] = reverse(
+            'upload-session-detail',
+            kwargs={'pk': response.data['id']}
+        )
+        return response
+
+
+class UploadSessionDetailView(generics.RetrieveDestroyAPIView):
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(
+            user=self.request.user,
+            expires_at__gt=timezone.now()
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        response['Upload-Offset'] = response.data['offset']
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def patch(self, request, *args, **kwargs):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            raise serializers.ValidationError({
+                'error': "Upload-Offset header is required"
+            })
+
+        if not is_local_storage():
+            return Response(
+                {'detail': "Chunked uploads need the local storage, "
+                           "PUT the content to upload_url instead"},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+
+        # The body is streamed outside of a transaction: the session is
+        # claimed instead of row locked, a concurrent PATCH gets a 409
+        session = get_object_or_404(self.get_queryset(), pk=kwargs['pk'])
+        if not session.claim():
+            return Response(
+                {'detail': "Another upload to this session is in progress"},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Upload-Offset': session.offset}
+            )
+
+        try:
+            # Read again under the claim, a previous writer may have
+            # moved it since
+            session.refresh_from_db(fields=['offset'])
+            if offset != session.offset:
+                return Response(
+                    {'detail': "Offset does not match the uploaded data"},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Upload-Offset': session.offset}
+                )
+
+            try:
+                session.append(request.stream or BytesIO(), offset)
+            except ValueError as e:
+                raise serializers.ValidationError({
+                    'error': str(e)
+                })
+        finally:
+            session.release()
+
+        serializer = self.get_serializer(session)
+        return Response(
+            serializer.data,
+            headers={'Upload-Offset': session.offset}
+        )
+
+
+class UploadSessionCompleteView(generics.GenericAPIView):
+    serializer_class = FileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(
+            user=self.request.user,
+            expires_at__gt=timezone.now()
+        )
+
+    def post(self, request, pk):
+        with transaction.atomic():
+            session = get_object_or_404(
+                self.get_queryset().select_for_update(),
+                pk=pk
+            )
+            if not is_local_storage():
+                session.refresh_offset()
+            if not session.is_complete():
+                return Response(
+                    {'detail': "Upload is not complete"},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Upload-Offset': session.offset}
+                )
+
+            instance = UserFile.objects.create(
+                user=request.user,
+                original_name=session.original_name,
+                size=session.size,
+                file=session.file.name,
+                comment=session.comment
+            )
+            UploadSession.objects.filter(pk=session.pk).delete()
+            transaction.on_commit(
+                lambda: attach_blob_task.delay(instance.pk)
+            )
+
+        invalidate_user_files(request.user.id)
+        serializer = self.get_serializer(instance)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class FileInstantUploadView(generics.GenericAPIView):
+    serializer_class = InstantUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        user = request.user
+        if not user.has_storage_space(data['size']):
+            raise serializers.ValidationError({
+                'error': "You have exceeded the maximum storage limit. "
+                        "Please contact the administrator at admin@mail.ru "
+                        "to increase your storage quota"
+            })
+
+        blob = Blob.acquire(data['sha256'], data['size'], user_id=user.id)
+        if blob is None:
+            return Response(
+                {'detail': "Content is unknown, upload the file"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            instance = UserFile.objects.create(
+                user=user,
+                blob=blob,
+                original_name=data['original_name'],
+                size=blob.size,
+                file=blob.file.name,
+                encoding=blob.encoding,
+                comment=data.get('comment', '')
+            )
+        except Exception:
+            Blob.release(blob.pk)
+            raise
+
+        invalidate_user_files(user.id)
+        return Response(
+            FileSerializer(instance).data,
+            status=status.HTTP_201_CREATED
+        )
@@ -23,6 +23,27 @@ app.conf.beat_schedule = {
             'expires': 30.0
         }
     },
+    'flush-downloads': {
+        'task': 'storage.tasks.flush_downloads_task',
+        'schedule': 30.0,
+        'options': {
+            'expires': 15.0
+        }
+    },
+    'evict-previews': {
+        'task': 'storage.tasks.evict_previews_task',
+        'schedule': 60.0 * 60,
+        'options': {
+            'expires': 60.0 * 30
+        }
+    },
+    'reconcile-storage-usage': {
+        'task': 'storage.tasks.reconcile_storage_usage_task',
+        'schedule': 60.0 * 60,
+        'options': {
+            'expires': 60.0 * 30
+        }
+    },
 }
 
 app.conf.timezone = 'Europe/Moscow'
@@ -18,6 +18,14 @@ env = environ.Env(
     CSRF_TRUSTED_ORIGINS=(list, ['http://localhost:3000']),
     REDIS_URL=(str, 'redis://localhost:6379/0'),
     REDIS_CACHE_URL=(str, 'redis://localhost:6379/1'),
+    STORAGE_DOWNLOAD_MODE=(str, 'django'),
+    STORAGE_ASYNC_DOWNLOADS=(bool, False),
+    STORAGE_BACKEND=(str, 'local'),
+    S3_BUCKET_NAME=(str, 'mycloud'),
+    S3_ENDPOINT_URL=(str, ''),
+    S3_ACCESS_KEY=(str, ''),
+    S3_SECRET_KEY=(str, ''),
+    S3_REGION_NAME=(str, 'us-east-1'),
 )
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -50,6 +58,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     ## Third Party ##
     'rest_framework',
@@ -124,12 +133,17 @@ AUTHENTICATION_BACKENDS = [
 ## ================= ##
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'apps.accounts.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.parsers.BoundedJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
@@ -194,6 +208,54 @@ STATIC_ROOT = '/app/backend/static'
 MEDIA_URL = '/media/'
 STATIC_URL = '/static/'
 
+# 'local' keeps files under MEDIA_ROOT, 's3' in a bucket of an
+# S3-compatible storage (AWS, MinIO, ...) through django-storages
+STORAGE_BACKEND = env('STORAGE_BACKEND')
+STORAGE_PRESIGNED_URL_TTL = 60 * 15  # presigned GET and PUT URLs
+
+if STORAGE_BACKEND == 's3':
+    STORAGES = {
+        'default': {
+            'BACKEND': 'storages.backends.s3.S3Storage',
+            'OPTIONS': {
+                'bucket_name': env('S3_BUCKET_NAME'),
+                'endpoint_url': env('S3_ENDPOINT_URL') or None,
+                'access_key': env('S3_ACCESS_KEY'),
+                'secret_key': env('S3_SECRET_KEY'),
+                'region_name': env('S3_REGION_NAME'),
+                'signature_version': 's3v4',
+                'default_acl': None,
+                'file_overwrite': False,
+                'querystring_auth': True,
+                'querystring_expire': STORAGE_PRESIGNED_URL_TTL,
+            },
+        },
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+        },
+    }
+
+# 'django' streams files from the worker, 'accel' hands them
+# to nginx through the internal location below (X-Accel-Redirect),
+# 'redirect' sends the client to a presigned URL of the bucket
+STORAGE_DOWNLOAD_MODE = env('STORAGE_DOWNLOAD_MODE')
+STORAGE_ACCEL_REDIRECT_LOCATION = '/protected-media/'
+# Route downloads to the async views; only useful under an ASGI
+# server (mycloud.asgi), WSGI would buffer their async bodies
+STORAGE_ASYNC_DOWNLOADS = env('STORAGE_ASYNC_DOWNLOADS')
+STORAGE_ARCHIVE_MAX_FILES = 1000
+
+# Download limits enforced in Redis: 'rate' in bytes per second shared
+# by all transfers of the scope, 'concurrency' in parallel transfers.
+# None disables a limit. 'user' applies to each downloading user,
+# 'link' to each shared link
+STORAGE_TRANSFER_LIMITS = {
+    'global': {'rate': None, 'concurrency': None},
+    'user': {'rate': None, 'concurrency': None},
+    'link': {'rate': None, 'concurrency': None},
+}
+STORAGE_TRANSFER_SLOT_TTL = 60  # a stalled transfer frees its slot
+
 
 ## ============= ##
 ## 11. Templates ##
@@ -218,9 +280,45 @@ TEMPLATES = [
 ## ======================== ##
 ## 12. File Upload Settings ##
 ## ======================== ##
-FILE_UPLOAD_MAX_MEMORY_SIZE = 2147483648  # 2GB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 2147483648  # 2GB
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB of non-file fields or JSON
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 1000
+DATA_UPLOAD_MAX_NUMBER_FILES = 1000
+
+UPLOAD_CHUNK_SIZE = 1048576  # 1MB
+UPLOAD_MEMORY_BUDGET = 67108864  # 64MB of upload request buffers per worker
+UPLOAD_SESSION_TTL = 60 * 60 * 24  # 24 hours
+UPLOAD_SESSION_LOCK_TTL = 60  # a PATCH that stopped sending frees the session after this
+# Uploads whose first chunk shrinks to STORAGE_COMPRESSION_MIN_RATIO
+# at a cheap level are stored as seekable zstd (needs zstandard) in
+# frames of STORAGE_COMPRESSION_FRAME_SIZE uncompressed bytes. Only
+# with STORAGE_DOWNLOAD_MODE = 'django', which decompresses them
+STORAGE_COMPRESSION = True
+STORAGE_COMPRESSION_LEVEL = 3
+STORAGE_COMPRESSION_FRAME_SIZE = 1048576  # 1MB
+STORAGE_COMPRESSION_MIN_RATIO = 0.9
+
+# Thumbnails and first-page previews of images and PDFs (needs Pillow,
+# PyMuPDF for PDF), kept in a local LRU cache of derivatives
+STORAGE_PREVIEW_ROOT = '/app/backend/previews'
+STORAGE_PREVIEW_CACHE_SIZE = 1024 * 1024 * 1024  # 1GB
+STORAGE_PREVIEW_SIZES = {'thumb': 256, 'preview': 1024}  # longest side
+STORAGE_PREVIEW_MAX_SOURCE_SIZE = 50 * 1024 * 1024
+STORAGE_PREVIEW_MAX_AGE = 60 * 60 * 24 * 365
+
+# Files of a user are spread over this many levels of 256
+# subdirectories (user_1_storage/ab/cd/...), 0 keeps a flat directory.
+# Existing files follow with `manage.py migrate_storage_layout`
+STORAGE_USER_DIR_LEVELS = 2
+
+# cleanup_files_task reconciles rows and files incrementally, one
+# task per user shard (user id modulo STORAGE_CLEANUP_SHARDS)
+STORAGE_CLEANUP_SHARDS = 8
+STORAGE_CLEANUP_BATCH_SIZE = 1000  # rows checked per shard and run
+STORAGE_CLEANUP_DIR_BATCH = 50  # user directories walked per shard and run
+STORAGE_CLEANUP_GRACE = 60 * 60  # younger files may be in-flight uploads
+STORAGE_CLEANUP_MAX_DELETES = 100  # rows without files deleted per shard and run
+STORAGE_CLEANUP_LOCK_TTL = 60 * 10
 
 
 ## ================== ##
@@ -266,3 +364,10 @@ CACHES = {
 }
 
 CACHE_TTL = 60 * 60
+
+# Token authentication: tokens resolve through an in-process LRU in
+# front of the Redis cache, revocations are broadcast on the channel
+AUTH_TOKEN_CACHE_TTL = 15 * 60
+AUTH_TOKEN_LOCAL_CACHE_TTL = 60
+AUTH_TOKEN_LOCAL_CACHE_SIZE = 10000
+AUTH_TOKEN_REVOCATION_CHANNEL = 'mycloud:auth:revoked'
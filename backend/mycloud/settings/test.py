@@ -25,9 +25,12 @@ CACHES = {
 }
 
 MEDIA_ROOT = tempfile.mkdtemp()
+STORAGE_PREVIEW_ROOT = tempfile.mkdtemp()
 
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
 
 AUTH_PASSWORD_VALIDATORS = []
+
+CELERY_TASK_ALWAYS_EAGER = True
@@ -2,17 +2,22 @@ import api from './index';
 
 
 const usersApi = {
-  getUsers: (signal) => api.get(
-    '/auth/users/',
-    { signal }
-  
-  ).then(response => {
-    console.log(
-      'Users data from API:', 
-      response.data
-    );
-    return response;
-  }),
+  // The list is paginated by cursor, every page is loaded
+  getUsers: async (signal) => {
+    const users = [];
+    let cursor = null;
+    do {
+      const response = await api.get(
+        '/auth/users/',
+        { params: cursor ? { cursor } : {}, signal }
+      );
+      users.push(...response.data.results);
+      cursor = response.data.next
+        ? new URL(response.data.next).searchParams.get('cursor')
+        : null;
+    } while (cursor);
+    return { data: users };
+  },
 
   deleteUser: (id, signal) => api.delete(
     `/auth/users/${id}/`,